@@ -9,14 +9,23 @@
 
 
 import base64
+import concurrent.futures
+import functools
+import json
+import logging
 import os
+import threading
+import urllib.parse
 import nacl.encoding
 import nacl.public
-import requests
+
+from typing import Callable, Dict, Hashable, List, Tuple, Union
 
 from ..Auth import GhAppPrivateKey
 from ..DefaultHosts import DefaultApiHost, HostGetter
+from ..Http.Client import DefaultHttpClient, HttpClient
 from ..Utils import CheckResp, LogEnvVars
+from . import ApiRepos
 from .ApiRunner import ApiRunner
 from ._Types import (
 	_AuthType,
@@ -36,6 +45,7 @@ class GetRepoPubKey(ApiRunner):
 		owner: str,
 		repoName: str,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
 		super(GetRepoPubKey, self).__init__()
 
@@ -44,11 +54,84 @@ class GetRepoPubKey(ApiRunner):
 			owner=owner,
 			repo=repoName,
 		)
+		self._httpClient = httpClient
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Get(
+			url=self._url,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class GetOrgPubKey(ApiRunner):
+	# https://docs.github.com/en/rest/actions/secrets#get-an-organization-public-key
+
+	URL_BASE = 'https://{api_host}/orgs/{org}/actions/secrets/public-key'
+
+	def __init__(
+		self,
+		org: str,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(GetOrgPubKey, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			org=org,
+		)
+		self._httpClient = httpClient
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Get(
+			url=self._url,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class GetEnvPubKey(ApiRunner):
+	# https://docs.github.com/en/rest/actions/secrets#get-an-environment-public-key
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/environments/{env}/secrets/public-key'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		envName: str,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(GetEnvPubKey, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+			env=urllib.parse.quote(envName, safe=''),
+		)
+		self._httpClient = httpClient
 
 	def MakeRequest(self, auth: _AuthType) -> _RespType:
 		authHeaderKey, authHeaderVal = auth.GetHeader()
 
-		req = requests.get(
+		req = self._httpClient.Get(
 			url=self._url,
 			headers={
 				'Accept': 'application/vnd.github+json',
@@ -60,6 +143,125 @@ class GetRepoPubKey(ApiRunner):
 		return req
 
 
+@functools.lru_cache(maxsize=256)
+def GetSealedBox(pubKey: str) -> nacl.public.SealedBox:
+	# sealing is stateless, so one box per public key is shared by all threads
+	return nacl.public.SealedBox(
+		nacl.public.PublicKey(
+			pubKey.encode("utf-8"),
+			nacl.encoding.Base64Encoder()
+		)
+	)
+
+
+def EncryptSecret(pubKey: str, secretValue: str) -> str:
+	encrypted = GetSealedBox(pubKey).encrypt(secretValue.encode("utf-8"))
+	return base64.b64encode(encrypted).decode("utf-8")
+
+
+_PubKey = Tuple[str, str]
+
+
+class PubKeyCache(object):
+	'''
+	Caches the (key, key ID) pairs used to encrypt secrets, so each
+	public key is fetched once per process; fetches are single-flight per
+	key.
+	'''
+
+	def __init__(self) -> None:
+		super(PubKeyCache, self).__init__()
+
+		self._lock = threading.Lock()
+		self._keyLocks: Dict[Hashable, threading.Lock] = {}
+		self._pubKeys: Dict[Hashable, _PubKey] = {}
+
+	def _GetKeyLock(self, key: Hashable) -> threading.Lock:
+		with self._lock:
+			keyLock = self._keyLocks.get(key, None)
+			if keyLock is None:
+				keyLock = threading.Lock()
+				self._keyLocks[key] = keyLock
+			return keyLock
+
+	def GetOrFetch(
+		self,
+		key: Hashable,
+		fetcher: Callable[[], _RespType],
+	) -> _PubKey:
+		with self._GetKeyLock(key):
+			pubKey = self._pubKeys.get(key, None)
+			if pubKey is None:
+				respJson = fetcher().json()
+				pubKey = (respJson['key'], respJson['key_id'])
+				self._pubKeys[key] = pubKey
+			return pubKey
+
+	def GetRepoPubKey(
+		self,
+		auth: _AuthType,
+		owner: str,
+		repoName: str,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> _PubKey:
+		pubKeyGetter = GetRepoPubKey(
+			owner=owner,
+			repoName=repoName,
+			hostGetter=hostGetter,
+			httpClient=httpClient,
+		)
+		return self.GetOrFetch(
+			('repo', hostGetter.GetHost(), owner, repoName),
+			lambda: pubKeyGetter.MakeRequest(auth),
+		)
+
+	def GetOrgPubKey(
+		self,
+		auth: _AuthType,
+		org: str,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> _PubKey:
+		pubKeyGetter = GetOrgPubKey(
+			org=org,
+			hostGetter=hostGetter,
+			httpClient=httpClient,
+		)
+		return self.GetOrFetch(
+			('org', hostGetter.GetHost(), org),
+			lambda: pubKeyGetter.MakeRequest(auth),
+		)
+
+	def GetEnvPubKey(
+		self,
+		auth: _AuthType,
+		owner: str,
+		repoName: str,
+		envName: str,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> _PubKey:
+		pubKeyGetter = GetEnvPubKey(
+			owner=owner,
+			repoName=repoName,
+			envName=envName,
+			hostGetter=hostGetter,
+			httpClient=httpClient,
+		)
+		return self.GetOrFetch(
+			('env', hostGetter.GetHost(), owner, repoName, envName),
+			lambda: pubKeyGetter.MakeRequest(auth),
+		)
+
+
+_DEFAULT_PUB_KEY_CACHE = PubKeyCache()
+
+
+def DefaultPubKeyCache() -> PubKeyCache:
+	return _DEFAULT_PUB_KEY_CACHE
+
+
 class SetRepoSecret(ApiRunner):
 	# https://docs.github.com/en/rest/actions/secrets#create-or-update-a-repository-secret
 
@@ -74,6 +276,7 @@ class SetRepoSecret(ApiRunner):
 		secretName: str,
 		secretValue: str,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
 		super(SetRepoSecret, self).__init__()
 
@@ -83,19 +286,14 @@ class SetRepoSecret(ApiRunner):
 			repo=repoName,
 			secret_name=secretName,
 		)
+		self._httpClient = httpClient
 
 		self._repoPubKey = repoPubKey
 		self._repoPubKeyID = repoPubKeyID
 		self._secretValue = secretValue
 
 	def _EncryptSecret(self) -> str:
-		pubKey = nacl.public.PublicKey(
-			self._repoPubKey.encode("utf-8"),
-			nacl.encoding.Base64Encoder()
-		)
-		sealedBox = nacl.public.SealedBox(pubKey)
-		encrypted = sealedBox.encrypt(self._secretValue.encode("utf-8"))
-		return base64.b64encode(encrypted).decode("utf-8")
+		return EncryptSecret(self._repoPubKey, self._secretValue)
 
 	def _GenPayload(self) -> dict:
 		return {
@@ -106,8 +304,134 @@ class SetRepoSecret(ApiRunner):
 	def MakeRequest(self, auth: _AuthType) -> _RespType:
 		authHeaderKey, authHeaderVal = auth.GetHeader()
 
-		req = requests.put(
+		req = self._httpClient.Put(
 			url=self._url,
+			# setting the same secret again has the same effect
+			idempotent=True,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+			json=self._GenPayload(),
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class SetOrgSecret(ApiRunner):
+	# https://docs.github.com/en/rest/actions/secrets#create-or-update-an-organization-secret
+
+	URL_BASE = 'https://{api_host}/orgs/{org}/actions/secrets/{secret_name}'
+
+	VISIBILITIES = ('all', 'private', 'selected')
+
+	def __init__(
+		self,
+		org: str,
+		orgPubKey: str,
+		orgPubKeyID: str,
+		secretName: str,
+		secretValue: str,
+		visibility: str = 'private',
+		selectedRepoIDs: Union[List[int], None] = None,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(SetOrgSecret, self).__init__()
+
+		if visibility not in self.VISIBILITIES:
+			raise ValueError(f'Unknown visibility {visibility}')
+		if (visibility == 'selected') != (selectedRepoIDs is not None):
+			raise ValueError(
+				'Selected repositories are given if and only if'
+				' the visibility is "selected"'
+			)
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			org=org,
+			secret_name=secretName,
+		)
+		self._httpClient = httpClient
+
+		self._orgPubKey = orgPubKey
+		self._orgPubKeyID = orgPubKeyID
+		self._secretValue = secretValue
+		self._visibility = visibility
+		self._selectedRepoIDs = selectedRepoIDs
+
+	def _GenPayload(self) -> dict:
+		payload = {
+			'encrypted_value': EncryptSecret(self._orgPubKey, self._secretValue),
+			'key_id': self._orgPubKeyID,
+			'visibility': self._visibility,
+		}
+		if self._selectedRepoIDs is not None:
+			payload['selected_repository_ids'] = self._selectedRepoIDs
+		return payload
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Put(
+			url=self._url,
+			idempotent=True,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+			json=self._GenPayload(),
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class SetEnvSecret(ApiRunner):
+	# https://docs.github.com/en/rest/actions/secrets#create-or-update-an-environment-secret
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/environments/{env}/secrets/{secret_name}'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		envName: str,
+		envPubKey: str,
+		envPubKeyID: str,
+		secretName: str,
+		secretValue: str,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(SetEnvSecret, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+			env=urllib.parse.quote(envName, safe=''),
+			secret_name=secretName,
+		)
+		self._httpClient = httpClient
+
+		self._envPubKey = envPubKey
+		self._envPubKeyID = envPubKeyID
+		self._secretValue = secretValue
+
+	def _GenPayload(self) -> dict:
+		return {
+			'encrypted_value': EncryptSecret(self._envPubKey, self._secretValue),
+			'key_id': self._envPubKeyID,
+		}
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Put(
+			url=self._url,
+			idempotent=True,
 			headers={
 				'Accept': 'application/vnd.github+json',
 				authHeaderKey: authHeaderVal,
@@ -127,6 +451,7 @@ class SetRepoSecretFromGhApp(ApiRunner):
 		repoName: str,
 		secretName: str,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
 		super(SetRepoSecretFromGhApp, self).__init__()
 
@@ -134,6 +459,7 @@ class SetRepoSecretFromGhApp(ApiRunner):
 		self._repoName = repoName
 		self._secretName = secretName
 		self._hostGetter = hostGetter
+		self._httpClient = httpClient
 
 	def CliRun(self, auth: _AuthType) -> None:
 
@@ -141,13 +467,18 @@ class SetRepoSecretFromGhApp(ApiRunner):
 			owner=self._owner,
 			repoName=self._repoName,
 			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
 		)
 		pubKeyRespJson = pubKeyGetter.MakeRequest(auth).json()
 		pubKey = pubKeyRespJson['key']
 		pubKeyID = pubKeyRespJson['key_id']
 
-		appKeyGetter = GhAppPrivateKey.FromEnvVars()
-		token = appKeyGetter.GetToken()
+		appKeyGetter = GhAppPrivateKey.FromEnvVars(
+			httpClient=self._httpClient,
+		)
+		# the secret outlives this run, so a cached token, which may expire
+		# soon, must not be stored
+		token = appKeyGetter.MintToken()
 
 		secretSetter = SetRepoSecret(
 			owner=self._owner,
@@ -157,6 +488,7 @@ class SetRepoSecretFromGhApp(ApiRunner):
 			secretName=self._secretName,
 			secretValue=token,
 			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
 		)
 		secretSetter.MakeRequest(auth)
 
@@ -177,3 +509,364 @@ class SetRepoSecretFromGhApp(ApiRunner):
 			repoName=repoName,
 			secretName=args.secret,
 		)
+
+
+def LoadSecrets(
+	secretsFile: str = None,
+	envPrefix: str = None,
+) -> Dict[str, str]:
+	'''
+	Reads secrets from a JSON object file or a file of `NAME=value` lines,
+	and/or from the environment variables named `<envPrefix><NAME>`.
+	'''
+	secrets = {}
+
+	if secretsFile is not None:
+		with open(secretsFile, 'r') as f:
+			content = f.read()
+		if secretsFile.endswith('.json'):
+			secrets.update(json.loads(content))
+		else:
+			for line in content.splitlines():
+				line = line.strip()
+				if (len(line) == 0) or line.startswith('#'):
+					continue
+				name, sep, value = line.partition('=')
+				if sep == '':
+					raise ValueError(f'Invalid line in {secretsFile}: {name}')
+				secrets[name.strip()] = value
+
+	if envPrefix is not None:
+		for name, value in os.environ.items():
+			if name.startswith(envPrefix) and (len(name) > len(envPrefix)):
+				secrets[name[len(envPrefix):]] = value
+
+	return secrets
+
+
+def _AddSecretsArgs(opArgParser: _ArgParserType) -> None:
+	opArgParser.add_argument(
+		'--secrets-file', type=str, required=False,
+		help='File of secrets; a JSON object if it ends with ".json",'
+			' otherwise lines of NAME=value',
+	)
+	opArgParser.add_argument(
+		'--env-prefix', type=str, required=False,
+		help='Also take secrets from the env vars starting with this'
+			' prefix, named without it',
+	)
+
+
+def _LoadSecretsFromArgs(args: _ArgsType) -> Dict[str, str]:
+	secrets = LoadSecrets(
+		secretsFile=args.secrets_file,
+		envPrefix=args.env_prefix,
+	)
+	if len(secrets) == 0:
+		raise ValueError('No secrets given')
+	return secrets
+
+
+class SyncRepoSecrets(ApiRunner):
+	'''
+	Sets many secrets in many repositories (or in an environment of each
+	repository); each public key is fetched once, and the PUTs run
+	concurrently.
+	'''
+
+	DEFAULT_JOBS = 8
+
+	def __init__(
+		self,
+		repos: List[str],
+		secrets: Dict[str, str],
+		envName: Union[str, None] = None,
+		jobs: int = DEFAULT_JOBS,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+		pubKeyCache: PubKeyCache = DefaultPubKeyCache(),
+	) -> None:
+		super(SyncRepoSecrets, self).__init__()
+
+		self._repos = list(dict.fromkeys(repos))
+		self._secrets = secrets
+		self._envName = envName
+		self._jobs = jobs
+		self._hostGetter = hostGetter
+		self._httpClient = httpClient
+		self._pubKeyCache = pubKeyCache
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	def _SetOne(self, auth: _AuthType, repo: str, secretName: str) -> None:
+		owner, repoName = repo.split('/', maxsplit=1)
+		if self._envName is not None:
+			pubKey, pubKeyID = self._pubKeyCache.GetEnvPubKey(
+				auth=auth,
+				owner=owner,
+				repoName=repoName,
+				envName=self._envName,
+				hostGetter=self._hostGetter,
+				httpClient=self._httpClient,
+			)
+			SetEnvSecret(
+				owner=owner,
+				repoName=repoName,
+				envName=self._envName,
+				envPubKey=pubKey,
+				envPubKeyID=pubKeyID,
+				secretName=secretName,
+				secretValue=self._secrets[secretName],
+				hostGetter=self._hostGetter,
+				httpClient=self._httpClient,
+			).MakeRequest(auth)
+			return
+
+		pubKey, pubKeyID = self._pubKeyCache.GetRepoPubKey(
+			auth=auth,
+			owner=owner,
+			repoName=repoName,
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		)
+		SetRepoSecret(
+			owner=owner,
+			repoName=repoName,
+			repoPubKey=pubKey,
+			repoPubKeyID=pubKeyID,
+			secretName=secretName,
+			secretValue=self._secrets[secretName],
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		).MakeRequest(auth)
+
+	def SetAll(self, auth: _AuthType) -> List[Tuple[str, str, Exception]]:
+		'''
+		Returns (repo, secret name, error) for each secret, in order;
+		error is None if the secret was set.
+		'''
+		# interleave the repos, so the pool is not held up by one repo's key
+		tasks = [
+			(repo, secretName)
+			for secretName in sorted(self._secrets)
+			for repo in self._repos
+		]
+		with concurrent.futures.ThreadPoolExecutor(
+			max_workers=self._jobs
+		) as executor:
+			futures = {
+				task: executor.submit(self._SetOne, auth, *task)
+				for task in tasks
+			}
+			concurrent.futures.wait(futures.values())
+
+		return [
+			(repo, secretName, futures[(repo, secretName)].exception())
+			for repo in self._repos
+			for secretName in sorted(self._secrets)
+		]
+
+	def CliRun(self, auth: _AuthType) -> None:
+		results = self.SetAll(auth)
+
+		failed = 0
+		for repo, secretName, exc in results:
+			if exc is None:
+				print(f'OK     {repo} {secretName}')
+			else:
+				print(f'FAILED {repo} {secretName}: {exc}')
+				failed += 1
+
+		self._logger.info(f'{len(results) - failed} of {len(results)} secrets set')
+		if failed > 0:
+			raise RuntimeError(f'Failed to set {failed} secrets')
+
+	@staticmethod
+	def _AddOpArgParsers(opArgParser: _ArgParserType) -> None:
+		opArgParser.add_argument(
+			'--repos', type=str, nargs='+', required=False,
+			default=[ os.environ['GITHUB_REPOSITORY'] ]
+				if 'GITHUB_REPOSITORY' in os.environ else None,
+			help='Repos specified in the format of "owner/repo"'
+				' (default: GITHUB_REPOSITORY env var)',
+		)
+		opArgParser.add_argument(
+			'--environment', type=str, required=False,
+			help='Set the secrets in this deployment environment'
+				' of each repo instead',
+		)
+		_AddSecretsArgs(opArgParser)
+		opArgParser.add_argument(
+			'--jobs', '-j', type=int, default=SyncRepoSecrets.DEFAULT_JOBS,
+			help='Number of secrets set concurrently'
+				f' (default: {SyncRepoSecrets.DEFAULT_JOBS})',
+		)
+		LogEnvVars.LogEnvVars()
+
+	@classmethod
+	def FromArgs(cls, args: _ArgsType) -> ApiRunner:
+		if args.repos is None:
+			raise ValueError('Repos not specified')
+
+		return cls(
+			repos=args.repos,
+			secrets=_LoadSecretsFromArgs(args),
+			envName=args.environment,
+			jobs=args.jobs,
+		)
+
+
+class SyncOrgSecrets(ApiRunner):
+	'''
+	Sets many organization secrets, each with one PUT, instead of writing
+	the same secret to every repository.
+	'''
+
+	DEFAULT_JOBS = 8
+
+	def __init__(
+		self,
+		org: str,
+		secrets: Dict[str, str],
+		visibility: str = 'private',
+		selectedRepos: Union[List[str], None] = None,
+		jobs: int = DEFAULT_JOBS,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+		pubKeyCache: PubKeyCache = DefaultPubKeyCache(),
+	) -> None:
+		super(SyncOrgSecrets, self).__init__()
+
+		self._org = org
+		self._secrets = secrets
+		self._visibility = visibility
+		self._selectedRepos = selectedRepos
+		self._jobs = jobs
+		self._hostGetter = hostGetter
+		self._httpClient = httpClient
+		self._pubKeyCache = pubKeyCache
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	def _GetRepoID(self, auth: _AuthType, repo: str) -> int:
+		owner, repoName = repo.split('/', maxsplit=1) \
+			if '/' in repo else (self._org, repo)
+		return ApiRepos.Get(
+			owner=owner,
+			repoName=repoName,
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		).MakeRequest(auth).json()['id']
+
+	def _SetOne(
+		self,
+		auth: _AuthType,
+		secretName: str,
+		selectedRepoIDs: Union[List[int], None],
+	) -> None:
+		pubKey, pubKeyID = self._pubKeyCache.GetOrgPubKey(
+			auth=auth,
+			org=self._org,
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		)
+		SetOrgSecret(
+			org=self._org,
+			orgPubKey=pubKey,
+			orgPubKeyID=pubKeyID,
+			secretName=secretName,
+			secretValue=self._secrets[secretName],
+			visibility=self._visibility,
+			selectedRepoIDs=selectedRepoIDs,
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		).MakeRequest(auth)
+
+	def SetAll(self, auth: _AuthType) -> List[Tuple[str, Exception]]:
+		'''
+		Returns (secret name, error) for each secret, in order;
+		error is None if the secret was set.
+		'''
+		with concurrent.futures.ThreadPoolExecutor(
+			max_workers=self._jobs
+		) as executor:
+			selectedRepoIDs = None
+			if self._selectedRepos is not None:
+				# the selection is shared by all secrets; resolve it once
+				selectedRepoIDs = list(executor.map(
+					lambda repo: self._GetRepoID(auth, repo),
+					self._selectedRepos,
+				))
+
+			secretNames = sorted(self._secrets)
+			futures = [
+				executor.submit(self._SetOne, auth, secretName, selectedRepoIDs)
+				for secretName in secretNames
+			]
+			concurrent.futures.wait(futures)
+
+		return [
+			(secretName, future.exception())
+			for secretName, future in zip(secretNames, futures)
+		]
+
+	def CliRun(self, auth: _AuthType) -> None:
+		results = self.SetAll(auth)
+
+		failed = 0
+		for secretName, exc in results:
+			if exc is None:
+				print(f'OK     {self._org} {secretName}')
+			else:
+				print(f'FAILED {self._org} {secretName}: {exc}')
+				failed += 1
+
+		self._logger.info(f'{len(results) - failed} of {len(results)} secrets set')
+		if failed > 0:
+			raise RuntimeError(f'Failed to set {failed} secrets')
+
+	@staticmethod
+	def _AddOpArgParsers(opArgParser: _ArgParserType) -> None:
+		opArgParser.add_argument(
+			'--org', type=str, required=False,
+			default=os.environ.get('GITHUB_REPOSITORY_OWNER', None),
+			help='Organization name'
+				' (default: GITHUB_REPOSITORY_OWNER env var)',
+		)
+		opArgParser.add_argument(
+			'--visibility', type=str, choices=SetOrgSecret.VISIBILITIES,
+			default='private',
+			help='Which repos of the organization can use the secrets'
+				' (default: private)',
+		)
+		opArgParser.add_argument(
+			'--selected-repos', type=str, nargs='+', required=False,
+			help='Repos that can use the secrets, as "repo" or "owner/repo";'
+				' implies --visibility selected',
+		)
+		_AddSecretsArgs(opArgParser)
+		opArgParser.add_argument(
+			'--jobs', '-j', type=int, default=SyncOrgSecrets.DEFAULT_JOBS,
+			help='Number of requests made concurrently'
+				f' (default: {SyncOrgSecrets.DEFAULT_JOBS})',
+		)
+		LogEnvVars.LogEnvVars()
+
+	@classmethod
+	def FromArgs(cls, args: _ArgsType) -> ApiRunner:
+		if args.org is None:
+			raise ValueError('Organization not specified')
+
+		visibility = args.visibility
+		if args.selected_repos is not None:
+			visibility = 'selected'
+		elif visibility == 'selected':
+			raise ValueError('--selected-repos is required for "selected"')
+
+		return cls(
+			org=args.org,
+			secrets=_LoadSecretsFromArgs(args),
+			visibility=visibility,
+			selectedRepos=args.selected_repos,
+			jobs=args.jobs,
+		)
@@ -8,12 +8,16 @@
 ###
 
 
-import base64
+import logging
 import os
-import requests
+import threading
+
+from typing import Dict, Hashable, Tuple, Union
 
 from ..DefaultHosts import DefaultApiHost, HostGetter
-from ..Utils import CheckResp, LogEnvVars
+from ..Http.Client import DefaultHttpClient, HttpClient
+from ..Http.JsonStream import Base64JsonBody
+from ..Utils import CheckResp, GitBlob, LogEnvVars
 from .ApiRunner import ApiRunner
 from ._Types import (
 	_AuthType,
@@ -23,6 +27,185 @@ from ._Types import (
 )
 
 
+class Get(ApiRunner):
+	# https://docs.github.com/en/rest/repos/contents#get-repository-content
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/contents/{path}'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		path: str,
+		ref: Union[str, None] = None,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(Get, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+			path=path,
+		)
+		self._httpClient = httpClient
+
+		self._params = {}
+		if ref is not None:
+			self._params['ref'] = ref
+
+	def MakeRequest(self, auth: _AuthType, allowNotFound: bool = False) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Get(
+			url=self._url,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+			params=self._params,
+		)
+		if allowNotFound and (req.status_code == 404):
+			return req
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class FileShaCache(object):
+	'''
+	Blob SHAs of the files on a branch, filled in one directory listing at
+	a time, so files in the same directory cost a single request.
+	'''
+
+	# the contents API lists at most this many entries of a directory
+	MAX_DIR_ENTRIES = 1000
+
+	def __init__(self) -> None:
+		super(FileShaCache, self).__init__()
+
+		self._lock = threading.Lock()
+		self._keyLocks: Dict[Hashable, threading.Lock] = {}
+		self._dirs: Dict[Hashable, Dict[str, str]] = {}
+
+	def _GetKeyLock(self, key: Hashable) -> threading.Lock:
+		with self._lock:
+			keyLock = self._keyLocks.get(key, None)
+			if keyLock is None:
+				keyLock = threading.Lock()
+				self._keyLocks[key] = keyLock
+			return keyLock
+
+	@staticmethod
+	def _MakeKey(
+		hostGetter: HostGetter,
+		owner: str,
+		repoName: str,
+		branch: str,
+		dirPath: str,
+	) -> Tuple[str, str, str, str, str]:
+		return (hostGetter.GetHost(), owner, repoName, branch, dirPath)
+
+	@staticmethod
+	def _SplitPath(path: str) -> Tuple[str, str]:
+		dirPath, _, fileName = path.strip('/').rpartition('/')
+		return dirPath, fileName
+
+	def _ListDir(
+		self,
+		auth: _AuthType,
+		owner: str,
+		repoName: str,
+		branch: str,
+		dirPath: str,
+		hostGetter: HostGetter,
+		httpClient: HttpClient,
+	) -> Dict[str, str]:
+		resp = Get(
+			owner=owner,
+			repoName=repoName,
+			path=dirPath,
+			ref=branch,
+			hostGetter=hostGetter,
+			httpClient=httpClient,
+		).MakeRequest(auth, allowNotFound=True)
+		if resp.status_code == 404:
+			return {}
+
+		entries = resp.json()
+		if not isinstance(entries, list):
+			# not a directory
+			return {}
+		return {
+			entry['name']: entry['sha']
+			for entry in entries if entry['type'] == 'file'
+		}
+
+	def GetFileSha(
+		self,
+		auth: _AuthType,
+		owner: str,
+		repoName: str,
+		branch: str,
+		path: str,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> Union[str, None]:
+		'''
+		Returns the blob SHA of the file at `path`, or None if there is none.
+		'''
+		dirPath, fileName = self._SplitPath(path)
+		key = self._MakeKey(hostGetter, owner, repoName, branch, dirPath)
+
+		with self._GetKeyLock(key):
+			files = self._dirs.get(key, None)
+			if files is None:
+				files = self._ListDir(
+					auth, owner, repoName, branch, dirPath, hostGetter, httpClient,
+				)
+				self._dirs[key] = files
+
+		sha = files.get(fileName, None)
+		if (sha is None) and (len(files) >= self.MAX_DIR_ENTRIES):
+			# the listing may be truncated; ask for the file itself
+			resp = Get(
+				owner=owner,
+				repoName=repoName,
+				path=path,
+				ref=branch,
+				hostGetter=hostGetter,
+				httpClient=httpClient,
+			).MakeRequest(auth, allowNotFound=True)
+			if resp.status_code != 404:
+				sha = resp.json()['sha']
+		return sha
+
+	def SetFileSha(
+		self,
+		owner: str,
+		repoName: str,
+		branch: str,
+		path: str,
+		sha: str,
+		hostGetter: HostGetter = DefaultApiHost(),
+	) -> None:
+		dirPath, fileName = self._SplitPath(path)
+		key = self._MakeKey(hostGetter, owner, repoName, branch, dirPath)
+
+		with self._GetKeyLock(key):
+			files = self._dirs.get(key, None)
+			if files is not None:
+				files[fileName] = sha
+
+
+_DEFAULT_FILE_SHA_CACHE = FileShaCache()
+
+
+def DefaultFileShaCache() -> FileShaCache:
+	return _DEFAULT_FILE_SHA_CACHE
+
+
 class CreateOrUpdate(ApiRunner):
 	#https://docs.github.com/en/rest/repos/contents?apiVersion=2022-11-28#create-or-update-file-contents
 
@@ -34,24 +217,44 @@ class CreateOrUpdate(ApiRunner):
 		repoName: str,
 		destPath: str,
 		commitMsg: str,
-		contentBase64: str,
+		contentBase64: Union[str, None] = None,
 		branch: str = None,
 		sha: str = None,
+		filePath: Union[os.PathLike, None] = None,
+		skipUnchanged: bool = True,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+		shaCache: FileShaCache = DefaultFileShaCache(),
 	) -> None:
 		super(CreateOrUpdate, self).__init__()
 
+		if (contentBase64 is None) == (filePath is None):
+			raise ValueError('Exactly one of contentBase64 and filePath is required')
+
 		self._url = self.URL_BASE.format(
 			api_host=hostGetter.GetHost(),
 			owner=owner,
 			repo=repoName,
 			path=destPath,
 		)
+		self._httpClient = httpClient
+
+		self._owner = owner
+		self._repoName = repoName
+		self._destPath = destPath
+		self._branch = branch
+		self._filePath = filePath
+		self._skipUnchanged = skipUnchanged
+		self._hostGetter = hostGetter
+		self._shaCache = shaCache
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
 
 		self._body = {
 			'message': commitMsg,
-			'content': contentBase64,
 		}
+		if contentBase64 is not None:
+			self._body['content'] = contentBase64
 		if branch is not None:
 			self._body['branch'] = branch
 		if sha is not None:
@@ -60,20 +263,72 @@ class CreateOrUpdate(ApiRunner):
 	def MakeRequest(self, auth: _AuthType) -> _RespType:
 		authHeaderKey, authHeaderVal = auth.GetHeader()
 
-		req = requests.put(
-			url=self._url,
-			headers={
-				'Accept': 'application/vnd.github+json',
-				authHeaderKey: authHeaderVal,
-			},
-			json=self._body,
-		)
+		headers = {
+			'Accept': 'application/vnd.github+json',
+			authHeaderKey: authHeaderVal,
+		}
+		# not retried: if a first attempt committed but its response was
+		# lost, the retry would carry a stale sha and fail with a conflict
+		if self._filePath is None:
+			req = self._httpClient.Put(
+				url=self._url,
+				headers=headers,
+				json=self._body,
+			)
+		else:
+			# the file is base64 encoded while it is being sent
+			headers['Content-Type'] = 'application/json'
+			with Base64JsonBody(self._body, 'content', self._filePath) as body:
+				req = self._httpClient.Put(
+					url=self._url,
+					headers=headers,
+					data=body,
+				)
 		CheckResp.CheckRespErr(req)
 
 		return req
 
+	def IsUnchanged(self, auth: _AuthType) -> bool:
+		'''
+		Compares the git blob SHA of the local file with the one on the
+		branch, and fills in the `sha` of the request body if it is missing.
+		'''
+		if (self._filePath is None) or (self._branch is None):
+			return False
+
+		localSha = GitBlob.HashFile(self._filePath)
+		remoteSha = self._body.get('sha', None)
+		if remoteSha is None:
+			remoteSha = self._shaCache.GetFileSha(
+				auth=auth,
+				owner=self._owner,
+				repoName=self._repoName,
+				branch=self._branch,
+				path=self._destPath,
+				hostGetter=self._hostGetter,
+				httpClient=self._httpClient,
+			)
+			if remoteSha is not None:
+				self._body['sha'] = remoteSha
+
+		return localSha == remoteSha
+
 	def CliRun(self, auth: _AuthType) -> None:
-		self.MakeRequest(auth)
+		if self._skipUnchanged and self.IsUnchanged(auth):
+			self._logger.info(f'{self._destPath} is unchanged; skipped')
+			return
+
+		resp = self.MakeRequest(auth)
+
+		if self._branch is not None:
+			self._shaCache.SetFileSha(
+				owner=self._owner,
+				repoName=self._repoName,
+				branch=self._branch,
+				path=self._destPath,
+				sha=resp.json()['content']['sha'],
+				hostGetter=self._hostGetter,
+			)
 
 	@staticmethod
 	def _AddOpArgParsers(opArgParser: _ArgParserType) -> None:
@@ -96,7 +351,12 @@ class CreateOrUpdate(ApiRunner):
 		opArgParser.add_argument(
 			'--sha', type=str, required=False,
 			help='SHA of the file to update'
-				' (only required when updating a file)',
+				' (looked up from the branch if not given)',
+		)
+		opArgParser.add_argument(
+			'--no-skip-unchanged', action='store_true',
+			help='Upload the file even if the branch already has'
+				' the same content',
 		)
 		opArgParser.add_argument(
 			'--repo', type=str, required=False,
@@ -113,19 +373,13 @@ class CreateOrUpdate(ApiRunner):
 
 		owner, repoName = args.repo.split('/', maxsplit=1)
 
-		# read in file
-		with open(args.file, 'rb') as f:
-			content = f.read()
-
-		# convert to base64
-		contentB64 = base64.b64encode(content).decode('utf-8')
-
 		return cls(
 			owner=owner,
 			repoName=repoName,
 			destPath=args.dest,
 			commitMsg=args.commit_msg,
-			contentBase64=contentB64,
 			branch=args.branch,
 			sha=args.sha,
+			filePath=args.file,
+			skipUnchanged=not args.no_skip_unchanged,
 		)
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import concurrent.futures
+import logging
+import os
+import stat
+
+from typing import List, Tuple, Union
+
+from ..DefaultHosts import DefaultApiHost, HostGetter
+from ..Http.Client import DefaultHttpClient, HttpClient
+from ..Http.JsonStream import Base64JsonBody
+from ..Utils import CheckResp, LogEnvVars
+from .ApiRunner import ApiRunner
+from ._Types import (
+	_AuthType,
+	_ArgsType,
+	_ArgParserType,
+	_RespType,
+)
+
+
+MODE_FILE = '100644'
+MODE_EXECUTABLE = '100755'
+
+
+def GetFileMode(filePath: os.PathLike) -> str:
+	if os.stat(filePath).st_mode & stat.S_IXUSR:
+		return MODE_EXECUTABLE
+	return MODE_FILE
+
+
+class GetBranch(ApiRunner):
+	# https://docs.github.com/en/rest/branches/branches#get-a-branch
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/branches/{branch}'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		branch: str,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(GetBranch, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+			branch=branch,
+		)
+		self._httpClient = httpClient
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Get(
+			url=self._url,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+	def GetHead(self, auth: _AuthType) -> Tuple[str, str]:
+		'''
+		Returns the SHA of the head commit and the SHA of its tree.
+		'''
+		commit = self.MakeRequest(auth).json()['commit']
+		return commit['sha'], commit['commit']['tree']['sha']
+
+
+class CreateBlob(ApiRunner):
+	# https://docs.github.com/en/rest/git/blobs#create-a-blob
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/git/blobs'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		filePath: os.PathLike,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(CreateBlob, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+		)
+		self._httpClient = httpClient
+
+		self._filePath = filePath
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		with Base64JsonBody(
+			{ 'encoding': 'base64' }, 'content', self._filePath
+		) as body:
+			req = self._httpClient.Post(
+				url=self._url,
+				# blobs are content-addressed; creating one twice is harmless
+				idempotent=True,
+				headers={
+					'Accept': 'application/vnd.github+json',
+					'Content-Type': 'application/json',
+					authHeaderKey: authHeaderVal,
+				},
+				data=body,
+			)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class CreateTree(ApiRunner):
+	# https://docs.github.com/en/rest/git/trees#create-a-tree
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/git/trees'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		entries: List[dict],
+		baseTree: Union[str, None] = None,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(CreateTree, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+		)
+		self._httpClient = httpClient
+
+		self._body = {
+			'tree': entries,
+		}
+		if baseTree is not None:
+			self._body['base_tree'] = baseTree
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Post(
+			url=self._url,
+			idempotent=True,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+			json=self._body,
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class CreateCommit(ApiRunner):
+	# https://docs.github.com/en/rest/git/commits#create-a-commit
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/git/commits'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		commitMsg: str,
+		tree: str,
+		parents: List[str],
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(CreateCommit, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+		)
+		self._httpClient = httpClient
+
+		self._body = {
+			'message': commitMsg,
+			'tree': tree,
+			'parents': parents,
+		}
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Post(
+			url=self._url,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+			json=self._body,
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class UpdateRef(ApiRunner):
+	# https://docs.github.com/en/rest/git/refs#update-a-reference
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/git/refs/heads/{branch}'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		branch: str,
+		sha: str,
+		force: bool = False,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(UpdateRef, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+			branch=branch,
+		)
+		self._httpClient = httpClient
+
+		self._body = {
+			'sha': sha,
+			'force': force,
+		}
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Patch(
+			url=self._url,
+			# pointing the ref at the same commit again is a no-op
+			idempotent=True,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+			json=self._body,
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+def CollectFiles(
+	srcPaths: List[os.PathLike],
+	baseDir: os.PathLike,
+	destDir: str = '',
+) -> List[Tuple[str, str]]:
+	'''
+	Expands files and directories in `srcPaths` into a sorted list of
+	(local path, path in the repo) pairs; the repo path of a file is its
+	path relative to `baseDir`, under `destDir`.
+	'''
+	localPaths = []
+	for srcPath in srcPaths:
+		if os.path.isdir(srcPath):
+			for dirPath, dirNames, fileNames in os.walk(srcPath):
+				dirNames.sort()
+				localPaths += [ os.path.join(dirPath, n) for n in sorted(fileNames) ]
+		else:
+			localPaths.append(srcPath)
+
+	files = {}
+	for localPath in localPaths:
+		relPath = os.path.relpath(localPath, baseDir)
+		if relPath.startswith(os.pardir):
+			raise ValueError(f'{localPath} is not under {baseDir}')
+		repoPath = '/'.join(
+			[ p for p in destDir.split('/') if p ] + relPath.split(os.sep)
+		)
+		files[repoPath] = localPath
+
+	return [ (files[repoPath], repoPath) for repoPath in sorted(files) ]
+
+
+class CommitFiles(ApiRunner):
+	'''
+	Commits many files to a branch at once: the blobs are created
+	concurrently, followed by one tree, one commit and one ref update.
+	'''
+
+	DEFAULT_JOBS = 8
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		branch: str,
+		commitMsg: str,
+		files: List[Tuple[str, str]],
+		jobs: int = DEFAULT_JOBS,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(CommitFiles, self).__init__()
+
+		self._owner = owner
+		self._repoName = repoName
+		self._branch = branch
+		self._commitMsg = commitMsg
+		self._files = files
+		self._jobs = jobs
+		self._hostGetter = hostGetter
+		self._httpClient = httpClient
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	def _CreateBlob(self, auth: _AuthType, localPath: str) -> str:
+		return CreateBlob(
+			owner=self._owner,
+			repoName=self._repoName,
+			filePath=localPath,
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		).MakeRequest(auth).json()['sha']
+
+	def MakeCommit(self, auth: _AuthType) -> Union[str, None]:
+		'''
+		Returns the SHA of the new commit, or None if the files are already
+		identical to the ones on the branch.
+		'''
+		with concurrent.futures.ThreadPoolExecutor(
+			max_workers=self._jobs
+		) as executor:
+			# the branch head is fetched alongside the blobs
+			headFuture = executor.submit(
+				GetBranch(
+					owner=self._owner,
+					repoName=self._repoName,
+					branch=self._branch,
+					hostGetter=self._hostGetter,
+					httpClient=self._httpClient,
+				).GetHead,
+				auth,
+			)
+			blobFutures = [
+				executor.submit(self._CreateBlob, auth, localPath)
+				for localPath, _ in self._files
+			]
+			headSha, headTreeSha = headFuture.result()
+			blobShas = [ future.result() for future in blobFutures ]
+		self._logger.debug(f'Created {len(blobShas)} blobs')
+
+		entries = [
+			{
+				'path': repoPath,
+				'mode': GetFileMode(localPath),
+				'type': 'blob',
+				'sha': blobSha,
+			}
+			for (localPath, repoPath), blobSha in zip(self._files, blobShas)
+		]
+		treeSha = CreateTree(
+			owner=self._owner,
+			repoName=self._repoName,
+			entries=entries,
+			baseTree=headTreeSha,
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		).MakeRequest(auth).json()['sha']
+		if treeSha == headTreeSha:
+			self._logger.info('No changes to commit')
+			return None
+
+		commitSha = CreateCommit(
+			owner=self._owner,
+			repoName=self._repoName,
+			commitMsg=self._commitMsg,
+			tree=treeSha,
+			parents=[ headSha ],
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		).MakeRequest(auth).json()['sha']
+
+		# not forced, so this fails if the branch moved in the meantime
+		UpdateRef(
+			owner=self._owner,
+			repoName=self._repoName,
+			branch=self._branch,
+			sha=commitSha,
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		).MakeRequest(auth)
+		self._logger.info(
+			f'Committed {len(self._files)} files to {self._branch} as {commitSha}'
+		)
+
+		return commitSha
+
+	def CliRun(self, auth: _AuthType) -> None:
+		commitSha = self.MakeCommit(auth)
+		if commitSha is not None:
+			print(commitSha)
+
+	@staticmethod
+	def _AddOpArgParsers(opArgParser: _ArgParserType) -> None:
+		opArgParser.add_argument(
+			'--src', type=os.path.abspath, nargs='+', required=True,
+			help='Files or directories to commit',
+		)
+		opArgParser.add_argument(
+			'--base-dir', type=os.path.abspath, default=os.getcwd(),
+			help='Paths in the repo are relative to this directory'
+				' (default: current directory)',
+		)
+		opArgParser.add_argument(
+			'--dest', type=str, default='',
+			help='Directory in the repo to place the files under'
+				' (default: repo root)',
+		)
+		opArgParser.add_argument(
+			'--commit-msg', type=str, required=True,
+			help='Commit message',
+		)
+		opArgParser.add_argument(
+			'--branch', type=str, required=True,
+			help='Branch name',
+		)
+		opArgParser.add_argument(
+			'--jobs', '-j', type=int, default=CommitFiles.DEFAULT_JOBS,
+			help='Number of blobs created concurrently'
+				f' (default: {CommitFiles.DEFAULT_JOBS})',
+		)
+		opArgParser.add_argument(
+			'--repo', type=str, required=False,
+			default=os.environ.get('GITHUB_REPOSITORY', None),
+			help='Repo specified in the format of "owner/repo"'
+				' (default: GITHUB_REPOSITORY env var)',
+		)
+		LogEnvVars.LogEnvVars()
+
+	@classmethod
+	def FromArgs(cls, args: _ArgsType) -> ApiRunner:
+		if args.repo is None:
+			raise ValueError('Repo not specified')
+
+		owner, repoName = args.repo.split('/', maxsplit=1)
+
+		files = CollectFiles(args.src, args.base_dir, args.dest)
+		if len(files) == 0:
+			raise ValueError('No files to commit')
+
+		return cls(
+			owner=owner,
+			repoName=repoName,
+			branch=args.branch,
+			commitMsg=args.commit_msg,
+			files=files,
+			jobs=args.jobs,
+		)
@@ -8,9 +8,10 @@
 ###
 
 
-import requests
+from typing import Union
 
 from ..DefaultHosts import DefaultApiHost, HostGetter
+from ..Http.Client import DefaultHttpClient, HttpClient
 from ..Utils import CheckResp
 from .ApiRunner import ApiRunner
 from ._Types import (
@@ -30,6 +31,7 @@ class GetByTag(ApiRunner):
 		repoName: str,
 		tag: str,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
 		super(GetByTag, self).__init__()
 
@@ -39,16 +41,29 @@ class GetByTag(ApiRunner):
 			repo=repoName,
 			tag=tag,
 		)
+		self._httpClient = httpClient
 
-	def MakeRequest(self, auth: _AuthType) -> _RespType:
+	def MakeRequest(
+		self,
+		auth: _AuthType,
+		etag: Union[str, None] = None,
+	) -> _RespType:
+		'''
+		With `etag`, the request is conditional, and a 304 response is
+		returned if the release has not changed.
+		'''
 		authHeaderKey, authHeaderVal = auth.GetHeader()
 
-		req = requests.get(
+		headers = {
+			'Accept': 'application/vnd.github+json',
+			authHeaderKey: authHeaderVal,
+		}
+		if etag is not None:
+			headers['If-None-Match'] = etag
+
+		req = self._httpClient.Get(
 			url=self._url,
-			headers={
-				'Accept': 'application/vnd.github+json',
-				authHeaderKey: authHeaderVal,
-			},
+			headers=headers,
 		)
 		CheckResp.CheckRespErr(req)
 
@@ -8,15 +8,23 @@
 ###
 
 
-import hashlib
+import concurrent.futures
+import fnmatch
 import logging
+import mimetypes
 import os
-import requests
+import uuid
 
-from ..DefaultHosts import DefaultApiHost, HostGetter
-from ..Utils import CheckResp, LogEnvVars
+from typing import Iterable, List, Union
+
+from ..DefaultHosts import DefaultApiHost, DefaultUploadsHost, HostGetter
+from ..Http import Download as _Download
+from ..Http import ResumableDownload as _ResumableDownload
+from ..Http.Client import DefaultHttpClient, HttpClient
+from ..Utils import AssetCache, CheckResp, LogEnvVars
 from .ApiRunner import ApiRunner
 from .ApiRelease import GetByTag as _GetByTag
+from .ListApiRunner import ListApiRunner
 from ._Types import (
 	_AuthType,
 	_ArgsType,
@@ -25,6 +33,14 @@ from ._Types import (
 )
 
 
+def GetAssetSha256(asset: dict) -> Union[str, None]:
+	# newer API versions report the digest as "sha256:<hex>"
+	digest = asset.get('digest', None)
+	if (digest is not None) and digest.startswith('sha256:'):
+		return digest[len('sha256:'):]
+	return None
+
+
 class Get(ApiRunner):
 	# https://docs.github.com/en/rest/releases/assets#get-a-release-asset
 
@@ -37,6 +53,7 @@ class Get(ApiRunner):
 		assetId: int,
 		isDownload: bool,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
 		super(Get, self).__init__()
 
@@ -46,10 +63,11 @@ class Get(ApiRunner):
 			repo=repoName,
 			asset_id=assetId,
 		)
+		self._httpClient = httpClient
 
 		self._isDownload = isDownload
 
-	def MakeRequest(self, auth: _AuthType) -> _RespType:
+	def MakeRequest(self, auth: _AuthType, stream: bool = False) -> _RespType:
 		authHeaderKey, authHeaderVal = auth.GetHeader()
 
 		headers = {
@@ -60,18 +78,48 @@ class Get(ApiRunner):
 		else:
 			headers['Accept'] = 'application/vnd.github+json'
 
-		req = requests.get(
+		req = self._httpClient.Get(
 			url=self._url,
 			headers=headers,
 			allow_redirects=True,
+			stream=stream,
 		)
 		CheckResp.CheckRespErr(req)
 
 		return req
 
 
+class ListByRelease(ListApiRunner):
+	# https://docs.github.com/en/rest/releases/assets#list-release-assets
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/releases/{release_id}/assets'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		releaseId: int,
+		prefetch: int = 0,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(ListByRelease, self).__init__(
+			prefetch=prefetch,
+			httpClient=httpClient,
+		)
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+			release_id=releaseId,
+		)
+
+
 class Download(ApiRunner):
 
+	OUTPUT_PATH_ARGS = ('save_path', )
+
 	def __init__(
 		self,
 		owner: str,
@@ -79,7 +127,11 @@ class Download(ApiRunner):
 		tag: str,
 		assetName: str,
 		savePath: os.PathLike,
+		numSegments: int = 1,
+		resume: bool = False,
+		assetCache: Union[AssetCache.AssetCache, None] = None,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
 		super(Download, self).__init__()
 
@@ -88,53 +140,123 @@ class Download(ApiRunner):
 		self._tag = tag
 		self._assetName = assetName
 		self._savePath = savePath
+		self._numSegments = numSegments
+		self._resume = resume
+		self._assetCache = assetCache
 		self._hostGetter = hostGetter
+		self._httpClient = httpClient
 
 		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
 
-	def CliRun(self, auth: _AuthType) -> None:
+	def _FindAsset(self, assets: Iterable[dict]) -> Union[dict, None]:
+		for asset in assets:
+			if asset['name'] == self._assetName:
+				return asset
+		return None
+
+	def FindAsset(self, auth: _AuthType) -> dict:
 		# 1. get release info
 		releaseGetter = _GetByTag(
 			owner=self._owner,
 			repoName=self._repoName,
 			tag=self._tag,
 			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
 		)
 		release = releaseGetter.MakeRequest(auth).json()
 
-		# 2. find asset id
+		# 2. find asset
 		if 'assets' not in release:
 			raise RuntimeError('No assets found in release')
-		assetId = None
-		for asset in release['assets']:
-			if asset['name'] == self._assetName:
-				assetId = asset['id']
-				break
-		if assetId is None:
+		asset = self._FindAsset(release['assets'])
+		if asset is None:
+			# the release object may not embed every asset;
+			# walk through the full, paginated list
+			assetLister = ListByRelease(
+				owner=self._owner,
+				repoName=self._repoName,
+				releaseId=release['id'],
+				hostGetter=self._hostGetter,
+				httpClient=self._httpClient,
+			)
+			asset = self._FindAsset(assetLister.IterItems(auth))
+		if asset is None:
 			raise RuntimeError('Asset not found in release')
 		self._logger.info(
-			f'Asset named "{self._assetName}" found with id {assetId}'
+			f'Asset named "{self._assetName}" found with id {asset["id"]}'
 		)
 
+		return asset
+
+	def _GetCachedHash(self, cacheKey: str, asset: dict) -> Union[str, None]:
+		validator = AssetCache.GetAssetValidator(asset)
+		cachedHash = self._assetCache.Lookup(cacheKey, validator)
+		if cachedHash is None:
+			# the same content may be cached under another release or name
+			expectedHash = GetAssetSha256(asset)
+			if (expectedHash is not None) and self._assetCache.HasBlob(expectedHash):
+				cachedHash = expectedHash.lower()
+		return cachedHash
+
+	def DownloadAsset(self, auth: _AuthType, asset: dict) -> str:
+		cacheKey = AssetCache.AssetCache.MakeKey(
+			host=self._hostGetter.GetHost(),
+			owner=self._owner,
+			repoName=self._repoName,
+			tag=self._tag,
+			asset=self._assetName,
+		)
+		if self._assetCache is not None:
+			cachedHash = self._GetCachedHash(cacheKey, asset)
+			if cachedHash is not None:
+				self._assetCache.Materialize(cachedHash, self._savePath)
+				self._assetCache.Add(
+					cacheKey,
+					AssetCache.GetAssetValidator(asset),
+					self._savePath,
+					cachedHash,
+				)
+				self._logger.debug('Asset cache hit: {}'.format(cacheKey))
+				return cachedHash
+
 		# 3. download asset
 		downloader = Get(
 			owner=self._owner,
 			repoName=self._repoName,
-			assetId=assetId,
+			assetId=asset['id'],
 			isDownload=True,
 			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
 		)
-		fileContent = downloader.MakeRequest(auth).content
+		resp = downloader.MakeRequest(auth, stream=True)
 
-		self._logger.debug('Received {} bytes'.format(len(fileContent)))
-
-		fileHash = hashlib.sha256(fileContent).hexdigest()
+		saveToFile = _ResumableDownload.ResumableToFile \
+			if self._resume else _Download.DownloadToFile
+		fileHash, fileSize = saveToFile(
+			httpClient=self._httpClient,
+			resp=resp,
+			savePath=self._savePath,
+			numSegments=self._numSegments,
+			expectedSha256=GetAssetSha256(asset),
+		)
+		self._logger.debug('Received {} bytes'.format(fileSize))
 		self._logger.debug('SHA256: {}'.format(fileHash))
-
-		with open(self._savePath, 'wb') as f:
-			f.write(fileContent)
 		self._logger.debug('Saved to {}'.format(self._savePath))
 
+		if self._assetCache is not None:
+			self._assetCache.Add(
+				cacheKey,
+				AssetCache.GetAssetValidator(asset),
+				self._savePath,
+				fileHash,
+			)
+
+		return fileHash
+
+	def CliRun(self, auth: _AuthType) -> None:
+		asset = self.FindAsset(auth)
+		fileHash = self.DownloadAsset(auth, asset)
+
 		print(fileHash)
 
 	@staticmethod
@@ -151,6 +273,8 @@ class Download(ApiRunner):
 			'--save-path', '-o', type=os.path.abspath, required=True,
 			help='Path to save the downloaded asset',
 		)
+		_Download.AddDownloadArgs(opArgParser)
+		AssetCache.AddArgs(opArgParser)
 		opArgParser.add_argument(
 			'--repo', type=str, required=False,
 			default=os.environ.get('GITHUB_REPOSITORY', None),
@@ -172,4 +296,566 @@ class Download(ApiRunner):
 			tag=args.version,
 			assetName=args.asset,
 			savePath=args.save_path,
+			numSegments=args.segments,
+			resume=args.resume,
+			assetCache=AssetCache.FromArgs(args),
+		)
+
+
+class DownloadMany(ApiRunner):
+
+	OUTPUT_PATH_ARGS = ('out_dir', 'manifest')
+	DEFAULT_JOBS = 4
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		tag: str,
+		assetNames: List[str],
+		assetPatterns: List[str],
+		outDir: os.PathLike,
+		jobs: int = DEFAULT_JOBS,
+		manifestPath: Union[os.PathLike, None] = None,
+		numSegments: int = 1,
+		resume: bool = False,
+		assetCache: Union[AssetCache.AssetCache, None] = None,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(DownloadMany, self).__init__()
+
+		self._owner = owner
+		self._repoName = repoName
+		self._tag = tag
+		self._assetNames = assetNames
+		self._assetPatterns = assetPatterns
+		self._outDir = outDir
+		self._jobs = jobs
+		self._manifestPath = manifestPath
+		self._numSegments = numSegments
+		self._resume = resume
+		self._assetCache = assetCache
+		self._hostGetter = hostGetter
+		self._httpClient = httpClient
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	def SelectAssets(self, auth: _AuthType) -> List[dict]:
+		releaseGetter = _GetByTag(
+			owner=self._owner,
+			repoName=self._repoName,
+			tag=self._tag,
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		)
+		release = releaseGetter.MakeRequest(auth).json()
+		assets = release.get('assets', [])
+
+		missingNames = [
+			name for name in self._assetNames
+			if all(asset['name'] != name for asset in assets)
+		]
+		if (len(self._assetPatterns) > 0) or (len(missingNames) > 0):
+			# the release object may not embed every asset
+			assetLister = ListByRelease(
+				owner=self._owner,
+				repoName=self._repoName,
+				releaseId=release['id'],
+				hostGetter=self._hostGetter,
+				httpClient=self._httpClient,
+			)
+			assets = assetLister.ListAll(auth)
+
+		assetsByName = { asset['name']: asset for asset in assets }
+		for name in self._assetNames:
+			if name not in assetsByName:
+				raise RuntimeError(f'Asset "{name}" not found in release')
+
+		# explicit names first, then pattern matches; each asset only once
+		selectedNames = list(dict.fromkeys(self._assetNames))
+		for asset in assets:
+			if any(fnmatch.fnmatchcase(asset['name'], pattern)
+				for pattern in self._assetPatterns):
+				selectedNames.append(asset['name'])
+
+		return [ assetsByName[name] for name in dict.fromkeys(selectedNames) ]
+
+	def _DownloadOne(self, auth: _AuthType, asset: dict) -> str:
+		downloader = Download(
+			owner=self._owner,
+			repoName=self._repoName,
+			tag=self._tag,
+			assetName=asset['name'],
+			savePath=os.path.join(self._outDir, asset['name']),
+			numSegments=self._numSegments,
+			resume=self._resume,
+			assetCache=self._assetCache,
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		)
+		return downloader.DownloadAsset(auth, asset)
+
+	def CliRun(self, auth: _AuthType) -> None:
+		assets = self.SelectAssets(auth)
+		if len(assets) == 0:
+			raise RuntimeError('No assets selected')
+		self._logger.info(f'Downloading {len(assets)} assets')
+
+		os.makedirs(self._outDir, exist_ok=True)
+
+		with concurrent.futures.ThreadPoolExecutor(
+			max_workers=self._jobs
+		) as executor:
+			futures = [
+				executor.submit(self._DownloadOne, auth, asset)
+				for asset in assets
+			]
+			concurrent.futures.wait(futures)
+
+		# same format as `sha256sum`, in the order the assets were selected
+		lines = []
+		failed = []
+		for asset, future in zip(assets, futures):
+			exc = future.exception()
+			if exc is not None:
+				self._logger.error(f'Failed to download "{asset["name"]}": {exc}')
+				failed.append(asset['name'])
+			else:
+				lines.append(f'{future.result()}  {asset["name"]}\n')
+
+		for line in lines:
+			print(line, end='')
+		if self._manifestPath is not None:
+			with open(self._manifestPath, 'w') as f:
+				f.writelines(lines)
+
+		if len(failed) > 0:
+			raise RuntimeError(f'Failed to download assets: {failed}')
+
+	@staticmethod
+	def _AddOpArgParsers(opArgParser: _ArgParserType) -> None:
+		opArgParser.add_argument(
+			'--version', '-v', type=str, required=True,
+			help='Version of the release',
+		)
+		opArgParser.add_argument(
+			'--asset', type=str, nargs='*', default=[],
+			help='Names of the assets to download',
+		)
+		opArgParser.add_argument(
+			'--pattern', type=str, nargs='*', default=[],
+			help='Glob patterns selecting the assets to download',
+		)
+		opArgParser.add_argument(
+			'--out-dir', '-o', type=os.path.abspath, required=True,
+			help='Directory to save the downloaded assets',
+		)
+		opArgParser.add_argument(
+			'--jobs', '-j', type=int, default=DownloadMany.DEFAULT_JOBS,
+			help='Number of assets downloaded concurrently'
+				f' (default: {DownloadMany.DEFAULT_JOBS})',
+		)
+		opArgParser.add_argument(
+			'--manifest', type=os.path.abspath, required=False,
+			help='Also write the SHA-256 manifest to this file',
+		)
+		_Download.AddDownloadArgs(opArgParser)
+		AssetCache.AddArgs(opArgParser)
+		opArgParser.add_argument(
+			'--repo', type=str, required=False,
+			default=os.environ.get('GITHUB_REPOSITORY', None),
+			help='Repo specified in the format of "owner/repo"'
+				' (default: GITHUB_REPOSITORY env var)',
+		)
+		LogEnvVars.LogEnvVars()
+
+	@classmethod
+	def FromArgs(cls, args: _ArgsType) -> ApiRunner:
+		if args.repo is None:
+			raise ValueError('Repo not specified')
+		if (len(args.asset) == 0) and (len(args.pattern) == 0):
+			raise ValueError('At least one --asset or --pattern is required')
+
+		owner, repoName = args.repo.split('/', maxsplit=1)
+
+		return cls(
+			owner=owner,
+			repoName=repoName,
+			tag=args.version,
+			assetNames=args.asset,
+			assetPatterns=args.pattern,
+			outDir=args.out_dir,
+			jobs=args.jobs,
+			manifestPath=args.manifest,
+			numSegments=args.segments,
+			resume=args.resume,
+			assetCache=AssetCache.FromArgs(args),
+		)
+
+
+class Delete(ApiRunner):
+	# https://docs.github.com/en/rest/releases/assets#delete-a-release-asset
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/releases/assets/{asset_id}'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		assetId: int,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(Delete, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+			asset_id=assetId,
+		)
+		self._httpClient = httpClient
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Delete(
+			url=self._url,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class Update(ApiRunner):
+	# https://docs.github.com/en/rest/releases/assets#update-a-release-asset
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/releases/assets/{asset_id}'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		assetId: int,
+		assetName: Union[str, None] = None,
+		label: Union[str, None] = None,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(Update, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+			asset_id=assetId,
+		)
+		self._httpClient = httpClient
+
+		self._body = {}
+		if assetName is not None:
+			self._body['name'] = assetName
+		if label is not None:
+			self._body['label'] = label
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Patch(
+			url=self._url,
+			idempotent=True,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+			json=self._body,
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class Upload(ApiRunner):
+	# https://docs.github.com/en/rest/releases/assets#upload-a-release-asset
+
+	URL_BASE = 'https://{uploads_host}/repos/{owner}/{repo}/releases/{release_id}/assets'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		releaseId: int,
+		filePath: os.PathLike,
+		assetName: Union[str, None] = None,
+		label: Union[str, None] = None,
+		contentType: Union[str, None] = None,
+		uploadsHostGetter: HostGetter = DefaultUploadsHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(Upload, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			uploads_host=uploadsHostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+			release_id=releaseId,
+		)
+		self._httpClient = httpClient
+
+		self._filePath = filePath
+		self._assetName = assetName or os.path.basename(filePath)
+		self._label = label
+		if contentType is None:
+			contentType, encoding = mimetypes.guess_type(self._assetName)
+			if encoding is not None:
+				# e.g., "x.tar.gz" is guessed as a tar file, encoded with gzip
+				contentType = None
+		self._contentType = contentType or 'application/octet-stream'
+
+	def GetAssetName(self) -> str:
+		return self._assetName
+
+	def MakeRequest(
+		self,
+		auth: _AuthType,
+		assetName: Union[str, None] = None,
+	) -> _RespType:
+		'''
+		`assetName` overrides the name of the asset, e.g., to upload it under
+		a temporary name first.
+		'''
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		params = { 'name': assetName or self._assetName }
+		if self._label is not None:
+			params['label'] = self._label
+
+		# passing the file object lets requests send it in blocks, with the
+		# Content-Length taken from the file size
+		with open(self._filePath, 'rb') as f:
+			req = self._httpClient.Post(
+				url=self._url,
+				headers={
+					'Accept': 'application/vnd.github+json',
+					'Content-Type': self._contentType,
+					'Content-Length': str(os.fstat(f.fileno()).st_size),
+					authHeaderKey: authHeaderVal,
+				},
+				params=params,
+				data=f,
+			)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+
+class UploadMany(ApiRunner):
+
+	DEFAULT_JOBS = 4
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		tag: str,
+		filePaths: List[os.PathLike],
+		jobs: int = DEFAULT_JOBS,
+		replace: bool = False,
+		hostGetter: HostGetter = DefaultApiHost(),
+		uploadsHostGetter: HostGetter = DefaultUploadsHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(UploadMany, self).__init__()
+
+		self._owner = owner
+		self._repoName = repoName
+		self._tag = tag
+		self._filePaths = filePaths
+		self._jobs = jobs
+		self._replace = replace
+		self._hostGetter = hostGetter
+		self._uploadsHostGetter = uploadsHostGetter
+		self._httpClient = httpClient
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	def _UploadOne(
+		self,
+		auth: _AuthType,
+		uploader: Upload,
+		existing: Union[dict, None],
+	) -> dict:
+		if existing is None:
+			return uploader.MakeRequest(auth).json()
+
+		# an asset name must be unique within a release, so the new file is
+		# uploaded under a temporary name, and the old asset is only deleted
+		# once the upload has succeeded
+		tmpName = f'{uploader.GetAssetName()}.{uuid.uuid4().hex[:8]}.tmp'
+		newAsset = uploader.MakeRequest(auth, assetName=tmpName).json()
+
+		self._logger.info(
+			f'Replacing asset "{existing["name"]}" with id {existing["id"]}'
+		)
+		try:
+			Delete(
+				owner=self._owner,
+				repoName=self._repoName,
+				assetId=existing['id'],
+				hostGetter=self._hostGetter,
+				httpClient=self._httpClient,
+			).MakeRequest(auth)
+		except Exception:
+			# keep the release as it was
+			try:
+				Delete(
+					owner=self._owner,
+					repoName=self._repoName,
+					assetId=newAsset['id'],
+					hostGetter=self._hostGetter,
+					httpClient=self._httpClient,
+				).MakeRequest(auth)
+			except Exception:
+				self._logger.error(
+					f'Failed to delete the temporary asset "{tmpName}"'
+					f' with id {newAsset["id"]}'
+				)
+			raise
+
+		try:
+			return Update(
+				owner=self._owner,
+				repoName=self._repoName,
+				assetId=newAsset['id'],
+				assetName=uploader.GetAssetName(),
+				hostGetter=self._hostGetter,
+				httpClient=self._httpClient,
+			).MakeRequest(auth).json()
+		except Exception:
+			self._logger.error(
+				f'The new "{uploader.GetAssetName()}" is left as "{tmpName}"'
+				f' with id {newAsset["id"]}; rename it to finish the upload'
+			)
+			raise
+
+	def UploadAll(self, auth: _AuthType) -> List[concurrent.futures.Future]:
+		releaseGetter = _GetByTag(
+			owner=self._owner,
+			repoName=self._repoName,
+			tag=self._tag,
+			hostGetter=self._hostGetter,
+			httpClient=self._httpClient,
+		)
+		release = releaseGetter.MakeRequest(auth).json()
+
+		uploaders = [
+			Upload(
+				owner=self._owner,
+				repoName=self._repoName,
+				releaseId=release['id'],
+				filePath=filePath,
+				uploadsHostGetter=self._uploadsHostGetter,
+				httpClient=self._httpClient,
+			)
+			for filePath in self._filePaths
+		]
+
+		existingByName = {}
+		if self._replace:
+			assetLister = ListByRelease(
+				owner=self._owner,
+				repoName=self._repoName,
+				releaseId=release['id'],
+				hostGetter=self._hostGetter,
+				httpClient=self._httpClient,
+			)
+			existingByName = {
+				asset['name']: asset for asset in assetLister.IterItems(auth)
+			}
+
+		with concurrent.futures.ThreadPoolExecutor(
+			max_workers=self._jobs
+		) as executor:
+			futures = [
+				executor.submit(
+					self._UploadOne,
+					auth,
+					uploader,
+					existingByName.get(uploader.GetAssetName(), None),
+				)
+				for uploader in uploaders
+			]
+			concurrent.futures.wait(futures)
+
+		return futures
+
+	def CliRun(self, auth: _AuthType) -> None:
+		futures = self.UploadAll(auth)
+
+		failed = []
+		for filePath, future in zip(self._filePaths, futures):
+			exc = future.exception()
+			if exc is not None:
+				self._logger.error(f'Failed to upload {filePath}: {exc}')
+				failed.append(filePath)
+			else:
+				asset = future.result()
+				self._logger.info(
+					f'Uploaded {filePath} as "{asset["name"]}" with id {asset["id"]}'
+				)
+				print(asset['browser_download_url'])
+
+		if len(failed) > 0:
+			raise RuntimeError(f'Failed to upload files: {failed}')
+
+	@staticmethod
+	def _AddOpArgParsers(opArgParser: _ArgParserType) -> None:
+		opArgParser.add_argument(
+			'--version', '-v', type=str, required=True,
+			help='Version of the release',
+		)
+		opArgParser.add_argument(
+			'--files', '-f', type=os.path.abspath, nargs='+', required=True,
+			help='Files to upload; each is named after its base name',
+		)
+		opArgParser.add_argument(
+			'--jobs', '-j', type=int, default=UploadMany.DEFAULT_JOBS,
+			help='Number of files uploaded concurrently'
+				f' (default: {UploadMany.DEFAULT_JOBS})',
+		)
+		opArgParser.add_argument(
+			'--replace', action='store_true',
+			help='Delete an existing asset with the same name before uploading',
+		)
+		opArgParser.add_argument(
+			'--repo', type=str, required=False,
+			default=os.environ.get('GITHUB_REPOSITORY', None),
+			help='Repo specified in the format of "owner/repo"'
+				' (default: GITHUB_REPOSITORY env var)',
+		)
+		LogEnvVars.LogEnvVars()
+
+	@classmethod
+	def FromArgs(cls, args: _ArgsType) -> ApiRunner:
+		if args.repo is None:
+			raise ValueError('Repo not specified')
+
+		names = [ os.path.basename(filePath) for filePath in args.files ]
+		if len(set(names)) != len(names):
+			raise ValueError('Files to upload must have distinct names')
+
+		owner, repoName = args.repo.split('/', maxsplit=1)
+
+		return cls(
+			owner=owner,
+			repoName=repoName,
+			tag=args.version,
+			filePaths=args.files,
+			jobs=args.jobs,
+			replace=args.replace,
 		)
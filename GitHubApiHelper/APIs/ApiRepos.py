@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+from ..DefaultHosts import DefaultApiHost, HostGetter
+from ..Http.Client import DefaultHttpClient, HttpClient
+from ..Utils import CheckResp
+from .ApiRunner import ApiRunner
+from ._Types import (
+	_AuthType,
+	_RespType,
+)
+
+
+class Get(ApiRunner):
+	# https://docs.github.com/en/rest/repos/repos#get-a-repository
+
+	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}'
+
+	def __init__(
+		self,
+		owner: str,
+		repoName: str,
+		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(Get, self).__init__()
+
+		self._url = self.URL_BASE.format(
+			api_host=hostGetter.GetHost(),
+			owner=owner,
+			repo=repoName,
+		)
+		self._httpClient = httpClient
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		authHeaderKey, authHeaderVal = auth.GetHeader()
+
+		req = self._httpClient.Get(
+			url=self._url,
+			headers={
+				'Accept': 'application/vnd.github+json',
+				authHeaderKey: authHeaderVal,
+			},
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
@@ -8,6 +8,8 @@
 ###
 
 
+from typing import Tuple
+
 from ._Types import (
 	_AuthType,
 	_ArgsType,
@@ -17,6 +19,10 @@ from ._Types import (
 
 
 class ApiRunner(object):
+
+	# dests of the arguments naming files or directories the operation writes
+	OUTPUT_PATH_ARGS: Tuple[str, ...] = ()
+
 	def __init__(self) -> None:
 		super(ApiRunner, self).__init__()
 
@@ -9,26 +9,28 @@
 
 
 import json
+import logging
 import os
+import re
 import sys
-import requests
+import time
 
-from packaging import version
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Union
 
 from ..DefaultHosts import DefaultApiHost, HostGetter
-from ..Utils import CheckResp
+from ..Http.Client import DefaultHttpClient, HttpClient
+from ..Utils import CheckResp, TagIndex, VersionKey
 from .ApiRunner import ApiRunner
+from .ListApiRunner import ListApiRunner
 from ._Types import (
 	_ArgParserType,
 	_ArgsType,
 	_AuthType,
-	_RespType,
 )
 
 
-class GetTagList(ApiRunner):
-	# https://docs.github.com/en/rest/releases/releases#get-a-release-by-tag-name
+class GetTagList(ListApiRunner):
+	# https://docs.github.com/en/rest/repos/repos#list-repository-tags
 
 	URL_BASE = 'https://{api_host}/repos/{owner}/{repo}/tags'
 
@@ -36,35 +38,86 @@ class GetTagList(ApiRunner):
 		self,
 		owner: str,
 		repoName: str,
+		prefetch: int = 0,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
-		super(GetTagList, self).__init__()
+		super(GetTagList, self).__init__(
+			prefetch=prefetch,
+			httpClient=httpClient,
+		)
 
 		self._url = self.URL_BASE.format(
 			api_host=hostGetter.GetHost(),
 			owner=owner,
 			repo=repoName,
 		)
+		self._indexKey = TagIndex.TagIndex.MakeKey(
+			hostGetter.GetHost(), owner, repoName
+		)
 
-	def MakeRequest(self, auth: _AuthType) -> _RespType:
-		headers = {
-			'Accept': 'application/vnd.github+json',
-		}
-
-		if not auth.IsPublic():
-			authHeaderKey, authHeaderVal = auth.GetHeader()
-			headers[authHeaderKey] = authHeaderVal
-
-		req = requests.get(
+	def RefreshIndex(
+		self,
+		auth: _AuthType,
+		tagIndex: TagIndex.TagIndex,
+		fullRefresh: bool = False,
+		maxAge: float = TagIndex.DEFAULT_MAX_AGE,
+	) -> Dict[str, int]:
+		'''
+		Brings the repo's entries in `tagIndex` up to date.
+		The first page is requested conditionally, so an unchanged first page
+		costs one 304 response. Otherwise every page is fetched and tags not
+		listed anymore are dropped, since GitHub orders tags by name, not by
+		age, so new tags can be on any page.
+		A change that leaves the first page as it was (e.g., a tag added or
+		deleted on a later page) is only seen by a full refresh, which is
+		done whenever the last one is older than `maxAge` seconds.
+		'''
+		repoInfo = tagIndex.GetRepoInfo(self._indexKey)
+		fullRefresh = fullRefresh or (repoInfo is None) or \
+			(time.time() - repoInfo['full_refreshed_at'] > maxAge)
+		knownEtag = None if fullRefresh else repoInfo['etag']
+
+		headers = self._GenHeaders(auth)
+		params = dict(self._params)
+		params['per_page'] = self._perPage
+		firstHeaders = dict(headers)
+		if knownEtag is not None:
+			firstHeaders['If-None-Match'] = knownEtag
+
+		resp = self._httpClient.Get(
 			url=self._url,
-			headers=headers,
+			headers=firstHeaders,
+			params=params,
 		)
-		CheckResp.CheckRespErr(req)
-
-		return req
+		stats = { 'pages': 1, 'changed': 0, 'removed': 0 }
+		if (knownEtag is not None) and (resp.status_code == 304):
+			tagIndex.SetRefreshed(self._indexKey, knownEtag)
+			return stats
+		CheckResp.CheckRespErr(resp)
+		etag = resp.headers.get('ETag', None)
+
+		seenNames = []
+		while True:
+			tags = [ (tag['name'], tag['commit']['sha']) for tag in resp.json() ]
+			seenNames += [ name for name, _ in tags ]
+			stats['changed'] += tagIndex.Update(self._indexKey, tags)
+			if 'next' not in resp.links:
+				break
+			resp = self._httpClient.Get(
+				url=resp.links['next']['url'],
+				headers=headers,
+			)
+			CheckResp.CheckRespErr(resp)
+			stats['pages'] += 1
+
+		# every page was fetched, so whatever was not seen is gone
+		stats['removed'] = tagIndex.Prune(self._indexKey, seenNames)
+		tagIndex.SetRefreshed(self._indexKey, etag, isFull=True)
+		return stats
 
 	def CliRun(self, auth: _AuthType) -> None:
-		resJson = self.MakeRequest(auth).json()
+		resJson = self.ListAll(auth)
 		print(json.dumps(resJson, indent='\t'))
 
 	@staticmethod
@@ -75,6 +128,7 @@ class GetTagList(ApiRunner):
 			help='Repo specified in the format of "owner/repo"'
 				' (default: GITHUB_REPOSITORY env var)',
 		)
+		ListApiRunner._AddPaginationArgs(opArgParser)
 
 	@classmethod
 	def FromArgs(cls, args: _ArgsType) -> ApiRunner:
@@ -86,6 +140,7 @@ class GetTagList(ApiRunner):
 		return cls(
 			owner=owner,
 			repoName=repoName,
+			prefetch=args.prefetch_pages,
 		)
 
 
@@ -97,40 +152,103 @@ class GetLatestVer(GetTagList):
 		repoName: str,
 		localVers: List[str],
 		isGitHubOut: bool = False,
+		prefetch: int = 0,
+		prefix: Union[str, None] = None,
+		tagRegex: Union[str, None] = None,
+		includePre: bool = True,
+		tagIndex: Union[TagIndex.TagIndex, None] = None,
+		fullRefresh: bool = False,
+		maxAge: float = TagIndex.DEFAULT_MAX_AGE,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
 		super(GetLatestVer, self).__init__(
 			owner=owner,
 			repoName=repoName,
+			prefetch=prefetch,
 			hostGetter=hostGetter,
+			httpClient=httpClient,
 		)
 		self.localVers = localVers
 		self.isGitHubOut = isGitHubOut
+		self._prefix = prefix
+		self._tagRegex = None if tagRegex is None else re.compile(tagRegex)
+		self._includePre = includePre
+		self._tagIndex = tagIndex
+		self._fullRefresh = fullRefresh
+		self._maxAge = maxAge
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	def _IterVerStrs(self, tagNames: Iterable[str]) -> Iterator[str]:
+		# the version part of the tags selected by --prefix and --tag-regex
+		for name in tagNames:
+			if self._prefix is not None:
+				if not name.startswith(self._prefix):
+					continue
+				name = name[len(self._prefix):]
+			if self._tagRegex is not None:
+				match = self._tagRegex.search(name)
+				if match is None:
+					continue
+				name = match.group(1) if self._tagRegex.groups > 0 else match.group(0)
+				if not name:
+					# an optional group that did not match
+					continue
+			yield name
+
+	def GetRemoteMaxVer(self, auth: _AuthType) -> Union[str, None]:
+		'''
+		Returns the normalized latest version among the remote tags, or None
+		if no tag is a version.
+		'''
+		if self._tagIndex is None:
+			tagNames = ( tag['name'] for tag in self.IterItems(auth) )
+		else:
+			stats = self.RefreshIndex(
+				auth,
+				self._tagIndex,
+				fullRefresh=self._fullRefresh,
+				maxAge=self._maxAge,
+			)
+			self._logger.info(
+				f'Tag index refreshed: {stats}, '
+				f'{self._tagIndex.GetStats(self._indexKey)}'
+			)
+			if (self._prefix is None) and (self._tagRegex is None):
+				maxVer = self._tagIndex.GetMaxVersion(
+					self._indexKey, includePre=self._includePre
+				)
+				return None if maxVer is None else maxVer[1]
+			# the version part differs from the tag name, so the order kept
+			# by the index does not apply
+			tagNames = self._tagIndex.GetTagNames(self._indexKey)
+
+		maxParsed = VersionKey.MaxTag(
+			self._IterVerStrs(tagNames), includePre=self._includePre
+		)
+		return None if maxParsed is None else maxParsed[1]
 
 	def CliRun(self, auth: _AuthType) -> None:
 		if self.isGitHubOut and os.environ.get('GITHUB_OUTPUT', None) is None:
 			raise RuntimeError('GitHub output is enabled but GITHUB_OUTPUT is not set')
 
-		resJson = self.MakeRequest(auth).json()
-		remoteVers = [tag['name'] for tag in resJson]
+		# normalized version strings; compared by their sort keys
+		remoteMaxVer = self.GetRemoteMaxVer(auth)
+		for ver in self.localVers:
+			if VersionKey.ParseTag(ver) is None:
+				raise ValueError(f'Invalid local version {ver}')
 
-		# version object from packaging.version
-		remoteVers = [version.parse(ver) for ver in remoteVers]
-		localVers = [version.parse(ver) for ver in self.localVers]
-
-		# version string from packaging.version
-		if len(remoteVers) == 0:
+		if remoteMaxVer is None:
 			# there is no remote versions -> only compare local versions
-			remoteMaxVer = version.parse('0.0.0')
-			allMaxVer = max(localVers)
-		elif len(localVers) == 0:
+			remoteMaxVer = '0.0.0'
+			allMaxVer = VersionKey.MaxTag(self.localVers)[1]
+		elif len(self.localVers) == 0:
 			# there is no local versions -> only compare remote versions
-			remoteMaxVer = max(remoteVers)
 			allMaxVer = remoteMaxVer
 		else:
 			# compare both remote and local versions
-			remoteMaxVer = max(remoteVers)
-			allMaxVer = max([remoteMaxVer] + localVers)
+			allMaxVer = VersionKey.MaxTag([remoteMaxVer] + self.localVers)[1]
 		lines = [
 			f'remote={remoteMaxVer}\n',
 			f'all={allMaxVer}\n',
@@ -168,6 +286,22 @@ class GetLatestVer(GetTagList):
 			'--github-out', action='store_true',
 			help='Output to GitHub Actions',
 		)
+		opArgParser.add_argument(
+			'--prefix', type=str, required=False,
+			help='Only consider tags starting with this prefix, which is'
+				' removed before parsing the version (e.g., "mylib-")',
+		)
+		opArgParser.add_argument(
+			'--tag-regex', type=str, required=False,
+			help='Only consider tags matching this regex; if it has a group,'
+				' the first group is parsed as the version',
+		)
+		opArgParser.add_argument(
+			'--exclude-prerelease', action='store_true',
+			help='Ignore remote pre-release and development versions',
+		)
+		ListApiRunner._AddPaginationArgs(opArgParser)
+		TagIndex.AddArgs(opArgParser)
 
 	@classmethod
 	def FromArgs(cls, args: _ArgsType) -> ApiRunner:
@@ -181,4 +315,11 @@ class GetLatestVer(GetTagList):
 			repoName=repoName,
 			localVers=args.local_ver,
 			isGitHubOut=args.github_out,
+			prefetch=args.prefetch_pages,
+			prefix=args.prefix,
+			tagRegex=args.tag_regex,
+			includePre=not args.exclude_prerelease,
+			tagIndex=TagIndex.FromArgs(args),
+			fullRefresh=args.tag_index_full_refresh,
+			maxAge=args.tag_index_max_age,
 		)
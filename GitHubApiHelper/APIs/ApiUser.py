@@ -8,9 +8,8 @@
 ###
 
 
-import requests
-
 from ..DefaultHosts import DefaultApiHost, HostGetter
+from ..Http.Client import DefaultHttpClient, HttpClient
 from ..Utils import CheckResp
 from .ApiRunner import ApiRunner
 from ._Types import (
@@ -29,17 +28,19 @@ class Get(ApiRunner):
 	def __init__(
 		self,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
 		super(Get, self).__init__()
 
 		self._url = self.URL_BASE.format(
 			api_host=hostGetter.GetHost(),
 		)
+		self._httpClient = httpClient
 
 	def MakeRequest(self, auth: _AuthType) -> _RespType:
 		authHeaderKey, authHeaderVal = auth.GetHeader()
 
-		req = requests.get(
+		req = self._httpClient.Get(
 			url=self._url,
 			headers={
 				'Accept': 'application/vnd.github+json',
@@ -56,8 +57,9 @@ class GetLogin(Get):
 	def __init__(
 		self,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
-		super(GetLogin, self).__init__(hostGetter)
+		super(GetLogin, self).__init__(hostGetter, httpClient)
 
 	def CliRun(self, auth: _AuthType) -> None:
 		resp = self.MakeRequest(auth)
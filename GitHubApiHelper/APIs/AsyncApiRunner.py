@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import requests
+
+from typing import List, Union
+
+from ..Auth.AsyncAuthHttpHeaderGetter import AsyncAuthHttpHeaderGetter
+from ..Auth.StaticHeader import StaticHeader
+from ..Http import Client
+from ..Http.AsyncClient import AsyncHttpClient, DefaultAsyncHttpClient
+from .ApiRunner import ApiRunner
+from ._Types import (
+	_AuthType,
+	_RespType,
+)
+
+
+_AsyncAuthType = Union[_AuthType, AsyncAuthHttpHeaderGetter]
+
+
+async def ResolveAuth(
+	auth: _AsyncAuthType,
+	asyncClient: AsyncHttpClient = None,
+) -> _AuthType:
+	'''
+	Turns an async auth provider into one the sync runners accept.
+	A sync auth method may have to fetch a token, so its header is also
+	resolved off the event loop.
+	'''
+	asyncClient = asyncClient or DefaultAsyncHttpClient()
+
+	if isinstance(auth, AsyncAuthHttpHeaderGetter):
+		return StaticHeader(await auth.GetHeaderAsync())
+	if auth.IsPublic():
+		return auth
+	return StaticHeader(await asyncClient.RunSync(auth.GetHeader))
+
+
+class _PendingRequest(BaseException):
+	# not an Exception, so a runner's `except Exception` does not catch it
+
+	def __init__(self, method: str, url: str, kwargs: dict) -> None:
+		super(_PendingRequest, self).__init__(method, url)
+
+		self.method = method
+		self.url = url
+		self.kwargs = kwargs
+
+
+class _Replay(object):
+	'''
+	Answers the requests of a run of `MakeRequest` with the responses
+	received so far, and stops the run at the first request without one.
+	'''
+
+	def __init__(self, sent: List[tuple]) -> None:
+		super(_Replay, self).__init__()
+
+		self._sent = sent
+		self._next = 0
+
+	def Handle(
+		self,
+		method: str,
+		url: str,
+		idempotent: Union[bool, None],
+		kwargs: dict,
+	) -> requests.Response:
+		if self._next == len(self._sent):
+			kwargs = dict(kwargs)
+			if hasattr(kwargs.get('data', None), 'read'):
+				# the runner may close it once the run is stopped
+				kwargs['data'] = kwargs['data'].read()
+			raise _PendingRequest(method, url, kwargs)
+
+		sentMethod, sentUrl, resp = self._sent[self._next]
+		if (sentMethod, sentUrl) != (method, url):
+			raise RuntimeError(
+				f'{method} {url} differs from the earlier run'
+				f' ({sentMethod} {sentUrl}); the runner cannot be replayed'
+			)
+		self._next += 1
+		return resp
+
+
+class AsyncApiRunner(object):
+	'''
+	The async counterpart of an `ApiRunner`, sharing its `MakeRequest`.
+	With the "threads" transport, `MakeRequest` runs off the event loop.
+	With a native transport, `MakeRequest` runs on the loop, stopping at
+	each request it makes; the request is sent asynchronously, and
+	`MakeRequest` is run again with the responses so far, until it
+	returns. So it must make the same requests when run again, which the
+	runners here do once the auth header is resolved.
+	'''
+
+	def __init__(
+		self,
+		runner: ApiRunner,
+		asyncClient: AsyncHttpClient = None,
+	) -> None:
+		super(AsyncApiRunner, self).__init__()
+
+		self._runner = runner
+		self._asyncClient = asyncClient or DefaultAsyncHttpClient()
+
+	def GetRunner(self) -> ApiRunner:
+		return self._runner
+
+	async def MakeRequestAsync(
+		self,
+		auth: _AsyncAuthType,
+		*args,
+		**kwargs,
+	) -> _RespType:
+		syncAuth = await ResolveAuth(auth, self._asyncClient)
+		if not self._asyncClient.IsNative():
+			return await self._asyncClient.RunSync(
+				self._runner.MakeRequest, syncAuth, *args, **kwargs
+			)
+
+		sent = []
+		while True:
+			try:
+				with Client.InterceptRequests(_Replay(sent).Handle):
+					return self._runner.MakeRequest(syncAuth, *args, **kwargs)
+			except _PendingRequest as pending:
+				resp = await self._asyncClient.Request(
+					pending.method, pending.url, **pending.kwargs
+				)
+				sent.append((pending.method, pending.url, resp))
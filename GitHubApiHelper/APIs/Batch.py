@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import argparse
+import concurrent.futures
+import json
+import logging
+import os
+import time
+
+from typing import Dict, List, Type, Union
+
+from ..Utils import OutputCapture
+from .ApiRunner import ApiRunner
+from ._Types import (
+	_AuthType,
+	_ArgsType,
+	_ArgParserType,
+)
+
+
+DEFAULT_JOBS = 4
+
+
+def LoadPlan(planPath: os.PathLike) -> dict:
+	with open(planPath, 'r') as f:
+		content = f.read()
+
+	if planPath.endswith('.json'):
+		return json.loads(content)
+
+	try:
+		import yaml
+	except ImportError:
+		raise RuntimeError(
+			'PyYAML is required to read YAML plans; use a .json plan instead'
+		)
+	return yaml.safe_load(content)
+
+
+def StepArgsToList(stepArgs: Union[list, dict, None]) -> List[str]:
+	'''
+	Step args are either a list of command line arguments, or a mapping
+	such as `{"repo": "owner/repo", "resume": true}`, which is turned into
+	`--repo owner/repo --resume`.
+	'''
+	if stepArgs is None:
+		return []
+	if isinstance(stepArgs, list):
+		return [ str(arg) for arg in stepArgs ]
+
+	argList = []
+	for key, value in stepArgs.items():
+		flag = '--' + str(key).replace('_', '-')
+		if value is True:
+			argList.append(flag)
+		elif (value is False) or (value is None):
+			continue
+		elif isinstance(value, list):
+			argList.append(flag)
+			argList += [ str(v) for v in value ]
+		else:
+			argList += [ flag, str(value) ]
+	return argList
+
+
+class Step(object):
+
+	def __init__(
+		self,
+		stepId: str,
+		opName: str,
+		runnerCls: Type[ApiRunner],
+		args: _ArgsType,
+		needs: List[str],
+	) -> None:
+		super(Step, self).__init__()
+
+		self.stepId = stepId
+		self.opName = opName
+		self.runnerCls = runnerCls
+		self.args = args
+		self.needs = needs
+
+	def BuildRunner(self) -> ApiRunner:
+		# only once the step is scheduled, since building a runner may read
+		# files written by the steps it needs
+		return self.runnerCls.FromArgs(args=self.args)
+
+
+def _CheckSteps(steps: List[Step]) -> None:
+	# Kahn's algorithm, to find unknown dependencies and cycles
+	stepsById = { step.stepId: step for step in steps }
+	for step in steps:
+		for dep in step.needs:
+			if dep not in stepsById:
+				raise ValueError(f'Step {step.stepId} needs unknown step {dep}')
+
+	done = set()
+	while len(done) < len(steps):
+		ready = [
+			step for step in steps
+			if (step.stepId not in done) and all(d in done for d in step.needs)
+		]
+		if len(ready) == 0:
+			remaining = [ s.stepId for s in steps if s.stepId not in done ]
+			raise ValueError(f'Dependency cycle among steps {remaining}')
+		done.update(step.stepId for step in ready)
+
+
+class BatchRunner(ApiRunner):
+	'''
+	Runs the steps of a plan in one process. A step starts once all the
+	steps it needs have succeeded, so independent steps run concurrently,
+	sharing the HTTP session and the auth method. Steps depending on a
+	failed step are skipped.
+	'''
+
+	def __init__(
+		self,
+		steps: List[Step],
+		jobs: int = DEFAULT_JOBS,
+		outputPath: Union[os.PathLike, None] = None,
+	) -> None:
+		super(BatchRunner, self).__init__()
+
+		_CheckSteps(steps)
+		self._steps = steps
+		self._jobs = jobs
+		self._outputPath = outputPath
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	def _RunStep(
+		self,
+		auth: _AuthType,
+		stdout: OutputCapture.ThreadLocalStdout,
+		step: Step,
+	) -> dict:
+		result = {
+			'id': step.stepId,
+			'op': step.opName,
+		}
+		startTime = time.monotonic()
+		with stdout.Capture() as buf:
+			try:
+				step.BuildRunner().CliRun(auth=auth)
+				result['status'] = 'ok'
+			except Exception as e:
+				self._logger.debug(f'Step {step.stepId} failed', exc_info=True)
+				result['status'] = 'failed'
+				result['error'] = f'{type(e).__name__}: {e}'
+		result['output'] = buf.getvalue()
+		result['elapsed'] = round(time.monotonic() - startTime, 3)
+		self._logger.info(f'Step {step.stepId}: {result["status"]}')
+		return result
+
+	def RunAll(self, auth: _AuthType) -> dict:
+		startTime = time.monotonic()
+		results: Dict[str, dict] = {}
+		running: Dict[concurrent.futures.Future, Step] = {}
+		pending = list(self._steps)
+
+		with OutputCapture.InstallThreadLocalStdout() as stdout, \
+			concurrent.futures.ThreadPoolExecutor(
+				max_workers=self._jobs
+			) as executor:
+			while (len(pending) > 0) or (len(running) > 0):
+				for step in list(pending):
+					depStatus = [ results.get(d, {}).get('status') for d in step.needs ]
+					if any(s in ('failed', 'skipped') for s in depStatus):
+						results[step.stepId] = {
+							'id': step.stepId,
+							'op': step.opName,
+							'status': 'skipped',
+						}
+						pending.remove(step)
+					elif all(s == 'ok' for s in depStatus):
+						future = executor.submit(self._RunStep, auth, stdout, step)
+						running[future] = step
+						pending.remove(step)
+
+				if len(running) == 0:
+					continue
+				doneFutures, _ = concurrent.futures.wait(
+					running, return_when=concurrent.futures.FIRST_COMPLETED,
+				)
+				for future in doneFutures:
+					step = running.pop(future)
+					results[step.stepId] = future.result()
+
+		stepResults = [ results[step.stepId] for step in self._steps ]
+		return {
+			'ok': all(r['status'] == 'ok' for r in stepResults),
+			'elapsed': round(time.monotonic() - startTime, 3),
+			'steps': stepResults,
+		}
+
+	def CliRun(self, auth: _AuthType) -> None:
+		resultDoc = self.RunAll(auth)
+
+		resultJson = json.dumps(resultDoc, indent='\t')
+		if self._outputPath is None:
+			print(resultJson)
+		else:
+			with open(self._outputPath, 'w') as f:
+				f.write(resultJson + '\n')
+
+		if not resultDoc['ok']:
+			failed = [
+				r['id'] for r in resultDoc['steps'] if r['status'] != 'ok'
+			]
+			raise RuntimeError(f'Steps not completed: {failed}')
+
+	@staticmethod
+	def _AddOpArgParsers(opArgParser: _ArgParserType) -> None:
+		opArgParser.add_argument(
+			'--plan', type=str, required=True,
+			help='YAML or JSON plan; a list of steps, each with an "id",'
+				' an "op", its "args" and the ids of the steps it "needs"',
+		)
+		opArgParser.add_argument(
+			'--jobs', '-j', type=int, default=DEFAULT_JOBS,
+			help='Number of steps run concurrently'
+				f' (default: {DEFAULT_JOBS})',
+		)
+		opArgParser.add_argument(
+			'--output', '-o', type=os.path.abspath, required=False,
+			help='Write the result document to this file instead of stdout',
+		)
+
+	@staticmethod
+	def _ParseStepArgs(
+		opName: str,
+		runnerCls: Type[ApiRunner],
+		stepArgs: List[str],
+	) -> _ArgsType:
+		stepParser = argparse.ArgumentParser(prog=opName, add_help=False)
+		runnerCls._AddOpArgParsers(opArgParser=stepParser)
+		try:
+			args = stepParser.parse_args(stepArgs)
+		except SystemExit:
+			# argparse has already printed the reason
+			raise ValueError(f'Invalid args for {opName}: {stepArgs}')
+		args.operation = opName
+		return args
+
+	@classmethod
+	def FromArgs(cls, args: _ArgsType) -> ApiRunner:
+		# imported here, since the operation map refers to this module
+		from ._Args import OPERATION_CLASS_MAP
+
+		plan = LoadPlan(args.plan)
+		if isinstance(plan, dict):
+			plan = plan.get('steps', None)
+		if not isinstance(plan, list):
+			raise ValueError('A plan must be a list of steps')
+
+		steps = []
+		for i, stepInfo in enumerate(plan):
+			stepId = str(stepInfo.get('id', i))
+			opName = stepInfo['op']
+			if (opName not in OPERATION_CLASS_MAP) or \
+				(OPERATION_CLASS_MAP[opName]['cls'] is cls):
+				raise ValueError(f'Step {stepId} has unknown operation {opName}')
+			if any(step.stepId == stepId for step in steps):
+				raise ValueError(f'Duplicate step id {stepId}')
+
+			needs = stepInfo.get('needs', [])
+			if isinstance(needs, str):
+				needs = [ needs ]
+
+			runnerCls = OPERATION_CLASS_MAP[opName]['cls']
+			steps.append(Step(
+				stepId=stepId,
+				opName=opName,
+				runnerCls=runnerCls,
+				# args are checked now, runners are built when steps run
+				args=cls._ParseStepArgs(
+					opName,
+					runnerCls,
+					StepArgsToList(stepInfo.get('args', None)),
+				),
+				needs=[ str(dep) for dep in needs ],
+			))
+
+		return cls(
+			steps=steps,
+			jobs=args.jobs,
+			outputPath=args.output,
+		)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import argparse
+import concurrent.futures
+import copy
+import json
+import logging
+import sys
+import threading
+import time
+
+from typing import List, TextIO, Type
+
+from ..Utils import OutputCapture
+from .ApiRunner import ApiRunner
+from ._Types import (
+	_AuthType,
+	_ArgsType,
+)
+
+
+DEFAULT_JOBS = 8
+
+# replaced in output paths, so each repo writes its own files
+REPO_PLACEHOLDER = '{repo}'
+
+
+def ReadRepos(reposFile: TextIO) -> List[str]:
+	'''
+	Reads one "owner/repo" per line, skipping blank lines and comments.
+	'''
+	repos = []
+	for line in reposFile:
+		line = line.split('#', maxsplit=1)[0].strip()
+		if len(line) == 0:
+			continue
+		if '/' not in line:
+			raise ValueError(f'Invalid repo {line}; expected "owner/repo"')
+		repos.append(line)
+	return list(dict.fromkeys(repos))
+
+
+class FanOutRunner(ApiRunner):
+	'''
+	Runs one operation for each of many repositories on a thread pool.
+	Each repository gets its own runner, built from the same arguments with
+	`--repo` replaced, and `{repo}` in output paths replaced by "owner_repo";
+	the HTTP session and the auth method are shared.
+	One JSON object per repository is written to `out` as soon as it
+	completes, and a failing repository does not stop the others.
+	'''
+
+	def __init__(
+		self,
+		runnerCls: Type[ApiRunner],
+		args: _ArgsType,
+		repos: List[str],
+		jobs: int = DEFAULT_JOBS,
+		out: TextIO = None,
+	) -> None:
+		super(FanOutRunner, self).__init__()
+
+		self._runnerCls = runnerCls
+		self._args = args
+		self._repos = repos
+		self._jobs = jobs
+		self._out = out
+		self._outLock = threading.Lock()
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	def _MakeArgs(self, repo: str) -> _ArgsType:
+		args = copy.copy(self._args)
+		args.repo = repo
+		for dest in self._runnerCls.OUTPUT_PATH_ARGS:
+			path = getattr(args, dest, None)
+			if path is not None:
+				setattr(
+					args,
+					dest,
+					path.replace(REPO_PLACEHOLDER, repo.replace('/', '_')),
+				)
+		return args
+
+	def _RunOne(
+		self,
+		auth: _AuthType,
+		stdout: OutputCapture.ThreadLocalStdout,
+		repo: str,
+	) -> dict:
+		result = { 'repo': repo }
+		startTime = time.monotonic()
+		with stdout.Capture() as buf:
+			try:
+				args = self._MakeArgs(repo)
+				self._runnerCls.FromArgs(args=args).CliRun(auth=auth)
+				result['ok'] = True
+			except Exception as e:
+				self._logger.debug(f'{repo} failed', exc_info=True)
+				result['ok'] = False
+				result['error'] = f'{type(e).__name__}: {e}'
+		result['output'] = buf.getvalue()
+		result['elapsed'] = round(time.monotonic() - startTime, 3)
+		return result
+
+	def _Emit(self, out: TextIO, result: dict) -> None:
+		with self._outLock:
+			out.write(json.dumps(result) + '\n')
+			out.flush()
+
+	def CliRun(self, auth: _AuthType) -> None:
+		failed = []
+		with OutputCapture.InstallThreadLocalStdout() as stdout:
+			out = self._out or stdout.GetFallback()
+			with concurrent.futures.ThreadPoolExecutor(
+				max_workers=self._jobs
+			) as executor:
+				futures = [
+					executor.submit(self._RunOne, auth, stdout, repo)
+					for repo in self._repos
+				]
+				for future in concurrent.futures.as_completed(futures):
+					result = future.result()
+					self._Emit(out, result)
+					if not result['ok']:
+						failed.append(result['repo'])
+
+		self._logger.info(
+			f'{len(self._repos) - len(failed)} of {len(self._repos)} repos succeeded'
+		)
+		if len(failed) > 0:
+			raise RuntimeError(f'Failed for {len(failed)} repos: {failed}')
+
+
+def _AddArgParsers(argParser: argparse.ArgumentParser) -> None:
+	fanOutGrp = argParser.add_argument_group('Fan-out options')
+	fanOutGrp.add_argument(
+		'--repos-file', type=argparse.FileType('r'), required=False,
+		help='Run the operation for each "owner/repo" listed in this file'
+			' ("-" for stdin), printing one JSON object per repo; output'
+			f' paths must contain {REPO_PLACEHOLDER}, which becomes "owner_repo"',
+	)
+	fanOutGrp.add_argument(
+		'--fan-out-jobs', type=int, default=DEFAULT_JOBS,
+		help='Number of repos processed concurrently'
+			f' (default: {DEFAULT_JOBS})',
+	)
+
+
+def _IsEnabled(args: argparse.Namespace) -> bool:
+	return args.repos_file is not None
+
+
+def _ProcArgs(
+	args: argparse.Namespace,
+	runnerCls: Type[ApiRunner],
+) -> FanOutRunner:
+	if not hasattr(args, 'repo'):
+		raise ValueError(
+			f'Operation {args.operation} does not support --repos-file'
+		)
+
+	with args.repos_file as f:
+		repos = ReadRepos(f)
+
+	if len(repos) > 1:
+		for dest in runnerCls.OUTPUT_PATH_ARGS:
+			path = getattr(args, dest, None)
+			if (path is not None) and (REPO_PLACEHOLDER not in path):
+				raise ValueError(
+					f'--{dest.replace("_", "-")} must contain {REPO_PLACEHOLDER}'
+					' with --repos-file, so repos do not overwrite each'
+					' other\'s files'
+				)
+
+	return FanOutRunner(
+		runnerCls=runnerCls,
+		args=args,
+		repos=repos,
+		jobs=args.fan_out_jobs,
+		out=sys.stdout,
+	)
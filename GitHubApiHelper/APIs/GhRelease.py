@@ -8,15 +8,17 @@
 ###
 
 
-import hashlib
 import logging
 import os
-import requests
 
-from typing import Union
+from typing import Tuple, Union
 
-from ..DefaultHosts import DefaultGhHost, HostGetter
-from ..Utils import CheckResp, LogEnvVars
+from ..DefaultHosts import DefaultApiHost, DefaultGhHost, HostGetter
+from ..Http import Download
+from ..Http import ResumableDownload
+from ..Http.Client import DefaultHttpClient, HttpClient
+from ..Utils import AssetCache, CheckResp, LogEnvVars
+from .ApiRelease import GetByTag as _GetByTag
 from .ApiRunner import ApiRunner
 from ._Types import (
 	_AuthType,
@@ -28,6 +30,7 @@ from ._Types import (
 
 class DownloadAsset(ApiRunner):
 	URL_BASE = 'https://{gh_host}/{owner}/{repo}/releases/download/{version}/{asset}'
+	OUTPUT_PATH_ARGS = ('save_path', )
 
 	def __init__(
 		self,
@@ -36,7 +39,12 @@ class DownloadAsset(ApiRunner):
 		version: str,
 		assetName: str,
 		savePath: Union[os.PathLike, None],
+		numSegments: int = 1,
+		resume: bool = False,
+		assetCache: Union[AssetCache.AssetCache, None] = None,
+		apiHostGetter: HostGetter = DefaultApiHost(),
 		hostGetter: HostGetter = DefaultGhHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
 		super(DownloadAsset, self).__init__()
 
@@ -47,37 +55,117 @@ class DownloadAsset(ApiRunner):
 			version=version,
 			asset=assetName,
 		)
+		self._httpClient = httpClient
 
 		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
 		self._savePath = savePath
+		self._numSegments = numSegments
+		self._resume = resume
+		self._assetCache = assetCache
+		self._releaseGetter = _GetByTag(
+			owner=owner,
+			repoName=repoName,
+			tag=version,
+			hostGetter=apiHostGetter,
+			httpClient=httpClient,
+		)
+		self._assetName = assetName
+		self._cacheKey = AssetCache.AssetCache.MakeKey(
+			host=hostGetter.GetHost(),
+			owner=owner,
+			repoName=repoName,
+			tag=version,
+			asset=assetName,
+		)
 
-	def MakeRequest(self, auth: _AuthType) -> _RespType:
+	def MakeRequest(self, auth: _AuthType, stream: bool = False) -> _RespType:
 		authHeaderKey, authHeaderVal = auth.GetHeader()
 
-		req = requests.get(
+		req = self._httpClient.Get(
 			url=self._url,
 			headers={
 				'Accept': 'application/octet-stream',
 				authHeaderKey: authHeaderVal,
 			},
+			stream=stream,
 		)
 		CheckResp.CheckRespErr(req)
 
 		return req
 
-	def CliRun(self, auth: _AuthType) -> None:
-		resp = self.MakeRequest(auth)
-
-		fileContent = resp.content
-		self._logger.debug('Received {} bytes'.format(len(fileContent)))
+	def _CheckCache(
+		self,
+		auth: _AuthType,
+	) -> Tuple[Union[str, None], Union[str, None], Union[str, None]]:
+		'''
+		Returns the (cached SHA-256 if still valid, validator, release ETag)
+		of the asset, from the release metadata, requested conditionally so
+		an unchanged release costs a 304 response instead of a download.
+		'''
+		entry = self._assetCache.GetEntry(self._cacheKey)
+		knownEtag = None if entry is None else entry.get('meta_etag', None)
+
+		resp = self._releaseGetter.MakeRequest(auth, etag=knownEtag)
+		if resp.status_code == 304:
+			validator = entry['validator']
+			return (
+				self._assetCache.Lookup(self._cacheKey, validator),
+				validator,
+				knownEtag,
+			)
+
+		for asset in resp.json().get('assets', []):
+			if asset['name'] == self._assetName:
+				validator = AssetCache.GetAssetValidator(asset)
+				return (
+					self._assetCache.Lookup(self._cacheKey, validator),
+					validator,
+					resp.headers.get('ETag', None),
+				)
+		# not embedded in the release object; the download is not cached
+		return (None, None, None)
 
-		fileHash = hashlib.sha256(fileContent).hexdigest()
+	def CliRun(self, auth: _AuthType) -> None:
+		validator = None
+		if self._assetCache is not None:
+			cachedHash, validator, metaEtag = self._CheckCache(auth)
+			if cachedHash is not None:
+				self._assetCache.Materialize(cachedHash, self._savePath)
+				if metaEtag is not None:
+					# keep the latest release ETag for the next run
+					self._assetCache.Add(
+						self._cacheKey,
+						validator,
+						self._savePath,
+						cachedHash,
+						metaEtag=metaEtag,
+					)
+				self._logger.debug('Asset cache hit: {}'.format(self._cacheKey))
+				print(cachedHash)
+				return
+
+		resp = self.MakeRequest(auth, stream=True)
+		saveToFile = ResumableDownload.ResumableToFile \
+			if self._resume else Download.DownloadToFile
+		fileHash, fileSize = saveToFile(
+			httpClient=self._httpClient,
+			resp=resp,
+			savePath=self._savePath,
+			numSegments=self._numSegments,
+		)
+		self._logger.debug('Received {} bytes'.format(fileSize))
 		self._logger.debug('SHA256: {}'.format(fileHash))
-
-		with open(self._savePath, 'wb') as f:
-			f.write(fileContent)
 		self._logger.debug('Saved to {}'.format(self._savePath))
 
+		if validator is not None:
+			self._assetCache.Add(
+				self._cacheKey,
+				validator,
+				self._savePath,
+				fileHash,
+				metaEtag=metaEtag,
+			)
+
 		print(fileHash)
 
 	@staticmethod
@@ -94,6 +182,8 @@ class DownloadAsset(ApiRunner):
 			'--save-path', '-o', type=os.path.abspath, required=True,
 			help='Path to save the downloaded asset',
 		)
+		Download.AddDownloadArgs(opArgParser)
+		AssetCache.AddArgs(opArgParser)
 		opArgParser.add_argument(
 			'--repo', type=str, required=False,
 			default=os.environ.get('GITHUB_REPOSITORY', None),
@@ -115,4 +205,7 @@ class DownloadAsset(ApiRunner):
 			version=args.version,
 			assetName=args.asset,
 			savePath=args.save_path,
+			numSegments=args.segments,
+			resume=args.resume,
+			assetCache=AssetCache.FromArgs(args),
 		)
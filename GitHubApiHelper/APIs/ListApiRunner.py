@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+from typing import Iterator, List, Union
+
+from ..Http import Pagination
+from ..Http.Client import DefaultHttpClient, HttpClient
+from ..Utils import CheckResp
+from .ApiRunner import ApiRunner
+from ._Types import (
+	_AuthType,
+	_ArgParserType,
+	_RespType,
+)
+
+
+class ListApiRunner(ApiRunner):
+	'''
+	Base class for runners of paginated list endpoints.
+	Subclasses set `self._url` and may override `ITEMS_KEY` and `_GenHeaders`.
+	'''
+
+	ITEMS_KEY: Union[str, None] = None
+
+	def __init__(
+		self,
+		perPage: int = Pagination.DEFAULT_PER_PAGE,
+		prefetch: int = 0,
+		httpClient: HttpClient = DefaultHttpClient(),
+	) -> None:
+		super(ListApiRunner, self).__init__()
+
+		self._url = None
+		self._params = {}
+		self._perPage = perPage
+		self._prefetch = prefetch
+		self._httpClient = httpClient
+
+	def _GenHeaders(self, auth: _AuthType) -> dict:
+		headers = {
+			'Accept': 'application/vnd.github+json',
+		}
+
+		if not auth.IsPublic():
+			authHeaderKey, authHeaderVal = auth.GetHeader()
+			headers[authHeaderKey] = authHeaderVal
+
+		return headers
+
+	def MakeRequest(self, auth: _AuthType) -> _RespType:
+		# only the first page
+		params = dict(self._params)
+		params['per_page'] = self._perPage
+
+		req = self._httpClient.Get(
+			url=self._url,
+			headers=self._GenHeaders(auth),
+			params=params,
+		)
+		CheckResp.CheckRespErr(req)
+
+		return req
+
+	def IterItems(self, auth: _AuthType) -> Iterator[dict]:
+		return Pagination.IterItems(
+			httpClient=self._httpClient,
+			url=self._url,
+			headers=self._GenHeaders(auth),
+			params=self._params,
+			perPage=self._perPage,
+			prefetch=self._prefetch,
+			itemsKey=self.ITEMS_KEY,
+		)
+
+	def ListAll(self, auth: _AuthType) -> List[dict]:
+		return list(self.IterItems(auth))
+
+	@staticmethod
+	def _AddPaginationArgs(opArgParser: _ArgParserType) -> None:
+		opArgParser.add_argument(
+			'--prefetch-pages', type=int, default=0,
+			help='Number of pages to fetch concurrently once the page count'
+				' is known (default: 0, fetch pages one by one)',
+		)
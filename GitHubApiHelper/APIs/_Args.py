@@ -12,10 +12,13 @@ import argparse
 
 from . import ApiActionsSecrets
 from . import ApiContents
+from . import ApiGitData
 from . import ApiReleaseAssets
 from . import ApiRunner
 from . import ApiTags
 from . import ApiUser
+from . import Batch
+from . import FanOut
 from . import GhRelease
 from . import MiscShowToken
 from ._Types import _SubParserAdderType
@@ -26,14 +29,34 @@ OPERATION_CLASS_MAP = {
 		'cls': ApiActionsSecrets.SetRepoSecretFromGhApp,
 		'help': 'API:Actions:Secrets: Set repository secret from GitHub App token',
 	},
+	'api_actions_secrets_sync': {
+		'cls': ApiActionsSecrets.SyncRepoSecrets,
+		'help': 'API:Actions:Secrets: Set many secrets in many repositories',
+	},
+	'api_actions_org_secrets_sync': {
+		'cls': ApiActionsSecrets.SyncOrgSecrets,
+		'help': 'API:Actions:Secrets: Set many organization secrets',
+	},
 	'api_content_put': {
 		'cls': ApiContents.CreateOrUpdate,
 		'help': 'API:Contents: Create or update file contents',
 	},
+	'api_git_commit_files': {
+		'cls': ApiGitData.CommitFiles,
+		'help': 'API:Git: Commit many files to a branch in a single commit',
+	},
 	'api_release_asset_dl': {
 		'cls': ApiReleaseAssets.Download,
 		'help': 'GitHub:Release:Assets Download release asset',
 	},
+	'api_release_assets_dl': {
+		'cls': ApiReleaseAssets.DownloadMany,
+		'help': 'GitHub:Release:Assets Download many release assets concurrently',
+	},
+	'api_release_assets_up': {
+		'cls': ApiReleaseAssets.UploadMany,
+		'help': 'GitHub:Release:Assets Upload release assets concurrently',
+	},
 	'api_tags': {
 		'cls': ApiTags.GetTagList,
 		'help': 'API:Tags: Get list of tags',
@@ -46,6 +69,10 @@ OPERATION_CLASS_MAP = {
 		'cls': ApiUser.GetLogin,
 		'help': 'API:User: Get user login',
 	},
+	'batch': {
+		'cls': Batch.BatchRunner,
+		'help': 'Batch: Run the operations listed in a plan file',
+	},
 	'gh_release_dl': {
 		'cls': GhRelease.DownloadAsset,
 		'help': 'GitHub:Release: Download release asset',
@@ -57,6 +84,10 @@ OPERATION_CLASS_MAP = {
 }
 
 
+def _AddArgParsers(argParser: argparse.ArgumentParser) -> None:
+	FanOut._AddArgParsers(argParser=argParser)
+
+
 def _AddOpArgParsers(opArgParser: _SubParserAdderType) -> None:
 	for opName, opInfo in OPERATION_CLASS_MAP.items():
 		subParser = opArgParser.add_parser(name=opName, help=opInfo['help'])
@@ -67,4 +98,6 @@ def _AddOpArgParsers(opArgParser: _SubParserAdderType) -> None:
 def _ProcArgs(args: argparse.Namespace) -> ApiRunner.ApiRunner:
 	opInfo = OPERATION_CLASS_MAP[args.operation]
 	cls: ApiRunner.ApiRunner = opInfo['cls']
+	if FanOut._IsEnabled(args=args):
+		return FanOut._ProcArgs(args=args, runnerCls=cls)
 	return cls.FromArgs(args=args)
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+from typing import Tuple
+
+
+class AsyncAuthHttpHeaderGetter(object):
+	def __init__(self) -> None:
+		super(AsyncAuthHttpHeaderGetter, self).__init__()
+
+	async def GetHeaderAsync(self) -> Tuple[str, str]:
+		raise NotImplementedError('GetHeaderAsync() is not implemented')
+
+	def IsPublic(self) -> bool:
+		return False
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import json
+import logging
+import os
+import time
+
+from typing import Hashable, Tuple, Union
+
+from ..Utils import FileLock
+
+
+class DiskTokenStore(object):
+	'''
+	A JSON file holding installation IDs and installation tokens, shared by
+	every process pointing at the same path.
+	The file and its lock are only readable by the current user.
+	'''
+
+	def __init__(self, path: os.PathLike) -> None:
+		super(DiskTokenStore, self).__init__()
+
+		self._path = os.path.abspath(path)
+		dirPath = os.path.dirname(self._path)
+		if not os.path.isdir(dirPath):
+			os.makedirs(dirPath, mode=0o700, exist_ok=True)
+
+		self._lock = FileLock.FileLock(self._path + '.lock')
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	@staticmethod
+	def _KeyToStr(key: Hashable) -> str:
+		if isinstance(key, tuple):
+			return '|'.join(str(k) for k in key)
+		return str(key)
+
+	def Lock(self) -> FileLock.FileLock:
+		return self._lock
+
+	def _Read(self) -> dict:
+		try:
+			with open(self._path, 'r') as f:
+				data = json.load(f)
+		except FileNotFoundError:
+			data = {}
+		except ValueError:
+			self._logger.warning(f'Ignoring corrupted token cache {self._path}')
+			data = {}
+
+		data.setdefault('tokens', {})
+		data.setdefault('install_ids', {})
+		return data
+
+	def _Write(self, data: dict) -> None:
+		FileLock.WritePrivateFile(
+			self._path,
+			json.dumps(data, indent='\t').encode('utf-8'),
+		)
+
+	def LoadToken(self, key: Hashable) -> Union[Tuple[str, float], None]:
+		with self._lock:
+			entry = self._Read()['tokens'].get(self._KeyToStr(key), None)
+		if entry is None:
+			return None
+		return (entry['token'], entry['expires_at'])
+
+	def SaveToken(self, key: Hashable, token: str, expiresAt: float) -> None:
+		with self._lock:
+			data = self._Read()
+			now = time.time()
+			# drop tokens that have already expired
+			data['tokens'] = {
+				k: v for k, v in data['tokens'].items() if v['expires_at'] > now
+			}
+			data['tokens'][self._KeyToStr(key)] = {
+				'token': token,
+				'expires_at': expiresAt,
+			}
+			self._Write(data)
+
+	def LoadInstallId(self, key: Hashable) -> Union[int, None]:
+		with self._lock:
+			return self._Read()['install_ids'].get(self._KeyToStr(key), None)
+
+	def SaveInstallId(self, key: Hashable, installId: int) -> None:
+		with self._lock:
+			data = self._Read()
+			data['install_ids'][self._KeyToStr(key)] = installId
+			self._Write(data)
+
+	def DeleteInstallId(self, key: Hashable) -> None:
+		with self._lock:
+			data = self._Read()
+			if data['install_ids'].pop(self._KeyToStr(key), None) is not None:
+				self._Write(data)
@@ -8,28 +8,41 @@
 ###
 
 
+import logging
 import os
-import requests
+import threading
 import time
 import jwt
+import requests
 
 from cryptography.hazmat.primitives import serialization
-from typing import Tuple, Union
+from typing import Callable, Tuple, Union
 
 from ..DefaultHosts import DefaultApiHost, HostGetter
+from ..Http.Client import DefaultHttpClient, HttpClient
 from ..Utils import CheckResp, LogEnvVars
 
 from . import AccessTokenGetter
 from . import AuthHttpHeaderGetter
+from . import DiskTokenStore
+from . import TokenCache
 
 
 class AppPrivateKey(object):
 
+	# JWT lifetime, counted from the (non-backdated) signing time
+	JWT_LIFETIME = 120
+	# backdate `iat` to tolerate clock drift between us and GitHub
+	JWT_CLOCK_SKEW = 60
+	# stop handing out a cached JWT this many seconds before it expires
+	JWT_REUSE_MARGIN = 30
+
 	def __init__(
 		self,
 		privKey: Union[bytes, str, os.PathLike],
 		appId: str,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
 	) -> None:
 
 		if os.path.isfile(privKey):
@@ -54,24 +67,44 @@ class AppPrivateKey(object):
 
 		self._appId = appId
 		self._hostGetter = hostGetter
+		self._httpClient = httpClient
+
+		self._jwtLock = threading.Lock()
+		self._jwt = None
+		self._jwtExp = 0
 
-	def _GenPayload(self) -> dict:
+	def GetAppId(self) -> str:
+		return self._appId
+
+	def GetHost(self) -> str:
+		return self._hostGetter.GetHost()
+
+	def _GenPayload(self, now: int) -> dict:
 		return {
 			# Issued at time
-			'iat': int(time.time()),
-			# JWT expiration time (2 minutes maximum)
-			'exp': int(time.time()) + 120,
+			'iat': now - self.JWT_CLOCK_SKEW,
+			# JWT expiration time
+			'exp': now + self.JWT_LIFETIME,
 			# GitHub App's identifier
 			'iss': self._appId,
 		}
 
-	def _GenEncoded(self) -> str:
+	def _SignEncoded(self, payload: dict) -> str:
 		return jwt.encode(
-			self._GenPayload(),
+			payload,
 			self._privKey,
 			algorithm='RS256',
 		)
 
+	def _GenEncoded(self) -> str:
+		with self._jwtLock:
+			now = int(time.time())
+			if (self._jwt is None) or (now >= self._jwtExp - self.JWT_REUSE_MARGIN):
+				payload = self._GenPayload(now)
+				self._jwt = self._SignEncoded(payload)
+				self._jwtExp = payload['exp']
+			return self._jwt
+
 	def GetInstallIdByRepo(
 		self,
 		owner: str,
@@ -87,7 +120,7 @@ class AppPrivateKey(object):
 			repo=repoName,
 		)
 
-		resp = requests.get(
+		resp = self._httpClient.Get(
 			url=url,
 			headers={
 				'Accept': 'application/vnd.github+json',
@@ -98,7 +131,7 @@ class AppPrivateKey(object):
 
 		return resp.json()['id']
 
-	def GetInstallToken(self, installId: int) -> str:
+	def GetInstallTokenWithExpiry(self, installId: int) -> Tuple[str, float]:
 		# https://docs.github.com/en/rest/apps/apps#create-an-installation-access-token-for-an-app
 
 		URL_BASE = 'https://{api_host}/app/installations/{install_id}/access_tokens'
@@ -108,8 +141,10 @@ class AppPrivateKey(object):
 			install_id=installId,
 		)
 
-		resp = requests.post(
+		resp = self._httpClient.Post(
 			url=url,
+			# only mints another token
+			idempotent=True,
 			headers={
 				'Accept': 'application/vnd.github+json',
 				'Authorization': f'Bearer {self._GenEncoded()}',
@@ -117,7 +152,16 @@ class AppPrivateKey(object):
 		)
 		CheckResp.CheckRespErr(resp)
 
-		return resp.json()['token']
+		respJson = resp.json()
+
+		return (
+			respJson['token'],
+			TokenCache.ParseExpiresAt(respJson['expires_at']),
+		)
+
+	def GetInstallToken(self, installId: int) -> str:
+		token, _ = self.GetInstallTokenWithExpiry(installId)
+		return token
 
 
 class AppPrivateKeyByInstallId(
@@ -130,6 +174,8 @@ class AppPrivateKeyByInstallId(
 		appId: str,
 		installId: int,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+		tokenCache: TokenCache.TokenCache = TokenCache.DefaultTokenCache(),
 	) -> None:
 		super(AppPrivateKeyByInstallId, self).__init__()
 
@@ -137,11 +183,36 @@ class AppPrivateKeyByInstallId(
 			privKey=privKey,
 			appId=appId,
 			hostGetter=hostGetter,
+			httpClient=httpClient,
 		)
 		self._installId = installId
+		self._tokenCache = tokenCache
+
+	def _GetCacheKey(self) -> tuple:
+		return (
+			str(self._privKey.GetAppId()),
+			str(self._installId),
+			self._privKey.GetHost(),
+		)
 
 	def GetToken(self) -> str:
-		return self._privKey.GetInstallToken(self._installId)
+		return self._tokenCache.GetOrRefresh(
+			key=self._GetCacheKey(),
+			refresher=lambda: self._privKey.GetInstallTokenWithExpiry(
+				self._installId
+			),
+		)
+
+	def MintToken(self) -> str:
+		'''
+		Always mints a new token, which has the full lifetime, e.g., to be
+		stored somewhere it will be used long after this run.
+		'''
+		token, expiresAt = self._privKey.GetInstallTokenWithExpiry(
+			self._installId
+		)
+		self._tokenCache.Put(self._GetCacheKey(), token, expiresAt)
+		return token
 
 	def GetHeader(self) -> Tuple[str, str]:
 		return ('Authorization', f'Bearer {self.GetToken()}')
@@ -157,26 +228,75 @@ class AppPrivateKeyByRepo(
 		owner: str,
 		repoName: str,
 		hostGetter: HostGetter = DefaultApiHost(),
+		httpClient: HttpClient = DefaultHttpClient(),
+		tokenCache: TokenCache.TokenCache = TokenCache.DefaultTokenCache(),
 	) -> None:
 		super(AppPrivateKeyByRepo, self).__init__(
 			privKey=privKey,
 			appId=appId,
 			installId=0,
 			hostGetter=hostGetter,
+			httpClient=httpClient,
+			tokenCache=tokenCache,
 		)
 
 		self._owner = owner
 		self._repoName = repoName
+		self._installIdKey = (
+			str(self._privKey.GetAppId()),
+			self._privKey.GetHost(),
+			f'{owner}/{repoName}',
+		)
 
-		self._installId = self._privKey.GetInstallIdByRepo(
-			owner=owner,
-			repoName=repoName,
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+		self._ResolveInstallId()
+
+	def _ResolveInstallId(self) -> None:
+		self._installId = self._tokenCache.GetOrResolveInstallId(
+			key=self._installIdKey,
+			resolver=lambda: self._privKey.GetInstallIdByRepo(
+				owner=self._owner,
+				repoName=self._repoName,
+			),
 		)
 
+	def _RetryOnStaleInstallId(self, getToken: Callable[[], str]) -> str:
+		# a cached installation ID is gone once the app is reinstalled, and
+		# creating a token for it returns 404
+		try:
+			return getToken()
+		except requests.HTTPError as e:
+			if (e.response is None) or (e.response.status_code != 404):
+				raise
+		self._logger.warning(
+			f'Installation {self._installId} not found; resolving it again'
+		)
+		self._tokenCache.InvalidateInstallId(self._installIdKey)
+		self._ResolveInstallId()
+		return getToken()
+
+	def GetToken(self) -> str:
+		return self._RetryOnStaleInstallId(
+			super(AppPrivateKeyByRepo, self).GetToken
+		)
 
-def FromEnvVars() -> AppPrivateKeyByInstallId:
+	def MintToken(self) -> str:
+		return self._RetryOnStaleInstallId(
+			super(AppPrivateKeyByRepo, self).MintToken
+		)
+
+
+def FromEnvVars(
+	httpClient: HttpClient = DefaultHttpClient(),
+	tokenCache: TokenCache.TokenCache = TokenCache.DefaultTokenCache(),
+) -> AppPrivateKeyByInstallId:
 	LogEnvVars.LogEnvVars()
 
+	cachePath = os.environ.get('GITHUB_APP_TOKEN_CACHE', None)
+	if cachePath is not None and tokenCache.GetStore() is None:
+		tokenCache.SetStore(DiskTokenStore.DiskTokenStore(cachePath))
+
 	privKey = os.environ['GITHUB_APP_PRIVATE_KEY']
 	appId = os.environ['GITHUB_APP_ID']
 
@@ -191,6 +311,8 @@ def FromEnvVars() -> AppPrivateKeyByInstallId:
 			privKey=privKey,
 			appId=appId,
 			installId=installId,
+			httpClient=httpClient,
+			tokenCache=tokenCache,
 		)
 	elif repo is not None:
 		owner, repoName = repo.split('/', maxsplit=1)
@@ -199,4 +321,6 @@ def FromEnvVars() -> AppPrivateKeyByInstallId:
 			appId=appId,
 			owner=owner,
 			repoName=repoName,
+			httpClient=httpClient,
+			tokenCache=tokenCache,
 		)
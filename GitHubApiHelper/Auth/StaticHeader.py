@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+from typing import Tuple
+
+from . import AccessTokenGetter
+from . import AuthHttpHeaderGetter
+
+
+class StaticHeader(
+	AccessTokenGetter.AccessTokenGetter,
+	AuthHttpHeaderGetter.AuthHttpHeaderGetter
+):
+	'''
+	An auth method that hands out a header resolved in advance, e.g., by
+	an async auth provider.
+	'''
+
+	def __init__(self, header: Tuple[str, str]) -> None:
+		super(StaticHeader, self).__init__()
+
+		self.header = header
+
+	def GetToken(self) -> str:
+		return self.header[1].split(' ', maxsplit=1)[-1]
+
+	def GetHeader(self) -> Tuple[str, str]:
+		return self.header
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import contextlib
+import datetime
+import logging
+import threading
+import time
+
+from typing import Callable, Dict, Hashable, Tuple, Union
+
+from .DiskTokenStore import DiskTokenStore
+
+
+_TokenEntry = Tuple[str, float]
+
+
+def ParseExpiresAt(expiresAt: str) -> float:
+	# GitHub returns timestamps like '2016-07-11T22:14:10Z'
+	dt = datetime.datetime.strptime(expiresAt, '%Y-%m-%dT%H:%M:%SZ')
+	return dt.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+class TokenCache(object):
+	'''
+	In-memory cache of installation tokens, keyed by
+	(app id, installation id, host).
+	A cached token is handed out until `refreshMargin` seconds before it
+	expires; refreshes are single-flight per key.
+	When a `DiskTokenStore` is attached, entries are also shared with other
+	processes using the same store.
+	'''
+
+	DEFAULT_REFRESH_MARGIN = 300
+
+	def __init__(
+		self,
+		refreshMargin: float = DEFAULT_REFRESH_MARGIN,
+		store: Union[DiskTokenStore, None] = None,
+	) -> None:
+		super(TokenCache, self).__init__()
+
+		self._refreshMargin = refreshMargin
+		self._store = store
+		self._lock = threading.Lock()
+		self._keyLocks: Dict[Hashable, threading.Lock] = {}
+		self._entries: Dict[Hashable, _TokenEntry] = {}
+		self._installIds: Dict[Hashable, int] = {}
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	def SetRefreshMargin(self, refreshMargin: float) -> None:
+		self._refreshMargin = refreshMargin
+
+	def GetRefreshMargin(self) -> float:
+		return self._refreshMargin
+
+	def SetStore(self, store: Union[DiskTokenStore, None]) -> None:
+		self._store = store
+
+	def GetStore(self) -> Union[DiskTokenStore, None]:
+		return self._store
+
+	def _StoreLock(self) -> contextlib.AbstractContextManager:
+		if self._store is None:
+			return contextlib.nullcontext()
+		return self._store.Lock()
+
+	def _GetKeyLock(self, key: Hashable) -> threading.Lock:
+		with self._lock:
+			keyLock = self._keyLocks.get(key, None)
+			if keyLock is None:
+				keyLock = threading.Lock()
+				self._keyLocks[key] = keyLock
+			return keyLock
+
+	def _IsFresh(self, entry: _TokenEntry) -> bool:
+		_, expiresAt = entry
+		return time.time() < (expiresAt - self._refreshMargin)
+
+	def Get(self, key: Hashable) -> Union[str, None]:
+		with self._lock:
+			entry = self._entries.get(key, None)
+		if entry is not None and self._IsFresh(entry):
+			return entry[0]
+
+		if self._store is not None:
+			entry = self._store.LoadToken(key)
+			if entry is not None and self._IsFresh(entry):
+				with self._lock:
+					self._entries[key] = entry
+				return entry[0]
+
+		return None
+
+	def Put(self, key: Hashable, token: str, expiresAt: float) -> None:
+		with self._lock:
+			self._entries[key] = (token, expiresAt)
+		if self._store is not None:
+			self._store.SaveToken(key, token, expiresAt)
+
+	def Invalidate(self, key: Hashable) -> None:
+		with self._lock:
+			self._entries.pop(key, None)
+
+	def GetOrRefresh(
+		self,
+		key: Hashable,
+		refresher: Callable[[], _TokenEntry],
+	) -> str:
+		token = self.Get(key)
+		if token is not None:
+			return token
+
+		# holding the store lock makes the refresh single-flight across
+		# processes as well
+		with self._GetKeyLock(key), self._StoreLock():
+			# another thread may have refreshed it while we were waiting
+			token = self.Get(key)
+			if token is not None:
+				return token
+
+			self._logger.debug(f'Refreshing token for {key}')
+			token, expiresAt = refresher()
+			self.Put(key, token, expiresAt)
+			return token
+
+	def GetOrResolveInstallId(
+		self,
+		key: Hashable,
+		resolver: Callable[[], int],
+	) -> int:
+		with self._lock:
+			installId = self._installIds.get(key, None)
+		if installId is not None:
+			return installId
+
+		with self._GetKeyLock(key), self._StoreLock():
+			if self._store is not None:
+				installId = self._store.LoadInstallId(key)
+			if installId is None:
+				self._logger.debug(f'Resolving installation ID for {key}')
+				installId = resolver()
+				if self._store is not None:
+					self._store.SaveInstallId(key, installId)
+
+			with self._lock:
+				self._installIds[key] = installId
+			return installId
+
+	def InvalidateInstallId(self, key: Hashable) -> None:
+		# e.g., the app was reinstalled, so the stored ID no longer exists
+		with self._GetKeyLock(key), self._StoreLock():
+			with self._lock:
+				self._installIds.pop(key, None)
+			if self._store is not None:
+				self._store.DeleteInstallId(key)
+
+
+_DEFAULT_TOKEN_CACHE = TokenCache()
+
+
+def DefaultTokenCache() -> TokenCache:
+	return _DEFAULT_TOKEN_CACHE
@@ -9,11 +9,14 @@
 
 
 import argparse
+import os
 
 from ._Types import _AuthTypes
 from . import AccessToken
+from . import DiskTokenStore
 from . import GhAppPrivateKey
 from . import Public
+from . import TokenCache
 
 
 def _AddArgParsers(argParser: argparse.ArgumentParser) -> None:
@@ -30,9 +33,27 @@ def _AddArgParsers(argParser: argparse.ArgumentParser) -> None:
 		'--public', action='store_true',
 		help='No authentication is required'
 	)
+	argParser.add_argument(
+		'--auth-token-refresh-margin', type=float,
+		default=TokenCache.TokenCache.DEFAULT_REFRESH_MARGIN,
+		help='Refresh cached GitHub App installation tokens this many seconds'
+			' before they expire'
+			f' (default: {TokenCache.TokenCache.DEFAULT_REFRESH_MARGIN})',
+	)
+	argParser.add_argument(
+		'--auth-token-cache', type=os.path.abspath, required=False,
+		default=os.environ.get('GITHUB_APP_TOKEN_CACHE', None),
+		help='File used to share GitHub App installation IDs and tokens'
+			' across processes (default: GITHUB_APP_TOKEN_CACHE env var)',
+	)
 
 
 def _ProcArgs(args: argparse.Namespace) -> _AuthTypes:
+	tokenCache = TokenCache.DefaultTokenCache()
+	tokenCache.SetRefreshMargin(args.auth_token_refresh_margin)
+	if args.auth_token_cache is not None:
+		tokenCache.SetStore(DiskTokenStore.DiskTokenStore(args.auth_token_cache))
+
 	if args.auth_token:
 		return AccessToken.FromEnvVars()
 	elif args.auth_gh_app:
@@ -24,6 +24,14 @@ class DefaultApiHost(HostGetter):
 		return 'api.github.com'
 
 
+class DefaultUploadsHost(HostGetter):
+	def __init__(self) -> None:
+		super(DefaultUploadsHost, self).__init__()
+
+	def GetHost(self) -> str:
+		return 'uploads.github.com'
+
+
 class DefaultGhHost(HostGetter):
 	def __init__(self) -> None:
 		super(DefaultGhHost, self).__init__()
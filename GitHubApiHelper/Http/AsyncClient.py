@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import asyncio
+import concurrent.futures
+import functools
+import threading
+import requests
+import requests.structures
+import requests.utils
+
+from typing import Any, Awaitable, Callable, Iterable, List, TypeVar, Union
+
+from .Client import DefaultHttpClient, HttpClient
+
+
+_T = TypeVar('_T')
+
+TRANSPORTS = ('threads', 'httpx')
+
+# `requests` arguments the httpx transport knows how to send
+_HTTPX_KWARGS = (
+	'headers', 'params', 'json', 'data', 'timeout', 'allow_redirects', 'stream',
+)
+
+
+def _ToHttpxTimeout(httpx: Any, timeout: Any) -> Any:
+	# `requests` takes a number or a (connect, read) tuple
+	if isinstance(timeout, tuple):
+		connect, read = timeout
+		return httpx.Timeout(read, connect=connect)
+	return httpx.Timeout(timeout)
+
+
+def _ReadBody(data: Any) -> Any:
+	# the async transport cannot read a (blocking) file object
+	if hasattr(data, 'read'):
+		return data.read()
+	return data
+
+
+class AsyncHttpClient(object):
+	'''
+	An asyncio front end of `HttpClient`, with one of two transports.
+	"threads" sends each request with the pooled, blocking session of
+	`httpClient` on a thread pool, so the response cache, retry policy and
+	the rest of `HttpClient` apply, but at most `maxWorkers` requests are in
+	flight at a time, however many coroutines await them.
+	"httpx" sends requests natively on the event loop with `httpx` (the
+	`async` extra), so up to `maxConnections` requests are in flight and any
+	number of coroutines can wait on one loop; these requests bypass the
+	layers of `httpClient`, and bodies are read into memory.
+	'''
+
+	DEFAULT_MAX_CONNECTIONS = 100
+
+	def __init__(
+		self,
+		httpClient: HttpClient = DefaultHttpClient(),
+		maxWorkers: int = HttpClient.DEFAULT_POOL_MAX_SIZE,
+		transport: str = 'threads',
+		maxConnections: int = DEFAULT_MAX_CONNECTIONS,
+	) -> None:
+		super(AsyncHttpClient, self).__init__()
+
+		if transport not in TRANSPORTS:
+			raise ValueError(f'Unknown transport {transport}')
+
+		self._httpClient = httpClient
+		self._maxWorkers = maxWorkers
+		self._transport = transport
+		# still used for blocking calls, e.g., resolving auth headers
+		self._executor = concurrent.futures.ThreadPoolExecutor(
+			max_workers=maxWorkers,
+			thread_name_prefix=self.__class__.__name__,
+		)
+
+		self._httpx = None
+		self._asyncSession = None
+		if transport == 'httpx':
+			try:
+				import httpx
+			except ImportError:
+				raise RuntimeError(
+					'httpx is required for the httpx transport;'
+					' install GitHubApiHelper[async]'
+				)
+			self._httpx = httpx
+			self._asyncSession = httpx.AsyncClient(
+				limits=httpx.Limits(
+					max_connections=maxConnections,
+					max_keepalive_connections=maxConnections,
+				),
+				# the same defaults as `requests`
+				timeout=None,
+				follow_redirects=True,
+			)
+
+	def GetHttpClient(self) -> HttpClient:
+		return self._httpClient
+
+	def GetMaxWorkers(self) -> int:
+		return self._maxWorkers
+
+	def IsNative(self) -> bool:
+		return self._asyncSession is not None
+
+	async def RunSync(self, func: Callable[..., _T], *args, **kwargs) -> _T:
+		loop = asyncio.get_running_loop()
+		return await loop.run_in_executor(
+			self._executor,
+			functools.partial(func, *args, **kwargs),
+		)
+
+	async def _SendNative(self, method: str, url: str, kwargs: dict) -> requests.Response:
+		unknown = [ k for k in kwargs.keys() if k not in _HTTPX_KWARGS ]
+		if len(unknown) > 0:
+			raise ValueError(f'Not supported by the httpx transport: {unknown}')
+
+		httpxKwargs = {
+			'headers': kwargs.get('headers', None),
+			'params': kwargs.get('params', None),
+			'json': kwargs.get('json', None),
+		}
+		data = _ReadBody(kwargs.get('data', None))
+		if isinstance(data, (bytes, str)):
+			httpxKwargs['content'] = data
+		elif data is not None:
+			httpxKwargs['data'] = data
+		if kwargs.get('timeout', None) is not None:
+			httpxKwargs['timeout'] = _ToHttpxTimeout(self._httpx, kwargs['timeout'])
+		if 'allow_redirects' in kwargs:
+			httpxKwargs['follow_redirects'] = kwargs['allow_redirects']
+
+		httpxResp = await self._asyncSession.request(method, url, **httpxKwargs)
+
+		# callers, e.g., `CheckResp`, expect a `requests` response
+		resp = requests.Response()
+		resp.status_code = httpxResp.status_code
+		resp.reason = httpxResp.reason_phrase
+		resp.headers = requests.structures.CaseInsensitiveDict(httpxResp.headers)
+		resp._content = httpxResp.content
+		resp.url = str(httpxResp.url)
+		resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+		resp.request = requests.Request(method=method, url=resp.url).prepare()
+		return resp
+
+	async def Request(
+		self,
+		method: str,
+		url: str,
+		idempotent: Union[bool, None] = None,
+		**kwargs,
+	) -> requests.Response:
+		if self.IsNative():
+			return await self._SendNative(method, url, kwargs)
+		return await self.RunSync(
+			self._httpClient.Request, method, url, idempotent=idempotent, **kwargs
+		)
+
+	async def Get(self, url: str, **kwargs) -> requests.Response:
+		return await self.Request('GET', url, **kwargs)
+
+	async def Post(self, url: str, **kwargs) -> requests.Response:
+		return await self.Request('POST', url, **kwargs)
+
+	async def Put(self, url: str, **kwargs) -> requests.Response:
+		return await self.Request('PUT', url, **kwargs)
+
+	async def Patch(self, url: str, **kwargs) -> requests.Response:
+		return await self.Request('PATCH', url, **kwargs)
+
+	async def Delete(self, url: str, **kwargs) -> requests.Response:
+		return await self.Request('DELETE', url, **kwargs)
+
+	async def CloseAsync(self) -> None:
+		if self._asyncSession is not None:
+			await self._asyncSession.aclose()
+		self._executor.shutdown(wait=True)
+
+	def Close(self) -> None:
+		# the httpx transport must be closed on its loop, by `CloseAsync`
+		self._executor.shutdown(wait=True)
+
+
+async def GatherBounded(
+	aws: Iterable[Awaitable[_T]],
+	limit: int,
+	returnExceptions: bool = False,
+) -> List[Any]:
+	'''
+	Like `asyncio.gather`, but with at most `limit` of `aws` awaited at a
+	time; results are in the order of `aws`.
+	'''
+	semaphore = asyncio.Semaphore(limit)
+
+	async def _Bounded(aw: Awaitable[_T]) -> _T:
+		async with semaphore:
+			return await aw
+
+	return await asyncio.gather(
+		*[ _Bounded(aw) for aw in aws ],
+		return_exceptions=returnExceptions,
+	)
+
+
+_DEFAULT_ASYNC_CLIENT = None
+_DEFAULT_ASYNC_CLIENT_LOCK = threading.Lock()
+
+
+def DefaultAsyncHttpClient() -> AsyncHttpClient:
+	'''
+	Returns the process-wide async client, on top of `DefaultHttpClient()`
+	with the "threads" transport; it is created on first use, so its
+	threads only exist when needed.
+	'''
+	global _DEFAULT_ASYNC_CLIENT
+	with _DEFAULT_ASYNC_CLIENT_LOCK:
+		if _DEFAULT_ASYNC_CLIENT is None:
+			_DEFAULT_ASYNC_CLIENT = AsyncHttpClient()
+		return _DEFAULT_ASYNC_CLIENT
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import contextlib
+import contextvars
+import threading
+import requests
+import requests.adapters
+
+from typing import Callable, Iterator, Union
+
+from .Coalesce import RequestCoalescer
+from .RateLimit import RateLimiter
+from .RespCache import RespCache
+from .Retry import RetryPolicy
+
+
+_RequestHook = Callable[[str, str, Union[bool, None], dict], requests.Response]
+
+# set while requests of the current context are handed to another transport
+_REQUEST_HOOK: 'contextvars.ContextVar[Union[_RequestHook, None]]' = \
+	contextvars.ContextVar('_REQUEST_HOOK', default=None)
+
+
+@contextlib.contextmanager
+def InterceptRequests(hook: _RequestHook) -> Iterator[None]:
+	'''
+	Passes every request made through any `HttpClient` in the current
+	context (thread or asyncio task) to `hook(method, url, idempotent,
+	kwargs)` instead of sending it.
+	'''
+	token = _REQUEST_HOOK.set(hook)
+	try:
+		yield
+	finally:
+		_REQUEST_HOOK.reset(token)
+
+
+class HttpClient(object):
+	'''
+	A thin wrapper around a pooled `requests.Session`, so that all API runners
+	and auth classes sharing one instance reuse the same TCP/TLS connections.
+	'''
+
+	DEFAULT_POOL_CONNECTIONS = 10
+	DEFAULT_POOL_MAX_SIZE = 10
+
+	def __init__(
+		self,
+		poolConnections: int = DEFAULT_POOL_CONNECTIONS,
+		poolMaxSize: int = DEFAULT_POOL_MAX_SIZE,
+		poolBlock: bool = False,
+		keepAlive: bool = True,
+		respCache: Union[RespCache, None] = None,
+		rateLimiter: Union[RateLimiter, None] = None,
+		retryPolicy: Union[RetryPolicy, None] = None,
+		coalescer: Union[RequestCoalescer, None] = None,
+	) -> None:
+		super(HttpClient, self).__init__()
+
+		self._lock = threading.Lock()
+		self._session = requests.Session()
+		self._respCache = respCache
+		self._rateLimiter = rateLimiter
+		self._retryPolicy = retryPolicy
+		self._coalescer = coalescer
+		self.Configure(
+			poolConnections=poolConnections,
+			poolMaxSize=poolMaxSize,
+			poolBlock=poolBlock,
+			keepAlive=keepAlive,
+		)
+
+	def Configure(
+		self,
+		poolConnections: int = DEFAULT_POOL_CONNECTIONS,
+		poolMaxSize: int = DEFAULT_POOL_MAX_SIZE,
+		poolBlock: bool = False,
+		keepAlive: bool = True,
+	) -> None:
+		# poolConnections - number of per-host pools to keep around
+		# poolMaxSize     - max number of connections kept alive per host
+		# poolBlock       - block instead of opening extra connections
+		#                   when a host's pool is exhausted
+		with self._lock:
+			for prefix in ('https://', 'http://'):
+				adapter = requests.adapters.HTTPAdapter(
+					pool_connections=poolConnections,
+					pool_maxsize=poolMaxSize,
+					pool_block=poolBlock,
+				)
+				oldAdapter = self._session.adapters.get(prefix, None)
+				self._session.mount(prefix, adapter)
+				if oldAdapter is not None:
+					oldAdapter.close()
+
+			if keepAlive:
+				self._session.headers['Connection'] = 'keep-alive'
+			else:
+				self._session.headers['Connection'] = 'close'
+
+			self._poolConnections = poolConnections
+			self._poolMaxSize = poolMaxSize
+			self._poolBlock = poolBlock
+			self._keepAlive = keepAlive
+
+	def GetSession(self) -> requests.Session:
+		return self._session
+
+	def SetRespCache(self, respCache: Union[RespCache, None]) -> None:
+		self._respCache = respCache
+
+	def GetRespCache(self) -> Union[RespCache, None]:
+		return self._respCache
+
+	def SetRateLimiter(self, rateLimiter: Union[RateLimiter, None]) -> None:
+		self._rateLimiter = rateLimiter
+
+	def GetRateLimiter(self) -> Union[RateLimiter, None]:
+		return self._rateLimiter
+
+	def SetRetryPolicy(self, retryPolicy: Union[RetryPolicy, None]) -> None:
+		self._retryPolicy = retryPolicy
+
+	def GetRetryPolicy(self) -> Union[RetryPolicy, None]:
+		return self._retryPolicy
+
+	def SetCoalescer(self, coalescer: Union[RequestCoalescer, None]) -> None:
+		self._coalescer = coalescer
+
+	def GetCoalescer(self) -> Union[RequestCoalescer, None]:
+		return self._coalescer
+
+	def _SendOnce(self, method: str, url: str, **kwargs) -> requests.Response:
+		rateLimiter = self._rateLimiter
+		if rateLimiter is not None:
+			return rateLimiter.Send(
+				lambda **kw: self._session.request(method=method, **kw),
+				url,
+				kwargs,
+			)
+		return self._session.request(method=method, url=url, **kwargs)
+
+	def _Send(
+		self,
+		method: str,
+		url: str,
+		idempotent: Union[bool, None] = None,
+		**kwargs,
+	) -> requests.Response:
+		retryPolicy = self._retryPolicy
+		if retryPolicy is not None:
+			return retryPolicy.Send(
+				lambda **kw: self._SendOnce(method, **kw),
+				method,
+				url,
+				kwargs,
+				idempotent=idempotent,
+			)
+		return self._SendOnce(method, url, **kwargs)
+
+	def Request(
+		self,
+		method: str,
+		url: str,
+		idempotent: Union[bool, None] = None,
+		**kwargs,
+	) -> requests.Response:
+		'''
+		`idempotent` marks a request as safe (True) or unsafe (False) to send
+		again after a transient failure; by default, only GET, HEAD, OPTIONS
+		and DELETE requests are.
+		'''
+		hook = _REQUEST_HOOK.get()
+		if hook is not None:
+			return hook(method, url, idempotent, kwargs)
+
+		coalescer = self._coalescer
+		if (coalescer is not None) and coalescer.IsCoalescable(method, kwargs):
+			return coalescer.Do(
+				coalescer.MakeKey(method, url, kwargs),
+				lambda: self._SendCached(method, url, idempotent, kwargs),
+			)
+		return self._SendCached(method, url, idempotent, kwargs)
+
+	def _SendCached(
+		self,
+		method: str,
+		url: str,
+		idempotent: Union[bool, None],
+		kwargs: dict,
+	) -> requests.Response:
+		respCache = self._respCache
+		if (respCache is not None) and respCache.IsCacheable(method, kwargs):
+			return respCache.Fetch(
+				lambda **kw: self._Send(method, idempotent=idempotent, **kw),
+				url,
+				kwargs,
+			)
+		return self._Send(method, url, idempotent=idempotent, **kwargs)
+
+	def Get(self, url: str, **kwargs) -> requests.Response:
+		return self.Request('GET', url, **kwargs)
+
+	def Post(self, url: str, **kwargs) -> requests.Response:
+		return self.Request('POST', url, **kwargs)
+
+	def Put(self, url: str, **kwargs) -> requests.Response:
+		return self.Request('PUT', url, **kwargs)
+
+	def Patch(self, url: str, **kwargs) -> requests.Response:
+		return self.Request('PATCH', url, **kwargs)
+
+	def Delete(self, url: str, **kwargs) -> requests.Response:
+		return self.Request('DELETE', url, **kwargs)
+
+	def Close(self) -> None:
+		self._session.close()
+
+
+_DEFAULT_CLIENT = HttpClient()
+
+
+def DefaultHttpClient() -> HttpClient:
+	'''
+	Returns the process-wide client shared by every runner and auth class
+	that is not given an explicit client.
+	'''
+	return _DEFAULT_CLIENT
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import copy
+import hashlib
+import json
+import threading
+import requests
+
+from requests.models import RequestEncodingMixin
+from typing import Callable, Dict, Union
+
+
+def EncodeParams(params: object) -> str:
+	'''
+	Encodes query params the way `requests` does, whether they are a dict,
+	a list of pairs, or an already encoded string.
+	'''
+	params = RequestEncodingMixin._encode_params(params or {})
+	if isinstance(params, bytes):
+		params = params.decode('utf-8')
+	return str(params)
+
+
+class _InFlight(object):
+
+	def __init__(self) -> None:
+		super(_InFlight, self).__init__()
+
+		self.done = threading.Event()
+		self.resp: Union[requests.Response, None] = None
+		self.error: Union[BaseException, None] = None
+
+
+class RequestCoalescer(object):
+	'''
+	Lets concurrent identical GET requests share one network call: the
+	first caller sends the request, and callers asking for the same
+	method, URL, params and headers (including the auth identity) while
+	it is in flight wait for it.
+	Only the response body is shared, read once by the first caller; each
+	waiting caller gets its own `Response` copy, with its own headers, and
+	parses the body itself, or raises its own copy of the error.
+	'''
+
+	def __init__(self) -> None:
+		super(RequestCoalescer, self).__init__()
+
+		self._lock = threading.Lock()
+		self._inFlight: Dict[str, _InFlight] = {}
+		self._sent = 0
+		self._coalesced = 0
+
+	@staticmethod
+	def IsCoalescable(method: str, kwargs: dict) -> bool:
+		# a streamed body can only be read once
+		return (method.upper() == 'GET') and (not kwargs.get('stream', False)) \
+			and (kwargs.get('data', None) is None)
+
+	@staticmethod
+	def MakeKey(method: str, url: str, kwargs: dict) -> str:
+		headers = {
+			k.lower(): v for k, v in (kwargs.get('headers', None) or {}).items()
+		}
+		if 'authorization' in headers:
+			# never keep credentials in the key, only a digest of them
+			headers['authorization'] = hashlib.sha256(
+				headers['authorization'].encode('utf-8')
+			).hexdigest()
+		keySrc = json.dumps([
+			method.upper(),
+			url,
+			EncodeParams(kwargs.get('params', None)),
+			sorted(headers.items()),
+			repr(kwargs.get('timeout', None)),
+		])
+		return hashlib.sha256(keySrc.encode('utf-8')).hexdigest()
+
+	@staticmethod
+	def _CopyResp(resp: requests.Response) -> requests.Response:
+		# each caller gets its own headers, so changes do not leak across
+		respCopy = copy.copy(resp)
+		respCopy.headers = copy.copy(resp.headers)
+		return respCopy
+
+	@staticmethod
+	def _CopyError(error: BaseException) -> BaseException:
+		# each caller raises its own exception object, so the traceback of
+		# one caller is not appended to the one of another
+		try:
+			errorCopy = copy.copy(error)
+		except Exception:
+			errorCopy = None
+		if type(errorCopy) is not type(error):
+			errorCopy = RuntimeError(f'Coalesced request failed: {error!r}')
+		return errorCopy
+
+	def Do(
+		self,
+		key: str,
+		send: Callable[[], requests.Response],
+	) -> requests.Response:
+		with self._lock:
+			call = self._inFlight.get(key, None)
+			isLeader = call is None
+			if isLeader:
+				call = _InFlight()
+				self._inFlight[key] = call
+				self._sent += 1
+			else:
+				self._coalesced += 1
+
+		if not isLeader:
+			call.done.wait()
+			if call.error is not None:
+				raise self._CopyError(call.error) from call.error
+			return self._CopyResp(call.resp)
+
+		try:
+			resp = send()
+			# read the whole body before it is shared
+			resp.content
+			call.resp = resp
+			return resp
+		except BaseException as e:
+			call.error = e
+			raise
+		finally:
+			with self._lock:
+				del self._inFlight[key]
+			call.done.set()
+
+	def GetStats(self) -> Dict[str, int]:
+		with self._lock:
+			return {
+				'sent': self._sent,
+				'coalesced': self._coalesced,
+			}
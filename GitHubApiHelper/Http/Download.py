@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import argparse
+import concurrent.futures
+import hashlib
+import logging
+import os
+import uuid
+import requests
+
+from typing import Callable, List, Tuple, Union
+
+from ..Utils import CheckResp
+from .Client import HttpClient
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+# do not bother splitting into segments smaller than this
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+
+
+class RangeNotSupportedError(RuntimeError):
+	pass
+
+
+def _GenTmpPath(savePath: os.PathLike) -> str:
+	dirPath, fileName = os.path.split(os.path.abspath(savePath))
+	return os.path.join(dirPath, f'.{fileName}.{uuid.uuid4().hex}.tmp')
+
+
+def _OpenNewFile(path: os.PathLike) -> int:
+	# unlike tempfile.mkstemp, this honours the umask like a plain open()
+	return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+
+
+def CheckHash(
+	fileHash: str,
+	expectedSha256: Union[str, None],
+	savePath: os.PathLike,
+) -> None:
+	if (expectedSha256 is not None) and (fileHash != expectedSha256.lower()):
+		raise ValueError(
+			f'SHA-256 mismatch for {savePath}:'
+			f' expected {expectedSha256}, got {fileHash}'
+		)
+
+
+def StreamToFile(
+	resp: requests.Response,
+	savePath: os.PathLike,
+	chunkSize: int = DEFAULT_CHUNK_SIZE,
+	expectedSha256: Union[str, None] = None,
+) -> Tuple[str, int]:
+	'''
+	Writes the body of a `stream=True` response to `savePath` chunk by chunk,
+	hashing it on the way, so memory use does not depend on the body size.
+	The data is written to a temporary file next to `savePath`, which is
+	atomically renamed into place once complete.
+	Returns the SHA-256 hex digest and the number of bytes written.
+	'''
+	logger = logging.getLogger(__name__ + '.' + StreamToFile.__name__)
+
+	hasher = hashlib.sha256()
+	size = 0
+
+	tmpPath = _GenTmpPath(savePath)
+	try:
+		with os.fdopen(_OpenNewFile(tmpPath), 'wb') as f:
+			for chunk in resp.iter_content(chunk_size=chunkSize):
+				if not chunk:
+					continue
+				hasher.update(chunk)
+				f.write(chunk)
+				size += len(chunk)
+		fileHash = hasher.hexdigest()
+		CheckHash(fileHash, expectedSha256, savePath)
+		os.replace(tmpPath, savePath)
+	except BaseException:
+		if os.path.exists(tmpPath):
+			os.remove(tmpPath)
+		raise
+	finally:
+		resp.close()
+
+	logger.debug(f'Streamed {size} bytes to {savePath}')
+
+	return fileHash, size
+
+
+def HashFilePrefix(
+	hasher: 'hashlib._Hash',
+	path: os.PathLike,
+	length: Union[int, None] = None,
+	chunkSize: int = DEFAULT_CHUNK_SIZE,
+) -> 'hashlib._Hash':
+	remaining = length
+	with open(path, 'rb') as f:
+		while (remaining is None) or (remaining > 0):
+			readSize = chunkSize if remaining is None else min(chunkSize, remaining)
+			chunk = f.read(readSize)
+			if not chunk:
+				break
+			hasher.update(chunk)
+			if remaining is not None:
+				remaining -= len(chunk)
+	return hasher
+
+
+def HashFile(path: os.PathLike, chunkSize: int = DEFAULT_CHUNK_SIZE) -> str:
+	return HashFilePrefix(hashlib.sha256(), path, None, chunkSize).hexdigest()
+
+
+def GetRangeSize(resp: requests.Response) -> Union[int, None]:
+	'''
+	Returns the body size if the server (after any redirect) accepts byte
+	range requests for this resource, otherwise None.
+	'''
+	if resp.headers.get('Accept-Ranges', 'none').lower() != 'bytes':
+		return None
+	if 'Content-Encoding' in resp.headers:
+		# Content-Length is not the size of the decoded body
+		return None
+	try:
+		return int(resp.headers['Content-Length'])
+	except (KeyError, ValueError):
+		return None
+
+
+def GetReplayHeaders(resp: requests.Response) -> dict:
+	'''
+	Headers needed to request the final URL of `resp` again.
+	A redirect target (e.g., the release CDN) is pre-signed, and must not
+	receive our credentials; otherwise the original headers are kept.
+	'''
+	if len(resp.history) > 0:
+		return {}
+	return {
+		k: v for k, v in resp.request.headers.items()
+		if k in ('Accept', 'Authorization')
+	}
+
+
+def SplitRanges(size: int, numSegments: int) -> List[Tuple[int, int]]:
+	numSegments = max(1, min(numSegments, size // MIN_SEGMENT_SIZE))
+	segSize = -(-size // numSegments)
+	return [
+		(start, min(start + segSize, size) - 1)
+		for start in range(0, size, segSize)
+	]
+
+
+_ChunkCallback = Callable[[int, bytes], None]
+
+
+def WriteStreamAt(
+	resp: requests.Response,
+	path: os.PathLike,
+	start: int,
+	chunkSize: int,
+	onChunk: Union[_ChunkCallback, None] = None,
+) -> int:
+	'''
+	Writes the body of `resp` into the existing file `path` from offset
+	`start` on. Writes are unbuffered, so once `onChunk(offset, chunk)` is
+	called the chunk has reached the OS even if this process is killed.
+	Returns the number of bytes written.
+	'''
+	written = 0
+	with open(path, 'r+b', buffering=0) as f:
+		f.seek(start)
+		for chunk in resp.iter_content(chunk_size=chunkSize):
+			if not chunk:
+				continue
+			view = memoryview(chunk)
+			while len(view) > 0:
+				view = view[f.write(view):]
+			if onChunk is not None:
+				onChunk(start + written, chunk)
+			written += len(chunk)
+	return written
+
+
+def FetchRange(
+	httpClient: HttpClient,
+	url: str,
+	headers: dict,
+	path: os.PathLike,
+	byteRange: Tuple[int, int],
+	chunkSize: int,
+	onChunk: Union[_ChunkCallback, None] = None,
+) -> int:
+	start, end = byteRange
+	rangeHeaders = dict(headers)
+	rangeHeaders['Range'] = f'bytes={start}-{end}'
+
+	resp = httpClient.Get(url=url, headers=rangeHeaders, stream=True)
+	with resp:
+		CheckResp.CheckRespErr(resp)
+		if resp.status_code != 206:
+			raise RangeNotSupportedError(
+				f'Expected 206 for range {start}-{end}, got {resp.status_code}'
+			)
+
+		written = WriteStreamAt(resp, path, start, chunkSize, onChunk)
+
+	if written != (end - start + 1):
+		raise RuntimeError(
+			f'Range {start}-{end} is incomplete ({written} bytes received)'
+		)
+	return written
+
+
+def SegmentedToFile(
+	httpClient: HttpClient,
+	url: str,
+	size: int,
+	savePath: os.PathLike,
+	numSegments: int,
+	headers: Union[dict, None] = None,
+	chunkSize: int = DEFAULT_CHUNK_SIZE,
+	expectedSha256: Union[str, None] = None,
+) -> Tuple[str, int]:
+	'''
+	Downloads `url` as `numSegments` concurrent byte ranges into a
+	preallocated temporary file, which is atomically renamed into
+	`savePath` once every range is complete.
+	Returns the SHA-256 hex digest and the size of the file.
+	'''
+	logger = logging.getLogger(__name__ + '.' + SegmentedToFile.__name__)
+
+	ranges = SplitRanges(size, numSegments)
+	logger.debug(f'Downloading {size} bytes in {len(ranges)} segments')
+
+	tmpPath = _GenTmpPath(savePath)
+	try:
+		with os.fdopen(_OpenNewFile(tmpPath), 'wb') as f:
+			f.truncate(size)
+
+		with concurrent.futures.ThreadPoolExecutor(
+			max_workers=len(ranges)
+		) as executor:
+			futures = [
+				executor.submit(
+					FetchRange,
+					httpClient, url, headers or {}, tmpPath, byteRange, chunkSize,
+				)
+				for byteRange in ranges
+			]
+			for future in futures:
+				future.result()
+
+		fileHash = HashFile(tmpPath, chunkSize)
+		CheckHash(fileHash, expectedSha256, savePath)
+		os.replace(tmpPath, savePath)
+	except BaseException:
+		if os.path.exists(tmpPath):
+			os.remove(tmpPath)
+		raise
+
+	return fileHash, size
+
+
+def DownloadToFile(
+	httpClient: HttpClient,
+	resp: requests.Response,
+	savePath: os.PathLike,
+	numSegments: int = 1,
+	expectedSha256: Union[str, None] = None,
+	chunkSize: int = DEFAULT_CHUNK_SIZE,
+) -> Tuple[str, int]:
+	'''
+	Saves the body of a `stream=True` response to `savePath`.
+	With `numSegments` > 1 and a server that supports byte ranges, the body
+	is fetched as concurrent ranges from the final (post-redirect) URL;
+	otherwise it falls back to a single stream.
+	If `expectedSha256` is given, a mismatching download raises ValueError
+	and leaves `savePath` untouched.
+	Returns the SHA-256 hex digest and the size of the file.
+	'''
+	logger = logging.getLogger(__name__ + '.' + DownloadToFile.__name__)
+
+	size = GetRangeSize(resp) if numSegments > 1 else None
+	if (size is None) or (len(SplitRanges(size, numSegments)) <= 1):
+		return StreamToFile(resp, savePath, chunkSize, expectedSha256)
+
+	finalUrl = resp.url
+	headers = GetReplayHeaders(resp)
+	resp.close()
+	try:
+		return SegmentedToFile(
+			httpClient=httpClient,
+			url=finalUrl,
+			size=size,
+			savePath=savePath,
+			numSegments=numSegments,
+			headers=headers,
+			chunkSize=chunkSize,
+			expectedSha256=expectedSha256,
+		)
+	except RangeNotSupportedError as e:
+		logger.info(f'{e}; falling back to a single stream')
+		resp = httpClient.Get(url=finalUrl, headers=headers, stream=True)
+		CheckResp.CheckRespErr(resp)
+		return StreamToFile(resp, savePath, chunkSize, expectedSha256)
+
+
+def AddDownloadArgs(argParser: argparse.ArgumentParser) -> None:
+	argParser.add_argument(
+		'--segments', type=int, default=1,
+		help='Download large files as this many concurrent byte ranges,'
+			' if the server supports it (default: 1)',
+	)
+	argParser.add_argument(
+		'--resume', action='store_true',
+		help='Keep interrupted downloads in <save-path>.part'
+			' and continue them on the next run',
+	)
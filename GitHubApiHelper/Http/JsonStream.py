@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import base64
+import json
+import os
+
+from typing import Iterator, Union
+
+
+# a multiple of 3, so each chunk encodes to base64 without padding
+DEFAULT_CHUNK_SIZE = 768 * 1024
+
+
+class Base64JsonBody(object):
+	'''
+	A request body holding a JSON object whose field `key` is the base64
+	encoding of a file.
+	It is produced on the fly, one chunk of the file at a time, and its
+	length is known upfront, so `requests` sends it with a Content-Length
+	without holding the file (or its encoding) in memory.
+	'''
+
+	def __init__(
+		self,
+		fields: dict,
+		key: str,
+		filePath: os.PathLike,
+		chunkSize: int = DEFAULT_CHUNK_SIZE,
+	) -> None:
+		super(Base64JsonBody, self).__init__()
+
+		fields = { k: v for k, v in fields.items() if k != key }
+		fields[key] = ''
+		# ends with `"<key>": ""}`; the encoded file goes between the quotes
+		encoded = json.dumps(fields).encode('ascii')
+		self._prefix = encoded[:-2]
+		self._suffix = encoded[-2:]
+
+		self._filePath = filePath
+		self._fileSize = os.path.getsize(filePath)
+		self._chunkSize = max(3, chunkSize - (chunkSize % 3))
+
+		self._file = None
+		self._fileRead = 0
+		self._stage = 0
+		self._buf = b''
+		self._pos = 0
+
+	def __len__(self) -> int:
+		return len(self._prefix) + \
+			(4 * ((self._fileSize + 2) // 3)) + \
+			len(self._suffix)
+
+	def _Fill(self) -> bool:
+		if self._stage == 0:
+			self._buf = self._prefix
+			self._file = open(self._filePath, 'rb')
+			self._stage = 1
+		elif self._stage == 1:
+			chunk = self._file.read(self._chunkSize)
+			if chunk:
+				self._fileRead += len(chunk)
+				self._buf = base64.b64encode(chunk)
+			else:
+				self.close()
+				if self._fileRead != self._fileSize:
+					raise RuntimeError(
+						f'{self._filePath} changed size while being uploaded'
+					)
+				self._buf = self._suffix
+				self._stage = 2
+		else:
+			return False
+		self._pos = 0
+		return True
+
+	def read(self, size: Union[int, None] = -1) -> bytes:
+		if (size is None) or (size < 0):
+			size = len(self)
+
+		if (self._pos < len(self._buf)) and \
+			(len(self._buf) - self._pos >= size):
+			# served from the current chunk, without an extra copy
+			out = self._buf[self._pos:self._pos + size]
+			self._pos += size
+			return out
+
+		out = bytearray()
+		while len(out) < size:
+			if self._pos >= len(self._buf):
+				if not self._Fill():
+					break
+				continue
+			n = min(size - len(out), len(self._buf) - self._pos)
+			out += self._buf[self._pos:self._pos + n]
+			self._pos += n
+		return bytes(out)
+
+	def __iter__(self) -> Iterator[bytes]:
+		while True:
+			chunk = self.read(self._chunkSize)
+			if not chunk:
+				return
+			yield chunk
+
+	def seekable(self) -> bool:
+		return True
+
+	def seek(self, offset: int, whence: int = 0) -> int:
+		# only rewinding is supported, so the body can be sent again
+		if (offset != 0) or (whence != 0):
+			raise ValueError('Base64JsonBody can only be rewound to the start')
+		self.close()
+		self._fileRead = 0
+		self._stage = 0
+		self._buf = b''
+		self._pos = 0
+		return 0
+
+	def close(self) -> None:
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+
+	def __enter__(self) -> 'Base64JsonBody':
+		return self
+
+	def __exit__(self, excType, excVal, excTb) -> None:
+		self.close()
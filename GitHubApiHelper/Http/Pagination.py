@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import collections
+import concurrent.futures
+import logging
+import requests
+import urllib.parse
+
+from typing import Iterator, List, Union
+
+from ..Utils import CheckResp
+from .Client import HttpClient
+
+
+DEFAULT_PER_PAGE = 100
+
+
+def _SetPageNum(url: str, pageNum: int) -> str:
+	parsed = urllib.parse.urlparse(url)
+	query = urllib.parse.parse_qs(parsed.query, keep_blank_values=True)
+	query['page'] = [str(pageNum)]
+	return urllib.parse.urlunparse(
+		parsed._replace(query=urllib.parse.urlencode(query, doseq=True))
+	)
+
+
+def GetLastPageNum(resp: requests.Response) -> Union[int, None]:
+	if 'last' not in resp.links:
+		return None
+	lastUrl = resp.links['last']['url']
+	query = urllib.parse.parse_qs(urllib.parse.urlparse(lastUrl).query)
+	try:
+		return int(query['page'][0])
+	except (KeyError, IndexError, ValueError):
+		return None
+
+
+def _GetPage(
+	httpClient: HttpClient,
+	url: str,
+	headers: dict,
+	params: Union[dict, None] = None,
+) -> requests.Response:
+	resp = httpClient.Get(url=url, headers=headers, params=params)
+	CheckResp.CheckRespErr(resp)
+	return resp
+
+
+def _IterPrefetched(
+	httpClient: HttpClient,
+	pageUrls: List[str],
+	headers: dict,
+	prefetch: int,
+) -> Iterator[requests.Response]:
+	# keep at most `prefetch` pages in flight and hand them out in order
+	executor = concurrent.futures.ThreadPoolExecutor(max_workers=prefetch)
+	inFlight = collections.deque()
+	urlIter = iter(pageUrls)
+	try:
+		for url in urlIter:
+			inFlight.append(executor.submit(_GetPage, httpClient, url, headers))
+			if len(inFlight) >= prefetch:
+				break
+		while len(inFlight) > 0:
+			resp = inFlight.popleft().result()
+			nextUrl = next(urlIter, None)
+			if nextUrl is not None:
+				inFlight.append(
+					executor.submit(_GetPage, httpClient, nextUrl, headers)
+				)
+			yield resp
+	finally:
+		for future in inFlight:
+			future.cancel()
+		executor.shutdown(wait=False)
+
+
+def IterPages(
+	httpClient: HttpClient,
+	url: str,
+	headers: dict,
+	params: Union[dict, None] = None,
+	perPage: int = DEFAULT_PER_PAGE,
+	prefetch: int = 0,
+) -> Iterator[requests.Response]:
+	'''
+	Yields every page of a list endpoint by following `Link: rel="next"`.
+	If `prefetch` is positive and the first page tells us the number of the
+	last page, up to `prefetch` of the following pages are fetched
+	concurrently.
+	'''
+	logger = logging.getLogger(__name__ + '.' + IterPages.__name__)
+
+	params = dict(params or {})
+	params['per_page'] = perPage
+
+	resp = _GetPage(httpClient, url, headers, params)
+	yield resp
+
+	if 'next' not in resp.links:
+		return
+
+	lastPageNum = GetLastPageNum(resp)
+	if prefetch > 0 and lastPageNum is not None:
+		nextUrl = resp.links['next']['url']
+		logger.debug(f'Prefetching pages 2-{lastPageNum} of {url}')
+		pageUrls = [
+			_SetPageNum(nextUrl, pageNum)
+			for pageNum in range(2, lastPageNum + 1)
+		]
+		yield from _IterPrefetched(httpClient, pageUrls, headers, prefetch)
+		return
+
+	while 'next' in resp.links:
+		resp = _GetPage(httpClient, resp.links['next']['url'], headers)
+		yield resp
+
+
+def IterItems(
+	httpClient: HttpClient,
+	url: str,
+	headers: dict,
+	params: Union[dict, None] = None,
+	perPage: int = DEFAULT_PER_PAGE,
+	prefetch: int = 0,
+	itemsKey: Union[str, None] = None,
+) -> Iterator[dict]:
+	'''
+	Lazily yields the items of every page.
+	`itemsKey` selects the list for endpoints that wrap it in an object,
+	e.g. `{"total_count": N, "workflow_runs": [...]}`.
+	'''
+	for resp in IterPages(
+		httpClient=httpClient,
+		url=url,
+		headers=headers,
+		params=params,
+		perPage=perPage,
+		prefetch=prefetch,
+	):
+		items = resp.json()
+		if itemsKey is not None:
+			items = items[itemsKey]
+		yield from items
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import hashlib
+import logging
+import threading
+import time
+import requests
+
+from typing import Callable, Dict, Tuple, Union
+
+from .Retry import RewindBody
+
+
+# https://docs.github.com/en/rest/using-the-rest-api/rate-limits-for-the-rest-api
+
+_BucketKey = Tuple[str, str]
+
+
+class RateLimitExceeded(RuntimeError):
+	'''
+	Raised instead of waiting longer than `maxWait` for a rate limit.
+	'''
+	pass
+
+
+class RateLimitBucket(object):
+
+	def __init__(self) -> None:
+		super(RateLimitBucket, self).__init__()
+
+		self.limit: Union[int, None] = None
+		self.remaining: Union[int, None] = None
+		self.used: Union[int, None] = None
+		self.reset: Union[float, None] = None
+		# no request is sent before this time (after hitting a limit)
+		self.blockedUntil = 0.0
+		# earliest start time of the next request, when pacing
+		self.nextSlot = 0.0
+
+	def ToDict(self) -> dict:
+		return {
+			'limit': self.limit,
+			'remaining': self.remaining,
+			'used': self.used,
+			'reset': self.reset,
+			'blocked_until': self.blockedUntil or None,
+		}
+
+
+class RateLimiter(object):
+	'''
+	Tracks the rate limit budget of each (token, resource) bucket from the
+	`X-RateLimit-*` response headers.
+	Once less than `paceBelow` of a bucket's budget is left, requests are
+	spaced out so the rest lasts until the reset time. A request rejected
+	by a primary or secondary rate limit is held back until the limit is
+	lifted and then sent again.
+	No request waits longer than `maxWait` seconds, before sending or before
+	a retry; `RateLimitExceeded` is raised (or the rejected response is
+	returned) instead.
+	'''
+
+	DEFAULT_PACE_BELOW = 0.1
+	DEFAULT_MAX_WAIT = 15 * 60
+	DEFAULT_MAX_RETRIES = 3
+	# wait at least this long after a secondary rate limit without hints
+	SECONDARY_MIN_WAIT = 60
+	# log waits before sending longer than this at WARNING level
+	WARN_WAIT = 5
+
+	def __init__(
+		self,
+		paceBelow: float = DEFAULT_PACE_BELOW,
+		maxWait: float = DEFAULT_MAX_WAIT,
+		maxRetries: int = DEFAULT_MAX_RETRIES,
+		clock: Callable[[], float] = time.time,
+		sleep: Callable[[float], None] = time.sleep,
+	) -> None:
+		super(RateLimiter, self).__init__()
+
+		self._paceBelow = paceBelow
+		self._maxWait = maxWait
+		self._maxRetries = maxRetries
+		self._clock = clock
+		self._sleep = sleep
+
+		self._lock = threading.Lock()
+		self._buckets: Dict[_BucketKey, RateLimitBucket] = {}
+		self._waits = 0
+		self._limited = 0
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	@staticmethod
+	def GetTokenId(kwargs: dict) -> str:
+		headers = kwargs.get('headers', None) or {}
+		authVal = None
+		for k, v in headers.items():
+			if k.lower() == 'authorization':
+				authVal = v
+		if authVal is None:
+			return 'anonymous'
+		# never keep the credential itself
+		return hashlib.sha256(authVal.encode('utf-8')).hexdigest()[:16]
+
+	@staticmethod
+	def GuessResource(url: str) -> str:
+		path = url.split('://', maxsplit=1)[-1].split('?', maxsplit=1)[0]
+		path = '/' + path.split('/', maxsplit=1)[-1]
+		if path.startswith('/search/code'):
+			return 'code_search'
+		if path.startswith('/search/'):
+			return 'search'
+		if path.startswith('/graphql'):
+			return 'graphql'
+		return 'core'
+
+	def _GetBucket(self, key: _BucketKey) -> RateLimitBucket:
+		bucket = self._buckets.get(key, None)
+		if bucket is None:
+			bucket = RateLimitBucket()
+			self._buckets[key] = bucket
+		return bucket
+
+	def _ReserveSlot(self, key: _BucketKey) -> float:
+		# returns how long to wait before sending; a wait longer than
+		# `maxWait` is returned without reserving the slot
+		now = self._clock()
+		with self._lock:
+			bucket = self._GetBucket(key)
+			startTime = max(now, bucket.blockedUntil)
+
+			if (bucket.remaining is not None) and (bucket.reset is not None) and \
+				(bucket.reset > startTime):
+				if bucket.remaining <= 0:
+					startTime = bucket.reset
+				elif (bucket.limit is not None) and \
+					(bucket.remaining < bucket.limit * self._paceBelow):
+					spacing = (bucket.reset - startTime) / bucket.remaining
+					startTime = max(startTime, bucket.nextSlot)
+					if startTime - now <= self._maxWait:
+						bucket.nextSlot = startTime + spacing
+						# this request is on its way; count it in advance
+						bucket.remaining -= 1
+
+			return startTime - now
+
+	def _Update(self, tokenId: str, resp: requests.Response) -> _BucketKey:
+		resource = resp.headers.get('X-RateLimit-Resource', None)
+		if resource is None:
+			resource = self.GuessResource(resp.url or '')
+		key = (tokenId, resource)
+
+		try:
+			limit = int(resp.headers['X-RateLimit-Limit'])
+			remaining = int(resp.headers['X-RateLimit-Remaining'])
+			reset = float(resp.headers['X-RateLimit-Reset'])
+			used = int(resp.headers.get('X-RateLimit-Used', limit - remaining))
+		except (KeyError, ValueError):
+			return key
+
+		with self._lock:
+			bucket = self._GetBucket(key)
+			if (bucket.reset is None) or (reset > bucket.reset):
+				# a new window
+				bucket.remaining = remaining
+				bucket.nextSlot = 0.0
+			else:
+				# responses of the same window may arrive out of order
+				bucket.remaining = min(bucket.remaining, remaining)
+			bucket.limit = limit
+			bucket.reset = reset
+			bucket.used = used
+		return key
+
+	def _GetLimitedWait(self, resp: requests.Response, attempt: int) -> Union[float, None]:
+		'''
+		Returns how long to wait if `resp` was rejected by a rate limit,
+		otherwise None.
+		'''
+		if resp.status_code not in (403, 429):
+			return None
+
+		retryAfter = resp.headers.get('Retry-After', None)
+		if retryAfter is not None:
+			try:
+				return max(0.0, float(retryAfter))
+			except ValueError:
+				pass
+
+		if resp.headers.get('X-RateLimit-Remaining', None) == '0':
+			try:
+				reset = float(resp.headers['X-RateLimit-Reset'])
+				return max(0.0, reset - self._clock()) + 1.0
+			except (KeyError, ValueError):
+				pass
+
+		if resp.status_code == 429 or \
+			(b'secondary rate limit' in (resp.content or b'').lower()):
+			return self.SECONDARY_MIN_WAIT * (2 ** attempt)
+
+		# a 403 for another reason, e.g., missing permissions
+		return None
+
+	def Send(
+		self,
+		send: Callable[..., requests.Response],
+		url: str,
+		kwargs: dict,
+	) -> requests.Response:
+		tokenId = self.GetTokenId(kwargs)
+		key = (tokenId, self.GuessResource(url))
+
+		attempt = 0
+		while True:
+			wait = self._ReserveSlot(key)
+			if wait > self._maxWait:
+				raise RateLimitExceeded(
+					f'Rate limit of {key[1]} is exhausted for another {wait:.0f}s,'
+					f' longer than the max wait of {self._maxWait:.0f}s'
+				)
+			if wait > 0:
+				logLevel = logging.WARNING if wait > self.WARN_WAIT else logging.DEBUG
+				self._logger.log(
+					logLevel, f'Pacing {key[1]} requests; waiting {wait:.2f}s'
+				)
+				with self._lock:
+					self._waits += 1
+				self._sleep(wait)
+
+			resp = send(url=url, **kwargs)
+			key = self._Update(tokenId, resp)
+
+			limitedWait = self._GetLimitedWait(resp, attempt)
+			if limitedWait is None:
+				return resp
+
+			with self._lock:
+				self._limited += 1
+
+			if (attempt >= self._maxRetries) or (limitedWait > self._maxWait) or \
+				(not RewindBody(kwargs)):
+				self._logger.warning(
+					f'Rate limited on {key[1]}; giving up after {attempt} retries'
+				)
+				return resp
+
+			# hold back other requests of this bucket until the retry
+			with self._lock:
+				bucket = self._GetBucket(key)
+				bucket.blockedUntil = max(
+					bucket.blockedUntil, self._clock() + limitedWait
+				)
+
+			self._logger.warning(
+				f'Rate limited on {key[1]}; retrying in {limitedWait:.0f}s'
+			)
+			resp.close()
+			attempt += 1
+
+	def GetBudgets(self) -> Dict[str, dict]:
+		'''
+		Returns the last known budget of each bucket, keyed by
+		"<token id>/<resource>".
+		'''
+		with self._lock:
+			return {
+				f'{tokenId}/{resource}': bucket.ToDict()
+				for (tokenId, resource), bucket in self._buckets.items()
+			}
+
+	def GetStats(self) -> Dict[str, int]:
+		with self._lock:
+			return {
+				'paced': self._waits,
+				'limited': self._limited,
+			}
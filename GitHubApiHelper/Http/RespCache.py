@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import base64
+import collections
+import hashlib
+import json
+import logging
+import os
+import threading
+import requests
+import requests.structures
+
+from typing import Callable, Dict, Union
+
+from ..Utils import FileLock
+from .Coalesce import EncodeParams
+
+
+# headers describing the transfer rather than the cached representation
+_DROPPED_HEADERS = (
+	'content-encoding',
+	'content-length',
+	'transfer-encoding',
+)
+
+_CachedEntry = Dict[str, object]
+
+
+class DiskRespStore(object):
+	'''
+	Stores one JSON file per cache key under `dirPath`.
+	'''
+
+	def __init__(self, dirPath: os.PathLike) -> None:
+		super(DiskRespStore, self).__init__()
+
+		self._dirPath = os.path.abspath(dirPath)
+		os.makedirs(self._dirPath, mode=0o700, exist_ok=True)
+
+	def _GetPath(self, key: str) -> str:
+		return os.path.join(self._dirPath, key + '.json')
+
+	def Load(self, key: str) -> Union[_CachedEntry, None]:
+		try:
+			with open(self._GetPath(key), 'r') as f:
+				entry = json.load(f)
+		except (FileNotFoundError, ValueError):
+			return None
+		entry['body'] = base64.b64decode(entry['body'])
+		return entry
+
+	def Save(self, key: str, entry: _CachedEntry) -> None:
+		entry = dict(entry)
+		entry['body'] = base64.b64encode(entry['body']).decode('ascii')
+		FileLock.WritePrivateFile(
+			self._GetPath(key),
+			json.dumps(entry).encode('utf-8'),
+		)
+
+
+class RespCache(object):
+	'''
+	A conditional-request cache for GET requests.
+	Responses carrying an ETag or Last-Modified header are kept in an
+	in-memory LRU (and optionally a `DiskRespStore`); later requests for the
+	same resource send If-None-Match/If-Modified-Since, and a 304 reply is
+	answered with the cached body.
+	'''
+
+	DEFAULT_MAX_ENTRIES = 256
+
+	def __init__(
+		self,
+		maxEntries: int = DEFAULT_MAX_ENTRIES,
+		diskStore: Union[DiskRespStore, None] = None,
+	) -> None:
+		super(RespCache, self).__init__()
+
+		self._maxEntries = maxEntries
+		self._diskStore = diskStore
+		self._lock = threading.Lock()
+		self._entries: 'collections.OrderedDict[str, _CachedEntry]' = \
+			collections.OrderedDict()
+
+		self._hits = 0
+		self._misses = 0
+		self._stores = 0
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	@staticmethod
+	def IsCacheable(method: str, kwargs: dict) -> bool:
+		headers = requests.structures.CaseInsensitiveDict(
+			kwargs.get('headers', None) or {}
+		)
+		# a caller sending its own conditional headers handles 304 itself
+		return (method.upper() == 'GET') and (not kwargs.get('stream', False)) \
+			and ('If-None-Match' not in headers) \
+			and ('If-Modified-Since' not in headers)
+
+	@staticmethod
+	def MakeKey(url: str, kwargs: dict) -> str:
+		headers = requests.structures.CaseInsensitiveDict(
+			kwargs.get('headers', None) or {}
+		)
+		# never keep credentials in the key, only a digest of them
+		authDigest = hashlib.sha256(
+			headers.get('Authorization', '').encode('utf-8')
+		).hexdigest()
+		keySrc = json.dumps([
+			url,
+			EncodeParams(kwargs.get('params', None)),
+			headers.get('Accept', ''),
+			authDigest,
+		])
+		return hashlib.sha256(keySrc.encode('utf-8')).hexdigest()
+
+	def _Load(self, key: str) -> Union[_CachedEntry, None]:
+		with self._lock:
+			entry = self._entries.get(key, None)
+			if entry is not None:
+				self._entries.move_to_end(key)
+				return entry
+
+		if self._diskStore is not None:
+			entry = self._diskStore.Load(key)
+			if entry is not None:
+				self._PutMem(key, entry)
+		return entry
+
+	def _PutMem(self, key: str, entry: _CachedEntry) -> None:
+		with self._lock:
+			self._entries[key] = entry
+			self._entries.move_to_end(key)
+			while len(self._entries) > self._maxEntries:
+				self._entries.popitem(last=False)
+
+	def _Store(self, key: str, resp: requests.Response) -> None:
+		headers = {
+			k: v for k, v in resp.headers.items()
+			if k.lower() not in _DROPPED_HEADERS
+		}
+		entry = {
+			'status': resp.status_code,
+			'headers': headers,
+			'body': resp.content,
+		}
+		self._PutMem(key, entry)
+		if self._diskStore is not None:
+			self._diskStore.Save(key, entry)
+		with self._lock:
+			self._stores += 1
+
+	@staticmethod
+	def _Replay(entry: _CachedEntry, notModified: requests.Response) -> requests.Response:
+		resp = requests.Response()
+		resp.status_code = entry['status']
+		resp.reason = 'OK'
+		resp.headers = requests.structures.CaseInsensitiveDict(entry['headers'])
+		# keep the fresh per-request headers (rate limit, date, ...)
+		for k, v in notModified.headers.items():
+			if k.lower() not in _DROPPED_HEADERS:
+				resp.headers[k] = v
+		resp._content = entry['body']
+		resp.url = notModified.url
+		resp.request = notModified.request
+		resp.elapsed = notModified.elapsed
+		resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+		return resp
+
+	def Fetch(
+		self,
+		send: Callable[..., requests.Response],
+		url: str,
+		kwargs: dict,
+	) -> requests.Response:
+		key = self.MakeKey(url, kwargs)
+		entry = self._Load(key)
+
+		if entry is not None:
+			cachedHeaders = requests.structures.CaseInsensitiveDict(
+				entry['headers']
+			)
+			headers = dict(kwargs.get('headers', None) or {})
+			if 'ETag' in cachedHeaders:
+				headers['If-None-Match'] = cachedHeaders['ETag']
+			if 'Last-Modified' in cachedHeaders:
+				headers['If-Modified-Since'] = cachedHeaders['Last-Modified']
+			kwargs = dict(kwargs)
+			kwargs['headers'] = headers
+
+		resp = send(url=url, **kwargs)
+
+		if entry is not None and resp.status_code == 304:
+			with self._lock:
+				self._hits += 1
+			self._logger.debug(f'Not modified, replaying cached body of {url}')
+			return self._Replay(entry, resp)
+
+		with self._lock:
+			self._misses += 1
+		if resp.status_code == 200 and (
+			('ETag' in resp.headers) or ('Last-Modified' in resp.headers)
+		) and resp.headers.get('Content-Type', '').startswith('application/json'):
+			self._Store(key, resp)
+
+		return resp
+
+	def GetStats(self) -> Dict[str, int]:
+		with self._lock:
+			return {
+				'hits': self._hits,
+				'misses': self._misses,
+				'stores': self._stores,
+				'entries': len(self._entries),
+			}
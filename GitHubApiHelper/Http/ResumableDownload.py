@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import threading
+import requests
+
+from typing import List, Tuple, Union
+
+from ..Utils import CheckResp, FileLock
+from . import Download
+from .Client import HttpClient
+
+
+# write the sidecar at most once per this many downloaded bytes
+CHECKPOINT_INTERVAL = 8 * 1024 * 1024
+
+_Range = Tuple[int, int]
+
+
+def _MergeRanges(ranges: List[_Range]) -> List[_Range]:
+	merged = []
+	for start, end in sorted(ranges):
+		if merged and (start <= merged[-1][1] + 1):
+			merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+		else:
+			merged.append((start, end))
+	return merged
+
+
+class PartState(object):
+	'''
+	Tracks which byte ranges of a `.part` file are complete, persisted in a
+	`.part.json` sidecar next to it.
+	'''
+
+	def __init__(self, partPath: os.PathLike) -> None:
+		super(PartState, self).__init__()
+
+		self.partPath = partPath
+		self.sidecarPath = f'{partPath}.json'
+
+		self._lock = threading.Lock()
+		self._etag = None
+		self._size = 0
+		self._done: List[_Range] = []
+		self._unsaved = 0
+
+	def Load(self, etag: str, size: int) -> bool:
+		'''
+		Loads the sidecar; returns False if there is nothing usable to resume,
+		i.e., no sidecar, a missing/resized `.part` file, or a different ETag.
+		'''
+		try:
+			with open(self.sidecarPath, 'r') as f:
+				data = json.load(f)
+		except (FileNotFoundError, ValueError):
+			return False
+
+		if (data.get('etag', None) != etag) or (data.get('size', None) != size):
+			return False
+		if (not os.path.isfile(self.partPath)) or \
+			(os.path.getsize(self.partPath) != size):
+			return False
+
+		with self._lock:
+			self._etag = etag
+			self._size = size
+			self._done = _MergeRanges([tuple(r) for r in data.get('done', [])])
+		return True
+
+	def Reset(self, etag: str, size: int) -> None:
+		self.Remove()
+		with open(self.partPath, 'wb') as f:
+			f.truncate(size)
+		with self._lock:
+			self._etag = etag
+			self._size = size
+			self._done = []
+		self.Save()
+
+	def Remove(self) -> None:
+		for path in (self.partPath, self.sidecarPath):
+			if os.path.exists(path):
+				os.remove(path)
+
+	def GetDone(self) -> List[_Range]:
+		with self._lock:
+			return list(self._done)
+
+	def GetMissing(self) -> List[_Range]:
+		missing = []
+		pos = 0
+		for start, end in self.GetDone():
+			if start > pos:
+				missing.append((pos, start - 1))
+			pos = end + 1
+		if pos < self._size:
+			missing.append((pos, self._size - 1))
+		return missing
+
+	def MarkDone(self, start: int, length: int) -> None:
+		with self._lock:
+			self._done = _MergeRanges(self._done + [(start, start + length - 1)])
+			self._unsaved += length
+			needSave = self._unsaved >= CHECKPOINT_INTERVAL
+		if needSave:
+			self.Save()
+
+	def Save(self) -> None:
+		with self._lock:
+			data = {
+				'etag': self._etag,
+				'size': self._size,
+				'done': self._done,
+			}
+			self._unsaved = 0
+			FileLock.WritePrivateFile(
+				self.sidecarPath,
+				json.dumps(data).encode('utf-8'),
+			)
+
+
+def _SplitMissing(missing: List[_Range], numSegments: int) -> List[_Range]:
+	total = sum(end - start + 1 for start, end in missing)
+	segments = []
+	for start, end in missing:
+		share = max(1, round(numSegments * (end - start + 1) / total))
+		for subStart, subEnd in Download.SplitRanges(end - start + 1, share):
+			segments.append((start + subStart, start + subEnd))
+	return segments
+
+
+def _FetchMissing(
+	httpClient: HttpClient,
+	url: str,
+	headers: dict,
+	state: PartState,
+	numSegments: int,
+	chunkSize: int,
+) -> str:
+	missing = state.GetMissing()
+	done = state.GetDone()
+	onChunk = lambda offset, chunk: state.MarkDone(offset, len(chunk))
+
+	if (numSegments <= 1) and (len(missing) == 1) and \
+		(len(done) == 0 or (len(done) == 1 and done[0][0] == 0)):
+		# a single contiguous tail is missing; re-hash the prefix we already
+		# have from the local disk and continue hashing on the fly
+		prefixLen = done[0][1] + 1 if done else 0
+		hasher = Download.HashFilePrefix(
+			hashlib.sha256(), state.partPath, prefixLen, chunkSize
+		)
+		def _OnChunk(offset: int, chunk: bytes) -> None:
+			hasher.update(chunk)
+			onChunk(offset, chunk)
+		for byteRange in missing:
+			Download.FetchRange(
+				httpClient, url, headers, state.partPath, byteRange, chunkSize,
+				_OnChunk,
+			)
+		return hasher.hexdigest()
+
+	segments = _SplitMissing(missing, max(1, numSegments))
+	with concurrent.futures.ThreadPoolExecutor(
+		max_workers=max(1, min(numSegments, len(segments)))
+	) as executor:
+		futures = [
+			executor.submit(
+				Download.FetchRange,
+				httpClient, url, headers, state.partPath, byteRange, chunkSize,
+				onChunk,
+			)
+			for byteRange in segments
+		]
+		for future in futures:
+			future.result()
+
+	return Download.HashFile(state.partPath, chunkSize)
+
+
+def ResumableToFile(
+	httpClient: HttpClient,
+	resp: requests.Response,
+	savePath: os.PathLike,
+	numSegments: int = 1,
+	expectedSha256: Union[str, None] = None,
+	chunkSize: int = Download.DEFAULT_CHUNK_SIZE,
+) -> Tuple[str, int]:
+	'''
+	Like `Download.DownloadToFile`, but keeps the data in `<savePath>.part`
+	with a sidecar listing the completed byte ranges and the ETag.
+	A later call for the same `savePath` continues with Range requests if
+	the ETag still matches, and restarts cleanly otherwise.
+	Returns the SHA-256 hex digest and the size of the file.
+	'''
+	logger = logging.getLogger(__name__ + '.' + ResumableToFile.__name__)
+
+	state = PartState(f'{savePath}.part')
+
+	etag = resp.headers.get('ETag', None)
+	size = Download.GetRangeSize(resp)
+	if (etag is None) or (size is None):
+		logger.info('Server does not support resuming; downloading from scratch')
+		state.Remove()
+		return Download.StreamToFile(resp, savePath, chunkSize, expectedSha256)
+
+	finalUrl = resp.url
+	headers = Download.GetReplayHeaders(resp)
+
+	isResumed = state.Load(etag, size)
+	if isResumed:
+		logger.info(
+			f'Resuming {state.partPath}; missing ranges: {state.GetMissing()}'
+		)
+	else:
+		state.Reset(etag, size)
+
+	hasher = None
+	try:
+		if (not isResumed) and (numSegments <= 1):
+			# nothing to resume; consume the response we already have
+			hasher = hashlib.sha256()
+			def _OnChunk(offset: int, chunk: bytes) -> None:
+				hasher.update(chunk)
+				state.MarkDone(offset, len(chunk))
+			with resp:
+				Download.WriteStreamAt(resp, state.partPath, 0, chunkSize, _OnChunk)
+		else:
+			resp.close()
+
+		if len(state.GetMissing()) > 0:
+			fileHash = _FetchMissing(
+				httpClient, finalUrl, headers, state, numSegments, chunkSize,
+			)
+		elif hasher is not None:
+			fileHash = hasher.hexdigest()
+		else:
+			fileHash = Download.HashFile(state.partPath, chunkSize)
+	except Download.RangeNotSupportedError as e:
+		logger.info(f'{e}; restarting from scratch')
+		state.Remove()
+		resp = httpClient.Get(url=finalUrl, headers=headers, stream=True)
+		CheckResp.CheckRespErr(resp)
+		return Download.StreamToFile(resp, savePath, chunkSize, expectedSha256)
+	finally:
+		if os.path.exists(state.partPath):
+			state.Save()
+
+	try:
+		Download.CheckHash(fileHash, expectedSha256, savePath)
+	except ValueError:
+		# the data is bad; do not resume from it next time
+		state.Remove()
+		raise
+
+	os.replace(state.partPath, savePath)
+	os.remove(state.sidecarPath)
+
+	return fileHash, size
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import random
+import re
+import threading
+import time
+import requests
+
+from typing import Callable, Dict, List, Tuple, Union
+
+
+# methods that are safe to send again without being marked so
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'DELETE')
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_Timeout = Union[float, Tuple[float, float], None]
+
+
+def RewindBody(kwargs: dict) -> bool:
+	'''
+	Prepares the request body in `kwargs` to be sent again; returns False
+	if that is not possible (e.g., a stream that was already consumed).
+	'''
+	data = kwargs.get('data', None)
+	if (data is None) or isinstance(data, (bytes, str, dict, list, tuple)):
+		return True
+	if hasattr(data, 'seek') and hasattr(data, 'seekable') and data.seekable():
+		data.seek(0)
+		return True
+	return False
+
+
+class RetryPolicy(object):
+	'''
+	Sends a request again after a connection error, a timeout, or a
+	5xx status in `RETRY_STATUSES`, with exponential backoff and full
+	jitter.
+	Only idempotent requests are retried: GET, HEAD, OPTIONS and DELETE,
+	plus any request sent with `idempotent=True` (e.g., a conditional PUT).
+	POSTs, PUTs and PATCHes are never retried otherwise, since the server
+	may have acted on the first attempt.
+	Timeouts can be set per endpoint, by the first matching URL pattern,
+	and `deadline` bounds the total time spent on one request. A request
+	is not retried if its `Retry-After` is longer than `backoffMax`, or
+	would pass the deadline.
+	'''
+
+	DEFAULT_MAX_RETRIES = 3
+	DEFAULT_BACKOFF_BASE = 0.5
+	DEFAULT_BACKOFF_MAX = 30.0
+	# (connect, read) in seconds
+	DEFAULT_TIMEOUT = (10.0, 60.0)
+
+	def __init__(
+		self,
+		maxRetries: int = DEFAULT_MAX_RETRIES,
+		backoffBase: float = DEFAULT_BACKOFF_BASE,
+		backoffMax: float = DEFAULT_BACKOFF_MAX,
+		timeout: _Timeout = DEFAULT_TIMEOUT,
+		endpointTimeouts: Union[List[Tuple[str, _Timeout]], None] = None,
+		deadline: Union[float, None] = None,
+		clock: Callable[[], float] = time.monotonic,
+		sleep: Callable[[float], None] = time.sleep,
+	) -> None:
+		super(RetryPolicy, self).__init__()
+
+		self._maxRetries = maxRetries
+		self._backoffBase = backoffBase
+		self._backoffMax = backoffMax
+		self._timeout = timeout
+		self._endpointTimeouts = [
+			(re.compile(pattern), t) for pattern, t in (endpointTimeouts or [])
+		]
+		self._deadline = deadline
+		self._clock = clock
+		self._sleep = sleep
+
+		self._lock = threading.Lock()
+		self._requests = 0
+		self._retries = 0
+		self._gaveUp = 0
+		self._reasons: Dict[str, int] = {}
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	def GetTimeout(self, url: str) -> _Timeout:
+		for pattern, timeout in self._endpointTimeouts:
+			if pattern.search(url):
+				return timeout
+		return self._timeout
+
+	@staticmethod
+	def IsIdempotent(method: str, idempotent: Union[bool, None]) -> bool:
+		if idempotent is not None:
+			return idempotent
+		return method.upper() in IDEMPOTENT_METHODS
+
+	def _GetBackoff(
+		self,
+		attempt: int,
+		resp: Union[requests.Response, None],
+	) -> Union[float, None]:
+		# None if the server asks us to wait longer than `backoffMax`
+		backoff = random.uniform(
+			0, min(self._backoffMax, self._backoffBase * (2 ** attempt))
+		)
+		if resp is not None:
+			try:
+				retryAfter = float(resp.headers.get('Retry-After', 0))
+			except ValueError:
+				retryAfter = 0
+			if retryAfter > self._backoffMax:
+				return None
+			backoff = max(backoff, retryAfter)
+		return backoff
+
+	def _Count(self, reason: Union[str, None], gaveUp: bool = False) -> None:
+		with self._lock:
+			if reason is None:
+				self._requests += 1
+			elif gaveUp:
+				self._gaveUp += 1
+			else:
+				self._retries += 1
+				self._reasons[reason] = self._reasons.get(reason, 0) + 1
+
+	def _ApplyTimeout(self, url: str, kwargs: dict, startTime: float) -> dict:
+		timeout = kwargs.get('timeout', None)
+		if timeout is None:
+			timeout = self.GetTimeout(url)
+		if self._deadline is not None:
+			remaining = max(0.001, self._deadline - (self._clock() - startTime))
+			if timeout is None:
+				timeout = remaining
+			elif isinstance(timeout, tuple):
+				timeout = tuple(min(t, remaining) for t in timeout)
+			else:
+				timeout = min(timeout, remaining)
+		if timeout is None:
+			return kwargs
+		kwargs = dict(kwargs)
+		kwargs['timeout'] = timeout
+		return kwargs
+
+	def Send(
+		self,
+		send: Callable[..., requests.Response],
+		method: str,
+		url: str,
+		kwargs: dict,
+		idempotent: Union[bool, None] = None,
+	) -> requests.Response:
+		self._Count(None)
+		canRetry = self.IsIdempotent(method, idempotent)
+
+		startTime = self._clock()
+		attempt = 0
+		while True:
+			resp = None
+			try:
+				resp = send(url=url, **self._ApplyTimeout(url, kwargs, startTime))
+				if resp.status_code not in RETRY_STATUSES:
+					return resp
+				reason = str(resp.status_code)
+			except (requests.ConnectionError, requests.Timeout) as e:
+				# ConnectTimeout is a ConnectionError as well
+				reason = type(e).__name__
+				error = e
+
+			backoff = self._GetBackoff(attempt, resp)
+			elapsed = self._clock() - startTime
+			if (not canRetry) or (attempt >= self._maxRetries) or \
+				(backoff is None) or \
+				((self._deadline is not None) and
+					(elapsed + backoff >= self._deadline)) or \
+				(not RewindBody(kwargs)):
+				if attempt > 0:
+					self._Count(reason, gaveUp=True)
+					self._logger.warning(
+						f'{method} {url} failed ({reason}) after {attempt} retries'
+					)
+				if resp is not None:
+					return resp
+				raise error
+
+			self._Count(reason)
+			self._logger.info(
+				f'{method} {url} failed ({reason}); retrying in {backoff:.2f}s'
+			)
+			if resp is not None:
+				resp.close()
+			self._sleep(backoff)
+			attempt += 1
+
+	def GetStats(self) -> dict:
+		with self._lock:
+			return {
+				'requests': self._requests,
+				'retries': self._retries,
+				'gave_up': self._gaveUp,
+				'retry_reasons': dict(self._reasons),
+			}
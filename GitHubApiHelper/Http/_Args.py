@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import argparse
+import logging
+import os
+
+from .Client import DefaultHttpClient, HttpClient
+from .Coalesce import RequestCoalescer
+from .RateLimit import RateLimiter
+from .RespCache import DiskRespStore, RespCache
+from .Retry import RetryPolicy
+
+
+def _AddArgParsers(argParser: argparse.ArgumentParser) -> None:
+	httpGrp = argParser.add_argument_group('HTTP client options')
+	httpGrp.add_argument(
+		'--http-pool-conns', type=int,
+		default=HttpClient.DEFAULT_POOL_CONNECTIONS,
+		help='Number of per-host connection pools to keep'
+			f' (default: {HttpClient.DEFAULT_POOL_CONNECTIONS})',
+	)
+	httpGrp.add_argument(
+		'--http-pool-size', type=int,
+		default=HttpClient.DEFAULT_POOL_MAX_SIZE,
+		help='Max number of connections kept alive per host'
+			f' (default: {HttpClient.DEFAULT_POOL_MAX_SIZE})',
+	)
+	httpGrp.add_argument(
+		'--http-pool-block', action='store_true',
+		help='Block when the per-host pool is exhausted'
+			' instead of opening extra connections',
+	)
+	httpGrp.add_argument(
+		'--http-no-keep-alive', action='store_true',
+		help='Close connections after each request',
+	)
+	httpGrp.add_argument(
+		'--http-cache', action='store_true',
+		help='Revalidate GET responses with ETag/Last-Modified'
+			' and reuse cached bodies on 304 Not Modified',
+	)
+	httpGrp.add_argument(
+		'--http-cache-dir', type=os.path.abspath, required=False,
+		default=os.environ.get('GITHUB_API_HELPER_CACHE_DIR', None),
+		help='Directory to persist cached GET responses across runs;'
+			' implies --http-cache'
+			' (default: GITHUB_API_HELPER_CACHE_DIR env var)',
+	)
+	httpGrp.add_argument(
+		'--http-cache-size', type=int,
+		default=RespCache.DEFAULT_MAX_ENTRIES,
+		help='Max number of responses kept in memory'
+			f' (default: {RespCache.DEFAULT_MAX_ENTRIES})',
+	)
+	httpGrp.add_argument(
+		'--http-rate-limit', action='store_true',
+		help='Pace requests by the remaining rate limit budget and wait out'
+			' exhausted rate limits',
+	)
+	httpGrp.add_argument(
+		'--http-rate-limit-max-wait', type=float,
+		default=RateLimiter.DEFAULT_MAX_WAIT,
+		help='With --http-rate-limit, fail instead of waiting longer than'
+			' this many seconds for a rate limit to be lifted'
+			f' (default: {RateLimiter.DEFAULT_MAX_WAIT})',
+	)
+	httpGrp.add_argument(
+		'--http-coalesce', action='store_true',
+		help='Let concurrent identical GET requests share one response'
+			' instead of sending each of them',
+	)
+	httpGrp.add_argument(
+		'--http-retries', type=int, default=0,
+		help='Max number of times an idempotent request is sent again'
+			' after a connection error, a timeout, or a 5xx response'
+			' (default: 0, i.e., no retries)',
+	)
+	httpGrp.add_argument(
+		'--http-timeout', type=float, required=False,
+		help='Timeout in seconds for connecting and for each read'
+			' (default: none)',
+	)
+	httpGrp.add_argument(
+		'--http-timeout-for', type=_ParseEndpointTimeout,
+		action='append', default=[], metavar='PATTERN=SECONDS',
+		help='Timeout for requests whose URL matches the regex PATTERN,'
+			' e.g., "/releases/assets/=600"; may be given multiple times,'
+			' the first match wins',
+	)
+	httpGrp.add_argument(
+		'--http-deadline', type=float, required=False,
+		help='Max total seconds spent on one request, retries included',
+	)
+
+
+def _ParseEndpointTimeout(value: str) -> tuple:
+	pattern, sep, timeout = value.rpartition('=')
+	if not sep:
+		raise argparse.ArgumentTypeError(f'Expected PATTERN=SECONDS, got {value}')
+	try:
+		return (pattern, float(timeout))
+	except ValueError:
+		raise argparse.ArgumentTypeError(f'Invalid timeout in {value}')
+
+
+def _ProcArgs(args: argparse.Namespace) -> HttpClient:
+	httpClient = DefaultHttpClient()
+	httpClient.Configure(
+		poolConnections=args.http_pool_conns,
+		poolMaxSize=args.http_pool_size,
+		poolBlock=args.http_pool_block,
+		keepAlive=not args.http_no_keep_alive,
+	)
+
+	if args.http_cache or (args.http_cache_dir is not None):
+		diskStore = None
+		if args.http_cache_dir is not None:
+			diskStore = DiskRespStore(args.http_cache_dir)
+		httpClient.SetRespCache(
+			RespCache(maxEntries=args.http_cache_size, diskStore=diskStore)
+		)
+
+	if args.http_rate_limit:
+		httpClient.SetRateLimiter(
+			RateLimiter(maxWait=args.http_rate_limit_max_wait)
+		)
+
+	if args.http_coalesce:
+		httpClient.SetCoalescer(RequestCoalescer())
+
+	# without any of these, requests are sent once and without a timeout,
+	# as before they existed
+	if (args.http_retries > 0) or (args.http_timeout is not None) or \
+		(len(args.http_timeout_for) > 0) or (args.http_deadline is not None):
+		httpClient.SetRetryPolicy(
+			RetryPolicy(
+				maxRetries=args.http_retries,
+				timeout=args.http_timeout,
+				endpointTimeouts=args.http_timeout_for,
+				deadline=args.http_deadline,
+			)
+		)
+
+	return httpClient
+
+
+def _PostRun(args: argparse.Namespace, httpClient: HttpClient) -> None:
+	logger = logging.getLogger(__name__ + '.' + _PostRun.__name__)
+
+	respCache = httpClient.GetRespCache()
+	if respCache is not None:
+		logger.info(f'Response cache stats: {respCache.GetStats()}')
+
+	rateLimiter = httpClient.GetRateLimiter()
+	if rateLimiter is not None:
+		logger.info(f'Rate limiter stats: {rateLimiter.GetStats()}')
+		logger.debug(f'Rate limit budgets: {rateLimiter.GetBudgets()}')
+
+	coalescer = httpClient.GetCoalescer()
+	if coalescer is not None:
+		logger.info(f'Request coalescing stats: {coalescer.GetStats()}')
+
+	retryPolicy = httpClient.GetRetryPolicy()
+	if retryPolicy is not None:
+		logger.info(f'Retry stats: {retryPolicy.GetStats()}')
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+from typing import Union
+
+from . import FileLock
+
+try:
+	import fcntl
+except ImportError: # pragma: no cover - Windows
+	fcntl = None
+
+
+# ioctl request number of FICLONE on Linux
+_FICLONE = 0x40049409
+
+LINK_MODES = ('auto', 'reflink', 'hardlink', 'copy')
+
+
+def _Reflink(srcPath: os.PathLike, dstPath: os.PathLike) -> None:
+	if fcntl is None:
+		raise OSError('reflink is not supported on this platform')
+	with open(srcPath, 'rb') as src, open(dstPath, 'wb') as dst:
+		fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+
+
+class AssetCache(object):
+	'''
+	A local cache of release assets.
+	Files are stored once per SHA-256 under `<cacheDir>/blobs/`, and
+	`<cacheDir>/index.json` maps a key (host, repo, tag and asset) to a
+	blob plus a validator (the asset's id, `updated_at` and size) that must
+	match for the entry to be used, and optionally the ETag of the release
+	metadata it was taken from.
+	Once the blobs exceed `maxBytes`, the least recently used entries are
+	evicted.
+	'''
+
+	DEFAULT_MAX_BYTES = 10 * 1024 * 1024 * 1024
+
+	def __init__(
+		self,
+		cacheDir: os.PathLike,
+		maxBytes: int = DEFAULT_MAX_BYTES,
+		linkMode: str = 'auto',
+	) -> None:
+		super(AssetCache, self).__init__()
+
+		if linkMode not in LINK_MODES:
+			raise ValueError(f'Unknown link mode {linkMode}')
+
+		self._cacheDir = os.path.abspath(cacheDir)
+		self._blobDir = os.path.join(self._cacheDir, 'blobs')
+		self._indexPath = os.path.join(self._cacheDir, 'index.json')
+		os.makedirs(self._blobDir, exist_ok=True)
+
+		self._maxBytes = maxBytes
+		self._linkMode = linkMode
+		self._lock = FileLock.FileLock(self._indexPath + '.lock')
+
+		self._logger = logging.getLogger(__name__ + '.' + self.__class__.__name__)
+
+	@staticmethod
+	def MakeKey(host: str, owner: str, repoName: str, tag: str, asset: str) -> str:
+		return f'{host}/{owner}/{repoName}@{tag}/{asset}'
+
+	def _GetBlobPath(self, sha256: str) -> str:
+		return os.path.join(self._blobDir, sha256)
+
+	def _ReadIndex(self) -> dict:
+		try:
+			with open(self._indexPath, 'r') as f:
+				index = json.load(f)
+		except FileNotFoundError:
+			index = {}
+		except ValueError:
+			self._logger.warning(f'Ignoring corrupted index {self._indexPath}')
+			index = {}
+		index.setdefault('entries', {})
+		return index
+
+	def _WriteIndex(self, index: dict) -> None:
+		tmpPath = f'{self._indexPath}.{uuid.uuid4().hex}.tmp'
+		with open(tmpPath, 'w') as f:
+			json.dump(index, f, indent='\t')
+		os.replace(tmpPath, self._indexPath)
+
+	def Lookup(self, key: str, validator: str) -> Union[str, None]:
+		'''
+		Returns the SHA-256 of the cached file for `key`, if present and
+		still valid.
+		'''
+		with self._lock:
+			index = self._ReadIndex()
+			entry = index['entries'].get(key, None)
+			if entry is None:
+				return None
+			if (entry['validator'] != validator) or \
+				(not os.path.isfile(self._GetBlobPath(entry['sha256']))):
+				del index['entries'][key]
+				self._WriteIndex(index)
+				return None
+
+			entry['last_used'] = time.time()
+			self._WriteIndex(index)
+			return entry['sha256']
+
+	def GetEntry(self, key: str) -> Union[dict, None]:
+		'''
+		Returns the index entry of `key` as is, e.g., to revalidate it with
+		its `meta_etag`; use `Lookup` before using its file.
+		'''
+		with self._lock:
+			return self._ReadIndex()['entries'].get(key, None)
+
+	def HasBlob(self, sha256: str) -> bool:
+		return os.path.isfile(self._GetBlobPath(sha256.lower()))
+
+	def Materialize(self, sha256: str, savePath: os.PathLike) -> None:
+		'''
+		Places the cached blob at `savePath`, using a reflink, a hardlink or
+		a plain copy depending on the link mode.
+		'''
+		blobPath = self._GetBlobPath(sha256.lower())
+		dirPath, fileName = os.path.split(os.path.abspath(savePath))
+		tmpPath = os.path.join(dirPath, f'.{fileName}.{uuid.uuid4().hex}.tmp')
+
+		try:
+			if self._linkMode == 'hardlink':
+				os.link(blobPath, tmpPath)
+			elif self._linkMode == 'reflink':
+				_Reflink(blobPath, tmpPath)
+			elif self._linkMode == 'auto':
+				try:
+					_Reflink(blobPath, tmpPath)
+				except OSError:
+					shutil.copyfile(blobPath, tmpPath)
+			else:
+				shutil.copyfile(blobPath, tmpPath)
+			os.replace(tmpPath, savePath)
+		except BaseException:
+			if os.path.exists(tmpPath):
+				os.remove(tmpPath)
+			raise
+
+		self._logger.debug(f'Materialized {sha256} at {savePath}')
+
+	def Add(
+		self,
+		key: str,
+		validator: str,
+		filePath: os.PathLike,
+		sha256: str,
+		metaEtag: Union[str, None] = None,
+	) -> None:
+		'''
+		`metaEtag` is the ETag of the metadata the validator was taken from,
+		so the entry can be revalidated with a conditional request.
+		'''
+		sha256 = sha256.lower()
+		blobPath = self._GetBlobPath(sha256)
+
+		if not os.path.isfile(blobPath):
+			tmpPath = f'{blobPath}.{uuid.uuid4().hex}.tmp'
+			try:
+				if self._linkMode == 'hardlink':
+					try:
+						os.link(filePath, tmpPath)
+					except OSError:
+						shutil.copyfile(filePath, tmpPath)
+				else:
+					shutil.copyfile(filePath, tmpPath)
+				os.replace(tmpPath, blobPath)
+			except BaseException:
+				if os.path.exists(tmpPath):
+					os.remove(tmpPath)
+				raise
+
+		with self._lock:
+			index = self._ReadIndex()
+			index['entries'][key] = {
+				'sha256': sha256,
+				'validator': validator,
+				'size': os.path.getsize(blobPath),
+				'last_used': time.time(),
+			}
+			if metaEtag is not None:
+				index['entries'][key]['meta_etag'] = metaEtag
+			self._Evict(index, keepKey=key)
+			self._WriteIndex(index)
+
+	def _Evict(self, index: dict, keepKey: str) -> None:
+		entries = index['entries']
+
+		blobSizes = {}
+		for entry in entries.values():
+			blobSizes[entry['sha256']] = entry['size']
+		totalSize = sum(blobSizes.values())
+
+		for key, entry in sorted(entries.items(), key=lambda kv: kv[1]['last_used']):
+			if totalSize <= self._maxBytes:
+				break
+			if key == keepKey:
+				continue
+			del entries[key]
+			sha256 = entry['sha256']
+			if all(e['sha256'] != sha256 for e in entries.values()):
+				# no other key refers to this blob
+				blobPath = self._GetBlobPath(sha256)
+				if os.path.exists(blobPath):
+					os.remove(blobPath)
+				totalSize -= blobSizes[sha256]
+			self._logger.debug(f'Evicted {key}')
+
+
+def GetAssetValidator(asset: dict) -> str:
+	# validator from the asset object in the release metadata
+	return f'asset:{asset["id"]}:{asset["updated_at"]}:{asset["size"]}'
+
+
+def AddArgs(argParser: argparse.ArgumentParser) -> None:
+	argParser.add_argument(
+		'--asset-cache', type=os.path.abspath, required=False,
+		default=os.environ.get('GITHUB_API_HELPER_ASSET_CACHE', None),
+		help='Directory of the local release asset cache'
+			' (default: GITHUB_API_HELPER_ASSET_CACHE env var)',
+	)
+	argParser.add_argument(
+		'--asset-cache-max-mb', type=int,
+		default=AssetCache.DEFAULT_MAX_BYTES // (1024 * 1024),
+		help='Max size of the asset cache in MiB'
+			f' (default: {AssetCache.DEFAULT_MAX_BYTES // (1024 * 1024)})',
+	)
+	argParser.add_argument(
+		'--asset-cache-link', type=str, choices=LINK_MODES, default='auto',
+		help='How cached assets are placed at the save path; "auto" tries a'
+			' reflink and falls back to a copy. A hardlink shares the cached'
+			' file, so it must not be modified in place (default: auto)',
+	)
+
+
+def FromArgs(args: argparse.Namespace) -> Union[AssetCache, None]:
+	if args.asset_cache is None:
+		return None
+	return AssetCache(
+		cacheDir=args.asset_cache,
+		maxBytes=args.asset_cache_max_mb * 1024 * 1024,
+		linkMode=args.asset_cache_link,
+	)
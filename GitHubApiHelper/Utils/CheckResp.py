@@ -40,5 +40,9 @@ def CheckRespErr(resp: requests.Response) -> None:
 				logger.error(resp.text)
 
 		LogScope(resp)
+		if resp.headers.get('X-RateLimit-Remaining', None) == '0':
+			resource = resp.headers.get('X-RateLimit-Resource', 'core')
+			reset = resp.headers.get('X-RateLimit-Reset', '?')
+			logger.error(f'Rate limit of {resource} exhausted; resets at {reset}')
 
 		raise
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import os
+import threading
+
+try:
+	import fcntl
+	_HAS_FCNTL = True
+except ImportError: # pragma: no cover - Windows
+	import msvcrt
+	_HAS_FCNTL = False
+
+
+class FileLock(object):
+	'''
+	An exclusive inter-process lock backed by a lock file.
+	The lock is reentrant within the same process, so a holder can call
+	into code that takes the same lock again.
+	'''
+
+	def __init__(self, path: os.PathLike) -> None:
+		super(FileLock, self).__init__()
+
+		self._path = path
+		self._threadLock = threading.RLock()
+		self._depth = 0
+		self._fd = None
+
+	def _LockFd(self, fd: int) -> None:
+		if _HAS_FCNTL:
+			fcntl.flock(fd, fcntl.LOCK_EX)
+		else:
+			msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+	def _UnlockFd(self, fd: int) -> None:
+		if _HAS_FCNTL:
+			fcntl.flock(fd, fcntl.LOCK_UN)
+		else:
+			os.lseek(fd, 0, os.SEEK_SET)
+			msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+	def Acquire(self) -> None:
+		self._threadLock.acquire()
+		if self._depth == 0:
+			try:
+				fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+				self._LockFd(fd)
+			except Exception:
+				self._threadLock.release()
+				raise
+			self._fd = fd
+		self._depth += 1
+
+	def Release(self) -> None:
+		self._depth -= 1
+		if self._depth == 0:
+			fd, self._fd = self._fd, None
+			try:
+				self._UnlockFd(fd)
+			finally:
+				os.close(fd)
+		self._threadLock.release()
+
+	def __enter__(self) -> 'FileLock':
+		self.Acquire()
+		return self
+
+	def __exit__(self, excType, excVal, excTb) -> None:
+		self.Release()
+
+
+def WritePrivateFile(path: os.PathLike, content: bytes) -> None:
+	'''
+	Atomically replace `path` with `content`, readable only by the owner.
+	'''
+	tmpPath = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+	fd = os.open(tmpPath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+	try:
+		with os.fdopen(fd, 'wb') as f:
+			f.write(content)
+		os.replace(tmpPath, path)
+	except Exception:
+		if os.path.exists(tmpPath):
+			os.remove(tmpPath)
+		raise
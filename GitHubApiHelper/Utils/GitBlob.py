@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import hashlib
+import os
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def HashFile(filePath: os.PathLike, chunkSize: int = DEFAULT_CHUNK_SIZE) -> str:
+	'''
+	Returns the git blob SHA-1 of a file (i.e., `git hash-object`),
+	reading it chunk by chunk.
+	'''
+	with open(filePath, 'rb') as f:
+		size = os.fstat(f.fileno()).st_size
+		hasher = hashlib.sha1(f'blob {size}\0'.encode('utf-8'))
+		while True:
+			chunk = f.read(chunkSize)
+			if not chunk:
+				break
+			hasher.update(chunk)
+	return hasher.hexdigest()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import contextlib
+import io
+import sys
+import threading
+
+from typing import Iterator, TextIO
+
+
+class ThreadLocalStdout(io.TextIOBase):
+	'''
+	A stand-in for `sys.stdout` that sends the output of a thread to its
+	own buffer while it is inside `Capture()`, and to the real stdout
+	otherwise; unlike `contextlib.redirect_stdout`, this works when many
+	threads print at the same time.
+	'''
+
+	def __init__(self, fallback: TextIO) -> None:
+		super(ThreadLocalStdout, self).__init__()
+
+		self._fallback = fallback
+		self._local = threading.local()
+
+	def _GetTarget(self) -> TextIO:
+		buf = getattr(self._local, 'buf', None)
+		return self._fallback if buf is None else buf
+
+	def write(self, s: str) -> int:
+		return self._GetTarget().write(s)
+
+	def flush(self) -> None:
+		self._GetTarget().flush()
+
+	def GetFallback(self) -> TextIO:
+		return self._fallback
+
+	@contextlib.contextmanager
+	def Capture(self) -> Iterator[io.StringIO]:
+		prevBuf = getattr(self._local, 'buf', None)
+		buf = io.StringIO()
+		self._local.buf = buf
+		try:
+			yield buf
+		finally:
+			self._local.buf = prevBuf
+
+
+@contextlib.contextmanager
+def InstallThreadLocalStdout() -> Iterator[ThreadLocalStdout]:
+	if isinstance(sys.stdout, ThreadLocalStdout):
+		# already installed by an outer caller
+		yield sys.stdout
+		return
+
+	stdout = ThreadLocalStdout(sys.stdout)
+	sys.stdout = stdout
+	try:
+		yield stdout
+	finally:
+		sys.stdout = stdout.GetFallback()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import argparse
+import contextlib
+import os
+import sqlite3
+import time
+
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from . import VersionKey
+
+
+# a full refresh at least this often bounds how long tags deleted or
+# moved on the remote can stay in the index
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS repos (
+	repo TEXT PRIMARY KEY,
+	etag TEXT,
+	refreshed_at REAL,
+	full_refreshed_at REAL
+);
+CREATE TABLE IF NOT EXISTS tags (
+	repo TEXT NOT NULL,
+	name TEXT NOT NULL,
+	sha TEXT,
+	ver_key TEXT,
+	ver TEXT,
+	is_pre INTEGER,
+	PRIMARY KEY (repo, name)
+);
+CREATE INDEX IF NOT EXISTS tags_by_ver ON tags (repo, ver_key);
+'''
+
+
+class TagIndex(object):
+	'''
+	A local SQLite index of the tags of repositories.
+	Each tag is stored with its commit SHA and, if it is a valid version,
+	an order-preserving version key (see `VersionKey.EncodeKey`), so the
+	latest version is read from the index without parsing any tag.
+	'''
+
+	MAX_QUERY_PARAMS = 500
+
+	def __init__(self, dbPath: os.PathLike) -> None:
+		super(TagIndex, self).__init__()
+
+		self._dbPath = os.path.abspath(dbPath)
+		os.makedirs(os.path.dirname(self._dbPath), exist_ok=True)
+		with self._Connect() as conn:
+			conn.executescript(_SCHEMA)
+
+	@contextlib.contextmanager
+	def _Connect(self) -> Iterator[sqlite3.Connection]:
+		# one connection per call, so the index can be used from any thread
+		conn = sqlite3.connect(self._dbPath, timeout=30)
+		try:
+			with conn:
+				yield conn
+		finally:
+			conn.close()
+
+	@staticmethod
+	def MakeKey(host: str, owner: str, repoName: str) -> str:
+		return f'{host}/{owner}/{repoName}'
+
+	def GetRepoInfo(self, repo: str) -> Union[Dict[str, object], None]:
+		with self._Connect() as conn:
+			row = conn.execute(
+				'SELECT etag, refreshed_at, full_refreshed_at FROM repos'
+				' WHERE repo = ?',
+				(repo, ),
+			).fetchone()
+		if row is None:
+			return None
+		return {
+			'etag': row[0],
+			'refreshed_at': row[1],
+			'full_refreshed_at': row[2] or 0.0,
+		}
+
+	def GetTagShas(self, repo: str, names: Iterable[str]) -> Dict[str, str]:
+		names = list(names)
+		shas = {}
+		with self._Connect() as conn:
+			# stay below SQLite's limit on the number of query parameters
+			for i in range(0, len(names), self.MAX_QUERY_PARAMS):
+				chunk = names[i:i + self.MAX_QUERY_PARAMS]
+				shas.update(conn.execute(
+					'SELECT name, sha FROM tags WHERE repo = ? AND name IN'
+					f' ({", ".join("?" * len(chunk))})',
+					[ repo ] + chunk,
+				).fetchall())
+		return shas
+
+	def Update(self, repo: str, tags: Iterable[Tuple[str, str]]) -> int:
+		'''
+		Adds or updates the given (name, commit SHA) tags of `repo`.
+		Returns the number of tags that were new or changed.
+		'''
+		tags = dict(tags)
+		known = self.GetTagShas(repo, tags.keys())
+		rows = []
+		for name, sha in tags.items():
+			if known.get(name, None) == sha:
+				continue
+			parsed = VersionKey.ParseTag(name)
+			if parsed is None:
+				verKey, ver, isPre = None, None, None
+			else:
+				sortKey, ver, isPre = parsed
+				verKey = VersionKey.EncodeKey(sortKey)
+			rows.append((repo, name, sha, verKey, ver, isPre))
+
+		if len(rows) > 0:
+			with self._Connect() as conn:
+				conn.executemany(
+					'INSERT OR REPLACE INTO tags'
+					' (repo, name, sha, ver_key, ver, is_pre)'
+					' VALUES (?, ?, ?, ?, ?, ?)',
+					rows,
+				)
+		return len(rows)
+
+	def Prune(self, repo: str, keepNames: Iterable[str]) -> int:
+		'''
+		Removes the tags of `repo` not in `keepNames`; returns how many.
+		'''
+		with self._Connect() as conn:
+			conn.execute('CREATE TEMP TABLE keep (name TEXT PRIMARY KEY)')
+			conn.executemany(
+				'INSERT OR IGNORE INTO keep (name) VALUES (?)',
+				[ (name, ) for name in keepNames ],
+			)
+			removed = conn.execute(
+				'DELETE FROM tags WHERE repo = ?'
+				' AND name NOT IN (SELECT name FROM keep)',
+				(repo, ),
+			).rowcount
+			conn.execute('DROP TABLE keep')
+		return removed
+
+	def SetRefreshed(
+		self,
+		repo: str,
+		etag: Union[str, None],
+		isFull: bool = False,
+	) -> None:
+		# only recorded once a refresh is complete, so an interrupted one
+		# is not mistaken for an up-to-date index
+		now = time.time()
+		with self._Connect() as conn:
+			conn.execute(
+				'INSERT INTO repos (repo, etag, refreshed_at, full_refreshed_at)'
+				' VALUES (?, ?, ?, ?) ON CONFLICT (repo) DO UPDATE SET'
+				' etag = excluded.etag, refreshed_at = excluded.refreshed_at,'
+				' full_refreshed_at ='
+				' COALESCE(excluded.full_refreshed_at, full_refreshed_at)',
+				(repo, etag, now, now if isFull else None),
+			)
+
+	def GetMaxVersion(
+		self,
+		repo: str,
+		includePre: bool = True,
+	) -> Union[Tuple[str, str], None]:
+		'''
+		Returns the (tag name, normalized version) of the latest version tag
+		of `repo`, read from the `tags_by_ver` index.
+		'''
+		query = 'SELECT name, ver FROM tags WHERE repo = ? AND ver_key IS NOT NULL'
+		if not includePre:
+			query += ' AND is_pre = 0'
+		with self._Connect() as conn:
+			row = conn.execute(
+				query + ' ORDER BY ver_key DESC LIMIT 1', (repo, )
+			).fetchone()
+		if row is None:
+			return None
+		return (row[0], row[1])
+
+	def GetTagNames(self, repo: str) -> List[str]:
+		with self._Connect() as conn:
+			rows = conn.execute(
+				'SELECT name FROM tags WHERE repo = ?', (repo, )
+			).fetchall()
+		return [ row[0] for row in rows ]
+
+	def GetStats(self, repo: str) -> Dict[str, int]:
+		with self._Connect() as conn:
+			total, versions = conn.execute(
+				'SELECT COUNT(*), COUNT(ver_key) FROM tags WHERE repo = ?',
+				(repo, ),
+			).fetchone()
+		return { 'tags': total, 'versions': versions }
+
+
+def AddArgs(argParser: argparse.ArgumentParser) -> None:
+	argParser.add_argument(
+		'--tag-index', type=os.path.abspath, required=False,
+		default=os.environ.get('GITHUB_API_HELPER_TAG_INDEX', None),
+		help='SQLite file of the local tag index; tags are fetched again only'
+			' if the first tag page changed or the index is older than'
+			' --tag-index-max-age'
+			' (default: GITHUB_API_HELPER_TAG_INDEX env var)',
+	)
+	argParser.add_argument(
+		'--tag-index-full-refresh', action='store_true',
+		help='Fetch every tag page, even if the first one is unchanged',
+	)
+	argParser.add_argument(
+		'--tag-index-max-age', type=float, default=DEFAULT_MAX_AGE,
+		help='Do a full refresh if the last one is older than this many'
+			f' seconds (default: {DEFAULT_MAX_AGE})',
+	)
+
+
+def FromArgs(args: argparse.Namespace) -> Union[TagIndex, None]:
+	if args.tag_index is None:
+		return None
+	return TagIndex(dbPath=args.tag_index)
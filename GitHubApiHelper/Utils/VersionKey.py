@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import functools
+import re
+
+from packaging import version
+from typing import Iterable, Tuple, Union
+
+
+# pre-release letters in PEP 440 order, after normalization
+_PRE_ORDER = { 'a': 0, 'b': 1, 'rc': 2 }
+_PRE_SPELLINGS = {
+	'a': 'a', 'alpha': 'a',
+	'b': 'b', 'beta': 'b',
+	'c': 'rc', 'rc': 'rc', 'pre': 'rc', 'preview': 'rc',
+}
+
+# the common tag forms, e.g., "v1.2.3", "1.2.3rc1" and "v1.2.3-beta.2",
+# which are handled without building a `packaging` version; numbers with
+# leading zeros are left out, so the release part is already normalized
+_SIMPLE_VER_RE = re.compile(
+	r'[vV]?((?:0|[1-9]\d*)(?:\.(?:0|[1-9]\d*))*)'
+	r'(?:[-_.]?(a|b|c|rc|alpha|beta|pre|preview)[-_.]?(\d*))?',
+	flags=re.ASCII | re.IGNORECASE,
+)
+# every version starts like this (PEP 440 allows surrounding whitespace)
+_VER_START_RE = re.compile(r'\s*[vV]?\d', flags=re.ASCII)
+
+# segments of a sort key without a value; "low"/"high" sort before/after
+# every segment with a value
+_LOW = (0, )
+_HIGH = (2, )
+
+_SortKey = tuple
+_ParsedTag = Tuple[_SortKey, str, bool]
+
+
+def _StripRelease(release: Tuple[int, ...]) -> Tuple[int, ...]:
+	# trailing zeros do not count, i.e., 1.0 == 1.0.0
+	while len(release) > 1 and release[-1] == 0:
+		release = release[:-1]
+	return release
+
+
+def SortKey(ver: version.Version) -> _SortKey:
+	'''
+	Returns a tuple that sorts in the same order as PEP 440 orders the
+	versions, like `packaging` compares them, but made only of ints, strs
+	and tuples.
+	'''
+	if (ver.pre is None) and (ver.post is None) and (ver.dev is not None):
+		# 1.0.dev0 < 1.0a0
+		pre = _LOW
+	elif ver.pre is None:
+		pre = _HIGH
+	else:
+		pre = (1, _PRE_ORDER[ver.pre[0]], ver.pre[1])
+	post = _LOW if ver.post is None else (1, ver.post)
+	dev = _HIGH if ver.dev is None else (1, ver.dev)
+	if ver.local is None:
+		local = _LOW
+	else:
+		# numeric segments sort after alphanumeric ones
+		local = (1, tuple(
+			(1, int(seg)) if seg.isdigit() else (0, seg)
+			for seg in ver.local.split('.')
+		))
+	return (ver.epoch, _StripRelease(ver.release), pre, post, dev, local)
+
+
+def _EncodeInt(n: int) -> str:
+	# length-prefixed, so longer numbers sort after shorter ones
+	s = str(n)
+	return f'{len(s):02d}{s}'
+
+
+def _EncodeSegment(segment: tuple) -> str:
+	# "A" for low, "C" for high, and "B" followed by the values
+	if segment == _LOW:
+		return 'A'
+	if segment == _HIGH:
+		return 'C'
+	return 'B' + ''.join(_EncodeInt(n) for n in segment[1:])
+
+
+def EncodeKey(key: _SortKey) -> str:
+	'''
+	Encodes a `SortKey` as a string that sorts (as plain text) in the same
+	order, so the ordering can be kept by an index, e.g., in SQLite.
+	'''
+	epoch, release, pre, post, dev, local = key
+	# '!' sorts before '.', so 1.2 < 1.2.1
+	releaseStr = ''.join('.' + _EncodeInt(n) for n in release) + '!'
+	if local == _LOW:
+		localStr = 'A'
+	else:
+		localStr = 'B' + ''.join(
+			('.1' + _EncodeInt(v)) if t == 1 else ('.0' + v + '!')
+			for t, v in local[1]
+		) + '!'
+	return '|'.join([
+		_EncodeInt(epoch),
+		releaseStr,
+		_EncodeSegment(pre),
+		_EncodeSegment(post),
+		_EncodeSegment(dev),
+		localStr,
+	])
+
+
+def _ParseSimple(tag: str) -> Union[_ParsedTag, None]:
+	match = _SIMPLE_VER_RE.fullmatch(tag)
+	if match is None:
+		return None
+	normVer, preLetter, preNum = match.groups()
+	release = tuple(map(int, normVer.split('.')))
+	if release[-1] == 0:
+		release = _StripRelease(release)
+	if preLetter is None:
+		# the same as SortKey, with no epoch, pre, post, dev or local segment
+		return ((0, release, _HIGH, _LOW, _HIGH, _LOW), normVer, False)
+	preLetter = _PRE_SPELLINGS[preLetter.lower()]
+	pre = (1, _PRE_ORDER[preLetter], int(preNum or 0))
+	normVer += preLetter + str(pre[2])
+	return ((0, release, pre, _LOW, _HIGH, _LOW), normVer, True)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def ParseTag(tag: str) -> Union[_ParsedTag, None]:
+	'''
+	Returns the (sort key, normalized version, is pre-release) of a tag,
+	or None if the tag is not a valid version.
+	Only tags in less common forms (e.g., "1.0.post1" or "1!2.0") are parsed
+	by `packaging`. Results are memoized for the whole process, so tag names
+	seen again, e.g., by other repos of a fan-out, cost a lookup.
+	'''
+	parsed = _ParseSimple(tag)
+	if parsed is not None:
+		return parsed
+	if _VER_START_RE.match(tag) is None:
+		# e.g., "nightly" or "build-42"
+		return None
+	try:
+		ver = version.Version(tag)
+	except version.InvalidVersion:
+		return None
+	return (SortKey(ver), str(ver), ver.is_prerelease)
+
+
+def MaxTag(tags: Iterable[str], includePre: bool = True) -> Union[_ParsedTag, None]:
+	'''
+	Returns the parsed form of the latest version among `tags`, skipping
+	tags that are not versions.
+	'''
+	maxParsed = None
+	for tag in tags:
+		parsed = ParseTag(tag)
+		if (parsed is None) or (parsed[2] and not includePre):
+			continue
+		if (maxParsed is None) or (parsed[0] > maxParsed[0]):
+			maxParsed = parsed
+	return maxParsed
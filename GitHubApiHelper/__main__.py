@@ -13,6 +13,7 @@ import logging
 
 from .Auth import _Args as AuthArgs
 from .APIs import _Args as ApiArgs
+from .Http import _Args as HttpArgs
 from . import _Meta
 
 
@@ -35,6 +36,8 @@ def main() -> None:
 		dest='operation',
 	)
 	AuthArgs._AddArgParsers(argParser=argParser)
+	HttpArgs._AddArgParsers(argParser=argParser)
+	ApiArgs._AddArgParsers(argParser=argParser)
 	ApiArgs._AddOpArgParsers(opArgParser=opArgParser)
 	args = argParser.parse_args()
 
@@ -43,12 +46,16 @@ def main() -> None:
 	if args.verbose:
 		logging.basicConfig(level=logging.DEBUG, format=loggingFormat)
 
+	httpClient = HttpArgs._ProcArgs(args=args)
+
 	authMethod = AuthArgs._ProcArgs(args=args)
 
 	apiRunner = ApiArgs._ProcArgs(args=args)
 
 	apiRunner.CliRun(auth=authMethod)
 
+	HttpArgs._PostRun(args=args, httpClient=httpClient)
+
 
 if __name__ == '__main__':
 	main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+# Compares the per-request cost of signing a fresh GitHub App JWT with
+# reusing the memoized one held by AppPrivateKey.
+#
+# Usage: python3 benchmarks/JwtSigning.py [--requests N]
+
+
+import argparse
+import os
+import sys
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from GitHubApiHelper.Auth.GhAppPrivateKey import AppPrivateKey
+
+
+def GenTestKey() -> bytes:
+	key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+	return key.private_bytes(
+		encoding=serialization.Encoding.PEM,
+		format=serialization.PrivateFormat.PKCS8,
+		encryption_algorithm=serialization.NoEncryption(),
+	)
+
+
+def Measure(func, numReqs: int) -> float:
+	start = time.perf_counter()
+	for _ in range(numReqs):
+		func()
+	return (time.perf_counter() - start) / numReqs
+
+
+def main() -> None:
+	argParser = argparse.ArgumentParser()
+	argParser.add_argument('--requests', '-n', type=int, default=1000)
+	args = argParser.parse_args()
+
+	appKey = AppPrivateKey(privKey=GenTestKey(), appId='123456')
+
+	def SignEveryTime() -> str:
+		return appKey._SignEncoded(appKey._GenPayload(int(time.time())))
+
+	before = Measure(SignEveryTime, args.requests)
+	after = Measure(appKey._GenEncoded, args.requests)
+
+	print(f'requests:         {args.requests}')
+	print(f'sign per request: {before * 1e6:10.1f} us/request')
+	print(f'memoized JWT:     {after * 1e6:10.1f} us/request')
+	print(f'speedup:          {before / after:10.1f}x')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2023 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+# Compares finding the latest version among synthetic tags by parsing every
+# tag with packaging.version against the sort-key path of VersionKey, both
+# on first use and with the memoized results of an earlier call.
+#
+# On first use (i.e., a one-shot CLI run) the sort-key path is only about as
+# fast as packaging, since both spend most of the time in per-tag Python
+# code; such runs should use --tag-index instead, which reads the latest
+# version from SQLite without parsing any tag. The memo pays off when one
+# process looks at the same tag names again, e.g., a fan-out over repos
+# following the same version scheme, which the "fan-out" lines measure.
+#
+# Usage: python3 benchmarks/TagVersions.py [--tags N] [--repos N] [--rounds N]
+
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from packaging import version
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from GitHubApiHelper.Utils import VersionKey
+
+
+def GenTags(numTags: int, seed: int = 12345) -> list:
+	rand = random.Random(seed)
+	tags = []
+	for i in range(numTags):
+		ver = f'{i // 1000}.{(i // 10) % 100}.{i % 10}'
+		kind = rand.random()
+		if kind < 0.70:
+			tags.append(f'v{ver}')
+		elif kind < 0.85:
+			tags.append(f'{ver}rc{rand.randint(1, 3)}')
+		elif kind < 0.95:
+			# less common forms, parsed by packaging
+			tags.append(rand.choice([
+				f'{ver}.post1', f'v{ver}-beta.2', f'{ver}.dev3', f'1!{ver}',
+			]))
+		else:
+			tags.append(rand.choice([ f'nightly-{i}', 'latest', f'build_{i}' ]))
+	rand.shuffle(tags)
+	return tags
+
+
+def ParseAll(tags: list) -> str:
+	# the former approach, also skipping tags that are not versions
+	vers = []
+	for tag in tags:
+		try:
+			vers.append(version.parse(tag))
+		except version.InvalidVersion:
+			pass
+	return str(max(vers))
+
+
+def Measure(func, rounds: int) -> float:
+	# the best round, which is the least disturbed by other processes
+	best = float('inf')
+	for _ in range(rounds):
+		start = time.perf_counter()
+		func()
+		best = min(best, time.perf_counter() - start)
+	return best
+
+
+def main() -> None:
+	argParser = argparse.ArgumentParser()
+	argParser.add_argument('--tags', '-n', type=int, default=10000)
+	argParser.add_argument('--repos', type=int, default=20)
+	argParser.add_argument('--rounds', '-r', type=int, default=10)
+	args = argParser.parse_args()
+
+	tags = GenTags(args.tags)
+	# repos with mostly the same tag names, like those released together
+	reposTags = [
+		GenTags(args.tags // 10, seed=seed) for seed in range(args.repos)
+	]
+
+	def ColdKeys() -> str:
+		VersionKey.ParseTag.cache_clear()
+		return VersionKey.MaxTag(tags)[1]
+
+	def WarmKeys() -> str:
+		return VersionKey.MaxTag(tags)[1]
+
+	def FanOutParse() -> list:
+		return [ ParseAll(repoTags) for repoTags in reposTags ]
+
+	def FanOutKeys() -> list:
+		# starting cold, like a new process
+		VersionKey.ParseTag.cache_clear()
+		return [ VersionKey.MaxTag(repoTags)[1] for repoTags in reposTags ]
+
+	assert ParseAll(tags) == ColdKeys()
+	assert FanOutParse() == FanOutKeys()
+
+	before = Measure(lambda: ParseAll(tags), args.rounds)
+	cold = Measure(ColdKeys, args.rounds)
+	warm = Measure(WarmKeys, args.rounds)
+	fanOutBefore = Measure(FanOutParse, args.rounds)
+	fanOut = Measure(FanOutKeys, args.rounds)
+
+	print(f'tags:              {args.tags}')
+	print(f'packaging.version: {before * 1e3:10.2f} ms/call')
+	print(f'sort keys (cold):  {cold * 1e3:10.2f} ms/call'
+		f'  ({before / cold:.1f}x)')
+	print(f'sort keys (warm):  {warm * 1e3:10.2f} ms/call'
+		f'  ({before / warm:.1f}x)')
+	print(f'fan-out over {args.repos} repos of {args.tags // 10} tags:')
+	print(f'packaging.version: {fanOutBefore * 1e3:10.2f} ms/run')
+	print(f'sort keys:         {fanOut * 1e3:10.2f} ms/run'
+		f'  ({fanOutBefore / fanOut:.1f}x)')
+
+
+if __name__ == '__main__':
+	main()
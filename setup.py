@@ -34,4 +34,12 @@ setup(
 		'PyNaCl>=1.5.0',
 		'packaging>=23.2',
 	],
+	extras_require={
+		'yaml': [
+			'PyYAML>=6.0',
+		],
+		'async': [
+			'httpx>=0.24',
+		],
+	},
 )